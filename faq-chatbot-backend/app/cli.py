@@ -0,0 +1,140 @@
+"""
+Command-line tools for the FAQ knowledge base.
+
+Usage:
+    python -m app.cli ingest app/data/fintech_faqs.json
+    python -m app.cli ingest faqs.ndjson.gz --full-sync
+    python -m app.cli export-snapshot snapshots --publish
+    python -m app.cli import-snapshot snapshots/current
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+from typing import AsyncIterator
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from app.models.faq import FAQ, FAQIngestionFailure, FAQIngestionReport
+from app.services.knowledge_base import KnowledgeBaseService
+from app.services.snapshot import new_snapshot_id, publish_snapshot
+from app.utils.ndjson import iter_lines, parse_faqs
+
+
+async def read_file_chunks(path: str, chunk_size: int = 1 << 16) -> AsyncIterator[bytes]:
+    with open(path, "rb") as f:
+        while chunk := await asyncio.to_thread(f.read, chunk_size):
+            yield chunk
+
+
+async def ingest(path: str, full_sync: bool) -> int:
+    invalid_records = []
+    
+    def on_invalid_line(failure: FAQIngestionFailure):
+        invalid_records.append(failure)
+        print(f"  invalid {failure.id}: {failure.error}", file=sys.stderr)
+    
+    async def on_progress(report: FAQIngestionReport):
+        print(
+            f"  {report.processed} read, {report.added} added, {report.updated} updated, "
+            f"{report.skipped} skipped, {len(report.failures)} failed",
+            file=sys.stderr
+        )
+    
+    if path.endswith(".json"):
+        # The bundled dataset format: {"faqs": [...]}
+        with open(path, "r", encoding="utf-8") as f:
+            faqs = [FAQ(**faq) for faq in json.load(f)["faqs"]]
+    else:
+        lines = iter_lines(read_file_chunks(path), compressed=path.endswith(".gz"))
+        faqs = parse_faqs(lines, on_invalid_line)
+    
+    kb_service = KnowledgeBaseService()
+    try:
+        report = await kb_service.add_faqs_batch(
+            faqs,
+            progress=on_progress,
+            full_sync=full_sync,
+            invalid_records=invalid_records
+        )
+    finally:
+        kb_service.close()
+    
+    for failure in report.failures:
+        print(f"  failed {failure.id}: {failure.error}", file=sys.stderr)
+    print(json.dumps(report.model_dump(exclude={"failures"})))
+    return 1 if report.failures or invalid_records else 0
+
+
+async def export_snapshot(output_dir: str, publish: bool) -> int:
+    path = os.path.join(output_dir, new_snapshot_id())
+    kb_service = KnowledgeBaseService()
+    try:
+        manifest = await kb_service.export_snapshot(path)
+    finally:
+        kb_service.close()
+    
+    if publish:
+        # Workers serving KB_SNAPSHOT_PATH=<output_dir>/current pick it up on their next poll
+        publish_snapshot(path, os.path.join(output_dir, "current"))
+    print(json.dumps({"path": path, **manifest}))
+    return 0
+
+
+async def import_snapshot(path: str) -> int:
+    kb_service = KnowledgeBaseService()
+    try:
+        result = await kb_service.import_snapshot(path)
+    finally:
+        kb_service.close()
+    
+    print(json.dumps(result))
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="FAQ knowledge base tools")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    
+    ingest_parser = subparsers.add_parser(
+        "ingest",
+        help="Load FAQs from a .json, .ndjson/.jsonl or gzip-compressed NDJSON file"
+    )
+    ingest_parser.add_argument("path")
+    ingest_parser.add_argument(
+        "--full-sync",
+        action="store_true",
+        help="Delete stored FAQs that are not in the file"
+    )
+    
+    export_parser = subparsers.add_parser(
+        "export-snapshot",
+        help="Write the knowledge base to a new snapshot directory under OUTPUT_DIR"
+    )
+    export_parser.add_argument("output_dir")
+    export_parser.add_argument(
+        "--publish",
+        action="store_true",
+        help="Point OUTPUT_DIR/current at the new snapshot"
+    )
+    
+    import_parser = subparsers.add_parser(
+        "import-snapshot",
+        help="Load a snapshot into the configured vector store without re-embedding"
+    )
+    import_parser.add_argument("path")
+    
+    args = parser.parse_args()
+    if args.command == "ingest":
+        sys.exit(asyncio.run(ingest(args.path, args.full_sync)))
+    elif args.command == "export-snapshot":
+        sys.exit(asyncio.run(export_snapshot(args.output_dir, args.publish)))
+    elif args.command == "import-snapshot":
+        sys.exit(asyncio.run(import_snapshot(args.path)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,17 @@
+import os
+
+# Shared with the Next.js frontend, which signs the session tokens.
+NEXTAUTH_SECRET = os.getenv("NEXTAUTH_SECRET")
+JWT_ALGORITHM = os.getenv("JWT_ALGORITHM", "HS256")
+
+# Token verification: "jose" (python-jose) or "hmac", a standard-library
+# verifier for HS256/HS384/HS512 only that keys its HMAC once at startup
+# and is several times faster than jose.
+JWT_BACKEND = os.getenv("JWT_BACKEND", "jose")
+
+# Claims of verified tokens are cached by token digest until the token's
+# `exp`, so a session's later requests skip signature checks. Tokens
+# without `exp` are re-verified after JWT_CACHE_MAX_TTL_SECONDS. Size 0
+# disables the cache.
+JWT_CACHE_SIZE = int(os.getenv("JWT_CACHE_SIZE", "10000"))
+JWT_CACHE_MAX_TTL_SECONDS = float(os.getenv("JWT_CACHE_MAX_TTL_SECONDS", "300"))
@@ -1,4 +1,125 @@
-HISTORY_MESSAGE_LIMIT = 10
+import os
 
 FAQ_SEARCH_TOP_K = 3
 FAQ_SEARCH_MIN_SCORE = 0.7
+
+CHAT_MODEL = "gpt-4o"
+
+# Semantic response cache: replays a previous answer for a near-duplicate
+# question that retrieved the same FAQs. Opt-in.
+RESPONSE_CACHE_ENABLED = os.getenv("RESPONSE_CACHE_ENABLED", "false").lower() == "true"
+RESPONSE_CACHE_SIMILARITY_THRESHOLD = float(os.getenv("RESPONSE_CACHE_SIMILARITY_THRESHOLD", "0.95"))
+RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "2000"))
+RESPONSE_CACHE_TTL_SECONDS = float(os.getenv("RESPONSE_CACHE_TTL_SECONDS", "3600"))
+
+# Retrieval mode for search_faqs: "dense" (vector only) or "hybrid"
+# (vector + in-process BM25 fused with reciprocal-rank fusion).
+FAQ_SEARCH_MODE = os.getenv("FAQ_SEARCH_MODE", "dense")
+
+# Candidates pulled from each retriever before fusion, per requested result.
+HYBRID_CANDIDATE_MULTIPLIER = 4
+HYBRID_RRF_K = 60
+
+# BM25 scores are mapped to 0-1 as score / (score + pivot). With the bundled
+# dataset a single rare-term hit ("IBAN", "KYC") scores ~4.5, i.e. ~0.7.
+HYBRID_BM25_PIVOT = 1.8
+
+# Chat pipeline: "sequential" waits for retrieval before opening the model
+# stream; "parallel" embeds, searches and pre-opens the OpenAI connection
+# concurrently and answers without FAQ context if retrieval misses the deadline.
+CHAT_PIPELINE_MODE = os.getenv("CHAT_PIPELINE_MODE", "sequential")
+RETRIEVAL_DEADLINE_SECONDS = float(os.getenv("RETRIEVAL_DEADLINE_SECONDS", "0.8"))
+
+# Number of recent per-request timings kept for /chat/timings.
+CHAT_TIMINGS_WINDOW = 1000
+
+# Prompt token budgets per chat model (system prompt, FAQ context, history
+# and the new message; the completion is not included). PROMPT_TOKEN_BUDGET
+# overrides the table for every model.
+PROMPT_TOKEN_BUDGETS = {
+    "gpt-4o": 12000,
+    "gpt-4o-mini": 12000,
+}
+DEFAULT_PROMPT_TOKEN_BUDGET = 6000
+PROMPT_TOKEN_BUDGET = int(os.getenv("PROMPT_TOKEN_BUDGET", "0"))
+
+# Largest share of the budget that retrieved FAQ context may take.
+CONTEXT_TOKEN_SHARE = 0.4
+
+# The most recent history messages are kept whole when they fit; older
+# ones are cut to HISTORY_OLD_MESSAGE_MAX_TOKENS each.
+HISTORY_RECENT_MESSAGES = 4
+HISTORY_OLD_MESSAGE_MAX_TOKENS = 300
+
+# Follow-up aware retrieval: "off" searches with the new message alone;
+# "blend" searches follow-up messages ("and how long does that take?") with
+# their embedding mixed with the embeddings of the previous user turns,
+# which come from the embedding cache, so no extra model call is made.
+FOLLOW_UP_RETRIEVAL = os.getenv("FOLLOW_UP_RETRIEVAL", "off")
+# Weight of the previous user turn relative to the new message (1.0), and
+# the factor applied per turn further back.
+FOLLOW_UP_HISTORY_WEIGHT = float(os.getenv("FOLLOW_UP_HISTORY_WEIGHT", "0.6"))
+FOLLOW_UP_DECAY = 0.5
+FOLLOW_UP_TURNS = 2
+
+# Optional re-ranking stage: over-fetch RERANK_CANDIDATES, re-order them
+# with a local feature scorer and keep top_k. If scoring takes longer than
+# RERANK_TIMEOUT_MS the first-stage order is used.
+RERANK_ENABLED = os.getenv("RERANK_ENABLED", "false").lower() == "true"
+RERANK_CANDIDATES = int(os.getenv("RERANK_CANDIDATES", "20"))
+RERANK_TIMEOUT_MS = float(os.getenv("RERANK_TIMEOUT_MS", "20"))
+
+# Feature weights; the first-stage (cosine or hybrid) score has weight 1.
+RERANK_WEIGHTS = {
+    "keyword": 0.3,
+    "question_overlap": 0.3,
+    "answer_overlap": 0.1,
+    "category": 0.1,
+}
+
+# Per-category partitions: every FAQ is also written to a namespace of its
+# category, so category-filtered searches scan only that partition. Category
+# centroids are kept alongside; with routing enabled, unfiltered searches
+# query the CATEGORY_ROUTE_TOP_N partitions whose centroid is closest to the
+# query and fall back to the global namespace when the best routed match
+# scores below CATEGORY_ROUTE_FALLBACK_SCORE.
+CATEGORY_PARTITIONS_ENABLED = os.getenv("CATEGORY_PARTITIONS_ENABLED", "false").lower() == "true"
+CATEGORY_ROUTING_ENABLED = os.getenv("CATEGORY_ROUTING_ENABLED", "false").lower() == "true"
+CATEGORY_ROUTE_TOP_N = int(os.getenv("CATEGORY_ROUTE_TOP_N", "2"))
+CATEGORY_ROUTE_FALLBACK_SCORE = float(os.getenv("CATEGORY_ROUTE_FALLBACK_SCORE", "0.75"))
+
+# Chat SSE stream: model deltas are coalesced into one frame per
+# SSE_COALESCE_WINDOW_MS (the first delta is sent at once) or per
+# SSE_MAX_FRAME_CHARS buffered characters, and a heartbeat comment is sent
+# after SSE_HEARTBEAT_SECONDS without output (0 disables heartbeats).
+SSE_COALESCE_WINDOW_MS = float(os.getenv("SSE_COALESCE_WINDOW_MS", "30"))
+SSE_MAX_FRAME_CHARS = int(os.getenv("SSE_MAX_FRAME_CHARS", "512"))
+SSE_HEARTBEAT_SECONDS = float(os.getenv("SSE_HEARTBEAT_SECONDS", "15"))
+
+# Admission control for /chat/message, per worker process. Each user has a
+# token bucket of CHAT_RATE_BURST messages refilled at CHAT_RATE_PER_MINUTE
+# and may hold CHAT_MAX_STREAMS_PER_USER streams (queued or running) at
+# once; anonymous users have their own, lower limits. At most
+# CHAT_MAX_IN_FLIGHT streams run at a time (keep it below
+# OPENAI_MAX_STREAMS so streams don't queue again, unfairly, for an
+# upstream slot); the rest wait in a fair-share queue where each
+# authenticated user gets CHAT_AUTHENTICATED_WEIGHT times the share of an
+# anonymous one. A full queue, or a wait over CHAT_QUEUE_TIMEOUT_SECONDS,
+# is answered with 429 and Retry-After.
+CHAT_ADMISSION_ENABLED = os.getenv("CHAT_ADMISSION_ENABLED", "true").lower() == "true"
+CHAT_RATE_PER_MINUTE = float(os.getenv("CHAT_RATE_PER_MINUTE", "20"))
+CHAT_RATE_BURST = int(os.getenv("CHAT_RATE_BURST", "10"))
+CHAT_MAX_STREAMS_PER_USER = int(os.getenv("CHAT_MAX_STREAMS_PER_USER", "2"))
+CHAT_ANONYMOUS_RATE_PER_MINUTE = float(os.getenv("CHAT_ANONYMOUS_RATE_PER_MINUTE", "6"))
+CHAT_ANONYMOUS_RATE_BURST = int(os.getenv("CHAT_ANONYMOUS_RATE_BURST", "5"))
+CHAT_ANONYMOUS_MAX_STREAMS_PER_USER = int(os.getenv("CHAT_ANONYMOUS_MAX_STREAMS_PER_USER", "1"))
+CHAT_MAX_IN_FLIGHT = int(os.getenv("CHAT_MAX_IN_FLIGHT", "24"))
+CHAT_MAX_QUEUED = int(os.getenv("CHAT_MAX_QUEUED", "256"))
+CHAT_QUEUE_TIMEOUT_SECONDS = float(os.getenv("CHAT_QUEUE_TIMEOUT_SECONDS", "15"))
+CHAT_AUTHENTICATED_WEIGHT = float(os.getenv("CHAT_AUTHENTICATED_WEIGHT", "3"))
+CHAT_ANONYMOUS_WEIGHT = float(os.getenv("CHAT_ANONYMOUS_WEIGHT", "1"))
+
+# Per-user state is dropped once its bucket has refilled and it holds no
+# stream, which loses nothing. CHAT_ADMISSION_MAX_USERS is a hard cap on
+# tracked users beyond that, evicting the least recently seen idle ones.
+CHAT_ADMISSION_MAX_USERS = int(os.getenv("CHAT_ADMISSION_MAX_USERS", "1000000"))
@@ -0,0 +1,23 @@
+import os
+
+# Pooled Postgres connections used by the conversation store
+DATABASE_POOL_MIN_SIZE = int(os.getenv("DATABASE_POOL_MIN_SIZE", "1"))
+DATABASE_POOL_MAX_SIZE = int(os.getenv("DATABASE_POOL_MAX_SIZE", "10"))
+
+# Sessions whose recent messages are kept in memory (least recently used
+# sessions are dropped and reloaded from Postgres on their next turn).
+CONVERSATION_CACHE_SESSIONS = int(os.getenv("CONVERSATION_CACHE_SESSIONS", "1000"))
+
+# Most recent messages loaded per session as chat history. `build_messages`
+# trims them to the model's prompt token budget, so this only needs to be
+# large enough to fill it (a 12k budget holds roughly 50 typical turns).
+CONVERSATION_WINDOW_MESSAGES = int(os.getenv("CONVERSATION_WINDOW_MESSAGES", "50"))
+
+# Write-behind persistence: messages are inserted in batches of up to
+# CONVERSATION_WRITE_BATCH_SIZE, at least every flush interval.
+CONVERSATION_WRITE_BATCH_SIZE = 200
+CONVERSATION_FLUSH_INTERVAL_SECONDS = float(os.getenv("CONVERSATION_FLUSH_INTERVAL_SECONDS", "0.5"))
+
+# Unflushed messages kept while Postgres is unreachable; the oldest are
+# dropped beyond this.
+CONVERSATION_MAX_PENDING_WRITES = 10000
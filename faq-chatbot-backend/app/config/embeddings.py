@@ -0,0 +1,38 @@
+import os
+
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "text-embedding-3-small")
+
+# Query-embedding cache. A size of 0 disables it.
+EMBEDDING_CACHE_SIZE = int(os.getenv("EMBEDDING_CACHE_SIZE", "10000"))
+EMBEDDING_CACHE_TTL_SECONDS = float(os.getenv("EMBEDDING_CACHE_TTL_SECONDS", "86400"))
+
+# Optional SQLite file shared by all workers on the host. Empty keeps the
+# cache per-process only.
+EMBEDDING_CACHE_SHARED_PATH = os.getenv("EMBEDDING_CACHE_SHARED_PATH", "")
+
+# Query embeddings requested while another embedding call is in flight are
+# queued and sent upstream as one `embeddings.create` call with many inputs,
+# at most this long after the first of them. A query arriving while nothing
+# is in flight is sent at once. 0 disables micro-batching.
+EMBEDDING_BATCH_WINDOW_MS = float(os.getenv("EMBEDDING_BATCH_WINDOW_MS", "5"))
+EMBEDDING_BATCH_MAX_SIZE = int(os.getenv("EMBEDDING_BATCH_MAX_SIZE", "64"))
+
+# "openai" calls the embeddings API; "local" runs an ONNX sentence-embedding
+# model on CPU (needs onnxruntime and tokenizers). Changing the backend
+# changes the index dimension, so re-ingest the FAQs afterwards.
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "openai")
+
+OPENAI_EMBEDDING_DIMENSIONS = {
+    "text-embedding-3-small": 1536,
+    "text-embedding-3-large": 3072,
+    "text-embedding-ada-002": 1536,
+}
+
+# Directory with model.onnx and tokenizer.json of a sentence-transformers
+# style model (e.g. an ONNX export of all-MiniLM-L6-v2).
+LOCAL_EMBEDDING_MODEL_PATH = os.getenv("LOCAL_EMBEDDING_MODEL_PATH", "models/all-MiniLM-L6-v2")
+LOCAL_EMBEDDING_MAX_LENGTH = int(os.getenv("LOCAL_EMBEDDING_MAX_LENGTH", "256"))
+LOCAL_EMBEDDING_THREADS = int(os.getenv("LOCAL_EMBEDDING_THREADS", "2"))
+# Local runs are cheap, so the batching window is shorter than for the API.
+LOCAL_EMBEDDING_BATCH_WINDOW_MS = float(os.getenv("LOCAL_EMBEDDING_BATCH_WINDOW_MS", "2"))
+LOCAL_EMBEDDING_BATCH_MAX_SIZE = 32
@@ -0,0 +1,17 @@
+import os
+
+# Number of FAQs sent to the embeddings API per request.
+INGEST_EMBED_BATCH_SIZE = int(os.getenv("INGEST_EMBED_BATCH_SIZE", "100"))
+
+# Embedding batches processed concurrently; bounds memory as well as load.
+INGEST_MAX_IN_FLIGHT = int(os.getenv("INGEST_MAX_IN_FLIGHT", "4"))
+
+# Vectors per upsert call. Pinecone recommends at most 100 vectors (2 MB).
+INGEST_UPSERT_CHUNK_SIZE = int(os.getenv("INGEST_UPSERT_CHUNK_SIZE", "100"))
+
+INGEST_MAX_RETRIES = int(os.getenv("INGEST_MAX_RETRIES", "3"))
+INGEST_RETRY_BACKOFF_SECONDS = float(os.getenv("INGEST_RETRY_BACKOFF_SECONDS", "0.5"))
+
+# Longest NDJSON line accepted by streamed uploads, in bytes after
+# decompression; longer lines fail the upload instead of being buffered.
+INGEST_MAX_LINE_BYTES = int(os.getenv("INGEST_MAX_LINE_BYTES", str(1024 * 1024)))
@@ -0,0 +1,30 @@
+import os
+
+# Shared HTTP connection pool for all OpenAI calls in a worker process.
+OPENAI_MAX_CONNECTIONS = int(os.getenv("OPENAI_MAX_CONNECTIONS", "64"))
+OPENAI_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("OPENAI_MAX_KEEPALIVE_CONNECTIONS", "32"))
+OPENAI_KEEPALIVE_EXPIRY_SECONDS = float(os.getenv("OPENAI_KEEPALIVE_EXPIRY_SECONDS", "60"))
+OPENAI_HTTP2 = os.getenv("OPENAI_HTTP2", "true").lower() == "true"
+
+# Per-operation timeouts in seconds. For streaming chat, `read` bounds the
+# gap between chunks so a stalled upstream can't hold a stream open forever.
+OPENAI_TIMEOUTS = {
+    "embedding": {"connect": 3.0, "read": 10.0, "write": 10.0, "pool": 5.0},
+    "chat_stream": {"connect": 5.0, "read": 20.0, "write": 10.0, "pool": 10.0},
+    "title": {"connect": 3.0, "read": 10.0, "write": 10.0, "pool": 5.0},
+}
+
+# Requests allowed upstream at once; further requests queue for a slot
+# instead of stampeding into 429s. Chat streams hold their slot for the
+# whole answer, so they have their own limit: otherwise long streams would
+# starve the short query embedding every new chat needs first.
+OPENAI_MAX_CONCURRENCY = int(os.getenv("OPENAI_MAX_CONCURRENCY", "32"))
+OPENAI_MAX_STREAMS = int(os.getenv("OPENAI_MAX_STREAMS", "32"))
+OPENAI_QUEUE_TIMEOUT_SECONDS = float(os.getenv("OPENAI_QUEUE_TIMEOUT_SECONDS", "30"))
+
+# Retries per request, and the fraction of traffic that may be retries
+# process-wide. A small reserve allows retries right after startup.
+OPENAI_MAX_RETRIES = int(os.getenv("OPENAI_MAX_RETRIES", "2"))
+OPENAI_RETRY_BUDGET_RATIO = float(os.getenv("OPENAI_RETRY_BUDGET_RATIO", "0.1"))
+OPENAI_RETRY_BUDGET_RESERVE = 10
+OPENAI_RETRY_BACKOFF_SECONDS = 0.5
@@ -0,0 +1,45 @@
+import os
+
+# Upper bound on concurrent blocking vector store calls per worker process.
+VECTOR_STORE_MAX_CONCURRENCY = int(os.getenv("VECTOR_STORE_MAX_CONCURRENCY", "8"))
+
+# "pinecone" for the managed index, "local" for the embedded NumPy index.
+VECTOR_STORE_BACKEND = os.getenv("VECTOR_STORE_BACKEND", "pinecone")
+
+# Directory the local index persists to. Empty keeps it in memory only.
+LOCAL_INDEX_PATH = os.getenv("LOCAL_INDEX_PATH", "vector_index")
+
+# Minimum seconds between automatic saves of the local index. Writes in
+# between are flushed by the next save, an explicit flush, or shutdown.
+LOCAL_INDEX_SAVE_INTERVAL_SECONDS = float(os.getenv("LOCAL_INDEX_SAVE_INTERVAL_SECONDS", "5"))
+
+# Storage precision of the local index: "float32", "float16" or "int8"
+# (per-vector scalar quantisation). With float16/int8 the scan runs on the
+# compact copy and the best `top_k * LOCAL_INDEX_RESCORE_FACTOR` candidates
+# are re-scored against full-precision vectors, which stay on disk
+# (memory-mapped) once the index has been saved. int8 scans as fast as
+# float32 at a quarter of the memory; float16 halves memory but NumPy
+# converts it slowly, so its scans are slower.
+LOCAL_INDEX_PRECISION = os.getenv("LOCAL_INDEX_PRECISION", "float32")
+LOCAL_INDEX_RESCORE_FACTOR = int(os.getenv("LOCAL_INDEX_RESCORE_FACTOR", "4"))
+
+# SQLite file holding FAQ answers, keyed by FAQ id. When set, vectors carry
+# only the small metadata used for filtering and ranking and answers are
+# joined in from this store. Empty keeps answers in the vector metadata.
+DOCUMENT_STORE_PATH = os.getenv("DOCUMENT_STORE_PATH", "")
+# Answers longer than this many bytes are stored zlib-compressed.
+DOCUMENT_STORE_COMPRESS_MIN_BYTES = int(os.getenv("DOCUMENT_STORE_COMPRESS_MIN_BYTES", "256"))
+# How often, at most, a process checks the file for answers written by
+# other processes (the CLI or other workers). Ids it hasn't seen are
+# always looked up in the file.
+DOCUMENT_STORE_REFRESH_SECONDS = float(os.getenv("DOCUMENT_STORE_REFRESH_SECONDS", "1"))
+
+# Snapshot of the knowledge base served with VECTOR_STORE_BACKEND=snapshot:
+# a snapshot directory, or a symlink to one that `app.cli export-snapshot
+# --publish` repoints. Every worker memory-maps it read-only and checks
+# every SNAPSHOT_POLL_SECONDS whether the link moved, then swaps to the new
+# snapshot; the old one is released SNAPSHOT_SWAP_GRACE_SECONDS later, once
+# searches already running on it have finished.
+KB_SNAPSHOT_PATH = os.getenv("KB_SNAPSHOT_PATH", "snapshots/current")
+SNAPSHOT_POLL_SECONDS = float(os.getenv("SNAPSHOT_POLL_SECONDS", "10"))
+SNAPSHOT_SWAP_GRACE_SECONDS = float(os.getenv("SNAPSHOT_SWAP_GRACE_SECONDS", "5"))
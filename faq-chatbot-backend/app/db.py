@@ -1,6 +1,14 @@
 from databases import Database
 import os
 
+from app.config.conversations import DATABASE_POOL_MIN_SIZE, DATABASE_POOL_MAX_SIZE
+
 DATABASE_URL = os.getenv("DATABASE_URL")
 
-database = Database(DATABASE_URL)
+# Connection pool shared by the process; connected in the app lifespan.
+# None when no database is configured.
+database = Database(
+    DATABASE_URL,
+    min_size=DATABASE_POOL_MIN_SIZE,
+    max_size=DATABASE_POOL_MAX_SIZE
+) if DATABASE_URL else None
@@ -15,6 +15,10 @@ class FAQ(BaseModel):
 
 class FAQUploadRequest(BaseModel):
     faqs: List[FAQ]
+    full_sync: bool = Field(
+        default=False,
+        description="Delete stored FAQs that are not part of this upload"
+    )
 
 
 class FAQSearchRequest(BaseModel):
@@ -33,3 +37,25 @@ class FAQSearchResponse(BaseModel):
     results: List[FAQSearchResult]
     query: str
     total_results: int
+    partitions: Optional[List[str]] = Field(None, description="Category partitions searched, if any")
+    vectors_scanned: Optional[int] = Field(None, description="Vectors compared against the query")
+
+
+class FAQIngestionFailure(BaseModel):
+    id: str = Field(..., description="ID of the FAQ that could not be ingested")
+    error: str = Field(..., description="Reason the FAQ failed")
+
+
+class FAQIngestionReport(BaseModel):
+    processed: int = Field(default=0, description="FAQs read from the input")
+    upserted: int = Field(default=0, description="FAQs written to the vector store")
+    added: int = Field(default=0, description="New FAQs embedded and stored")
+    updated: int = Field(default=0, description="Existing FAQs whose content or metadata changed")
+    skipped: int = Field(default=0, description="FAQs left untouched because nothing changed")
+    deleted: int = Field(default=0, description="Stored FAQs removed by a full sync")
+    deletes_skipped: bool = Field(
+        default=False,
+        description="Full sync left stored FAQs in place because some input records were invalid"
+    )
+    batches: int = Field(default=0, description="Embedding batches completed")
+    failures: List[FAQIngestionFailure] = Field(default_factory=list)
@@ -1,18 +1,52 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException, Request
 from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from typing import List, Dict
+from starlette.background import BackgroundTask
+from typing import List, Dict, Optional
+import asyncio
+import logging
+import time
 from app.utils.auth import get_current_user
-from app.services.openai_service import generate_chat_response, generate_chat_title
+from app.utils.dependencies import get_optional_knowledge_base, get_optional_conversation_store
+from app.utils.timing import RequestTimer, TimingLog
+from app.utils.sse import HEARTBEAT, format_event, stream_events
+from app.utils.metrics import CHAT_STREAMS, STAGE_SECONDS, STREAMS_IN_FLIGHT
+from app.services.admission import RateLimited, admission
+from app.services.openai_client import prewarm_connection
+from app.services.openai_service import ChatResponseError, generate_chat_response, generate_chat_title
 from app.services.knowledge_base import KnowledgeBaseService
-from app.config.chat import FAQ_SEARCH_TOP_K, FAQ_SEARCH_MIN_SCORE
+from app.services.response_cache import replay_response
+from app.services.conversation_store import TRANSIENT_ERRORS, ConversationStore, SessionNotFound, utcnow
+from app.config.chat import (
+    FAQ_SEARCH_TOP_K,
+    FAQ_SEARCH_MIN_SCORE,
+    CHAT_MODEL,
+    CHAT_PIPELINE_MODE,
+    RETRIEVAL_DEADLINE_SECONDS,
+    CHAT_TIMINGS_WINDOW,
+    CHAT_ADMISSION_ENABLED
+)
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/chat", tags=["chat"])
 
+timing_log = TimingLog(CHAT_TIMINGS_WINDOW)
+
+CONTEXT_FORMATTING_SECONDS = STAGE_SECONDS.labels("context_formatting")
+FIRST_TOKEN_SECONDS = STAGE_SECONDS.labels("first_token")
+STREAM_SECONDS = STAGE_SECONDS.labels("stream")
+
+# Strong references to fire-and-forget prewarm tasks until they finish
+background_tasks = set()
+
 
 class ChatMessage(BaseModel):
     message: str
     history: List[Dict[str, str]] = []
+    # With a session id the server loads history itself and stores the turn;
+    # `history` is only used without one (e.g. anonymous chats).
+    session_id: Optional[str] = None
 
 
 class TitleRequest(BaseModel):
@@ -32,47 +66,204 @@ async def test_endpoint(current_user: dict = Depends(get_current_user)):
 
 @router.post("/message")
 async def send_message(
+    request: Request,
     chat_message: ChatMessage,
-    current_user: dict = Depends(get_current_user)
+    current_user: dict = Depends(get_current_user),
+    kb_service: Optional[KnowledgeBaseService] = Depends(get_optional_knowledge_base),
+    conversations: Optional[ConversationStore] = Depends(get_optional_conversation_store)
 ):
     """
     Send a chat message and get streaming response from OpenAI.
     Automatically searches knowledge base and includes relevant FAQs as context.
+    
+    When `session_id` is given, history comes from the conversation store,
+    the user message is saved to it once the request is admitted and the
+    reply after the stream. If the store is unavailable the request fails
+    with 503, and the client can resend it with `history` and no session.
+    
+    In the "parallel" pipeline mode the OpenAI connection is opened while
+    retrieval runs, and retrieval that misses RETRIEVAL_DEADLINE_SECONDS is
+    abandoned in favour of an answer without FAQ context.
+    
+    Deltas are coalesced into SSE frames (see `stream_events`); an error
+    is sent as an `error` event. If the client disconnects, the model
+    stream is closed and the answer is not cached, but the part generated
+    so far is still saved to the session.
+    
+    Streams are admitted per user by the admission controller; requests
+    over the user's limits, or that find the queue full, get 429 with
+    Retry-After.
     """
+    timer = RequestTimer()
+    mode = CHAT_PIPELINE_MODE
+    received_at = utcnow()
+    
+    history = chat_message.history
+    session_id = chat_message.session_id
+    if session_id and conversations is None:
+        raise HTTPException(status_code=503, detail="Conversation store unavailable")
+    
+    ticket = None
+    if CHAT_ADMISSION_ENABLED:
+        try:
+            ticket = await admission.acquire(current_user["id"], anonymous=current_user.get("isAnonymous", False))
+        except RateLimited as e:
+            raise HTTPException(
+                status_code=429,
+                detail=e.reason,
+                headers={"Retry-After": e.retry_after_header}
+            )
+    
+    if session_id:
+        try:
+            history = await conversations.get_history(session_id, current_user["id"])
+        except BaseException as e:
+            # The stream never starts, so nothing else frees the slot
+            if ticket is not None:
+                ticket.release()
+            if isinstance(e, SessionNotFound):
+                raise HTTPException(status_code=404, detail="Chat session not found")
+            if isinstance(e, TRANSIENT_ERRORS):
+                logger.warning(f"Failed to load chat history: {str(e)}")
+                raise HTTPException(status_code=503, detail="Conversation store unavailable")
+            raise
+        
+        # Saved as soon as the request is accepted, so the question is kept
+        # however the stream ends. Queued for the background writer; nothing
+        # waits on Postgres here.
+        conversations.append(session_id, "user", chat_message.message, received_at)
+    
+    # Answers only depend on the question when there is no history
+    cacheable = (
+        kb_service is not None
+        and kb_service.response_cache is not None
+        and not history
+    )
+    
+    async def retrieve():
+        query = chat_message.message
+        query_embedding = None
+        faq_results = []
+        try:
+            if history:
+                query, query_embedding = await kb_service.contextual_query(query, history)
+            elif cacheable:
+                query_embedding = await kb_service.embed_query(query)
+            faq_results = await kb_service.search_faqs(
+                query=query,
+                top_k=FAQ_SEARCH_TOP_K,
+                min_score=FAQ_SEARCH_MIN_SCORE,
+                query_embedding=query_embedding
+            )
+        except Exception as e:
+            logger.warning(f"Failed to search knowledge base: {str(e)}")
+        timer.mark("retrieval")
+        return query_embedding, faq_results
+    
+    async def retrieve_with_deadline():
+        retrieval = asyncio.create_task(retrieve())
+        prewarm = asyncio.create_task(prewarm_connection())
+        background_tasks.add(prewarm)
+        prewarm.add_done_callback(background_tasks.discard)
+        try:
+            return await asyncio.wait_for(asyncio.shield(retrieval), RETRIEVAL_DEADLINE_SECONDS)
+        except asyncio.TimeoutError:
+            retrieval.cancel()
+            timer.set("retrieval_deadline", RETRIEVAL_DEADLINE_SECONDS * 1000)
+            logger.warning("FAQ retrieval missed its deadline; answering without context")
+            return None, []
+    
+    answer = []
+    error = None
+    
+    async def answer_chunks():
+        """Retrieve FAQ context, then stream the cached or generated answer"""
+        nonlocal cacheable, error
+        context = ""
+        query_embedding = None
+        faq_results = []
+        
+        if kb_service is not None:
+            if mode == "parallel":
+                query_embedding, faq_results = await retrieve_with_deadline()
+            else:
+                query_embedding, faq_results = await retrieve()
+            
+            if faq_results:
+                start = time.perf_counter()
+                context = kb_service.format_context_for_chat(faq_results)
+                CONTEXT_FORMATTING_SECONDS.observe(time.perf_counter() - start)
+        
+        cacheable = cacheable and query_embedding is not None
+        
+        cached_response = None
+        if cacheable:
+            cached_response = kb_service.get_cached_response(query_embedding, faq_results, CHAT_MODEL)
+        
+        if cached_response is not None:
+            response_chunks = replay_response(cached_response)
+        else:
+            response_chunks = generate_chat_response(
+                message=chat_message.message,
+                history=history,
+                context=context,
+                model=CHAT_MODEL
+            )
+        
+        try:
+            async for chunk in response_chunks:
+                timer.mark("first_token")
+                answer.append(chunk)
+                yield chunk
+        except ChatResponseError as e:
+            error = str(e)
+        
+        if cacheable and cached_response is None and error is None:
+            kb_service.cache_response(query_embedding, faq_results, CHAT_MODEL, "".join(answer))
+    
     async def event_generator():
         """Generate Server-Sent Events for streaming"""
+        # Stays "disconnected" if the stream is cancelled or stops early
+        outcome = "disconnected"
+        STREAMS_IN_FLIGHT.inc()
         try:
-            context = ""
-            accumulated_response = ""
+            async for frame in stream_events(answer_chunks(), is_disconnected=request.is_disconnected):
+                if frame is not HEARTBEAT:
+                    timer.mark("ttfb")
+                yield frame
             
-            try:
-                kb_service = KnowledgeBaseService()
-                faq_results = await kb_service.search_faqs(
-                    query=chat_message.message,
-                    top_k=FAQ_SEARCH_TOP_K,
-                    min_score=FAQ_SEARCH_MIN_SCORE
-                )
-                
-                if faq_results:
-                    context = kb_service.format_context_for_chat(faq_results)
-            except Exception as e:
-                print(f"Warning: Failed to search knowledge base: {str(e)}")
+            if await request.is_disconnected():
+                return
             
-            # First, stream chunks as they come
-            async for chunk in generate_chat_response(
-                message=chat_message.message,
-                history=chat_message.history,
-                context=context
-            ):
-                accumulated_response += chunk
-                # Send chunks without modification for smooth streaming
-                safe_chunk = chunk.replace("\n", "<|newline|>")
-                yield f"data: {safe_chunk}\n\n"
-            
-            yield "data: [DONE]\n\n"
+            if error is not None:
+                timer.mark("ttfb")
+                yield format_event(error, event="error")
             
+            yield format_event("[DONE]")
+            timer.mark("total")
+            outcome = "completed" if error is None else "error"
+        
         except Exception as e:
-            yield f"data: Error: {str(e)}\n\n"
+            outcome = "error"
+            timer.mark("ttfb")
+            yield format_event(f"Error: {str(e)}", event="error")
+        finally:
+            if session_id and error is None and answer:
+                # Also on disconnect: the user has seen this much of it
+                conversations.append(session_id, "assistant", "".join(answer))
+            if ticket is not None:
+                ticket.release()
+            STREAMS_IN_FLIGHT.dec()
+            CHAT_STREAMS.labels(outcome).inc()
+            if "first_token" in timer.marks:
+                FIRST_TOKEN_SECONDS.observe(timer.marks["first_token"] / 1000)
+            STREAM_SECONDS.observe(timer.elapsed_ms() / 1000)
+            timing_log.record(
+                timer,
+                mode=mode,
+                retrieval_timed_out="retrieval_deadline" in timer.marks,
+                disconnected=outcome == "disconnected"
+            )
     
     return StreamingResponse(
         event_generator(),
@@ -80,10 +271,29 @@ async def send_message(
         headers={
             "Cache-Control": "no-cache",
             "Connection": "keep-alive",
-        }
+        },
+        # Frees the slot if the client left before the stream started
+        background=BackgroundTask(ticket.release) if ticket is not None else None
     )
 
 
+@router.get("/timings")
+async def get_timings(current_user: dict = Depends(get_current_user)):
+    """
+    Percentiles of per-request chat timings (ms since the request arrived):
+    retrieval, first_token from the model, ttfb to the client and total,
+    plus the admission controller's current load.
+    """
+    return {
+        "pipeline_mode": CHAT_PIPELINE_MODE,
+        "sequential": timing_log.summary(mode="sequential"),
+        "parallel": timing_log.summary(mode="parallel"),
+        "retrieval_timeouts": timing_log.summary(retrieval_timed_out=True)["count"],
+        "disconnects": timing_log.summary(disconnected=True)["count"],
+        "admission": admission.stats()
+    }
+
+
 @router.post("/generate-title")
 async def generate_title(
     request: TitleRequest,
@@ -1,13 +1,19 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request
 from app.utils.auth import get_current_user
+from app.utils.dependencies import get_knowledge_base
+from app.utils.ndjson import iter_lines, parse_faqs, RequestStreamingResponse
 from app.services.knowledge_base import KnowledgeBaseService
+from app.services.openai_client import get_pool_stats
 from app.models.faq import (
     FAQ,
     FAQUploadRequest,
     FAQSearchRequest,
-    FAQSearchResponse
+    FAQSearchResponse,
+    FAQIngestionReport
 )
 from typing import Dict
+import asyncio
+import json
 
 router = APIRouter(prefix="/faqs", tags=["faqs"])
 
@@ -15,36 +21,112 @@ router = APIRouter(prefix="/faqs", tags=["faqs"])
 @router.post("/upload")
 async def upload_faqs(
     request: FAQUploadRequest,
-    current_user: dict = Depends(get_current_user)
+    current_user: dict = Depends(get_current_user),
+    kb_service: KnowledgeBaseService = Depends(get_knowledge_base)
 ) -> Dict:
     """
     Upload multiple FAQs to the knowledge base.
     Generates embeddings and stores in Pinecone.
     """
     try:
-        kb_service = KnowledgeBaseService()
-        response = await kb_service.add_faqs_batch(request.faqs)
+        report = await kb_service.add_faqs_batch(request.faqs, full_sync=request.full_sync)
         
         return {
-            "message": f"Successfully uploaded {len(request.faqs)} FAQs",
-            "upserted_count": response.get("upserted_count", len(request.faqs)),
-            "faqs_processed": len(request.faqs)
+            "message": f"Uploaded {report.upserted} of {report.processed} FAQs",
+            "upserted_count": report.upserted,
+            "faqs_processed": report.processed,
+            "added_count": report.added,
+            "updated_count": report.updated,
+            "skipped_count": report.skipped,
+            "deleted_count": report.deleted,
+            "failed_count": len(report.failures),
+            "failures": report.failures
         }
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to upload FAQs: {str(e)}")
 
 
+@router.post("/upload/stream")
+async def upload_faqs_stream(
+    request: Request,
+    full_sync: bool = False,
+    current_user: dict = Depends(get_current_user),
+    kb_service: KnowledgeBaseService = Depends(get_knowledge_base)
+) -> RequestStreamingResponse:
+    """
+    Upload FAQs as an NDJSON body (one FAQ object per line), optionally
+    gzip-compressed via `Content-Encoding: gzip`.
+    
+    Records are validated and embedded as they arrive, so memory stays
+    constant regardless of the upload size. Progress, per-item failures
+    and the final result are streamed back as NDJSON.
+    """
+    compressed = (
+        request.headers.get("content-encoding", "").lower() == "gzip"
+        or request.headers.get("content-type", "").split(";")[0].strip() in ("application/gzip", "application/x-gzip")
+    )
+    
+    events: asyncio.Queue = asyncio.Queue()
+    failures_sent = 0
+    invalid_records = []
+    
+    def publish_failures(report: FAQIngestionReport):
+        nonlocal failures_sent
+        for failure in report.failures[failures_sent:]:
+            events.put_nowait({"type": "failure", **failure.model_dump()})
+        failures_sent = len(report.failures)
+    
+    def on_invalid_line(failure):
+        invalid_records.append(failure)
+        events.put_nowait({"type": "failure", **failure.model_dump()})
+    
+    async def on_progress(report: FAQIngestionReport):
+        publish_failures(report)
+        events.put_nowait({"type": "progress", **report.model_dump(exclude={"failures"})})
+    
+    async def ingest():
+        try:
+            faqs = parse_faqs(iter_lines(request.stream(), compressed=compressed), on_invalid_line)
+            report = await kb_service.add_faqs_batch(
+                faqs,
+                progress=on_progress,
+                full_sync=full_sync,
+                invalid_records=invalid_records
+            )
+            publish_failures(report)
+            events.put_nowait({
+                "type": "result",
+                **report.model_dump(exclude={"failures"}),
+                "invalid": len(invalid_records)
+            })
+        except Exception as e:
+            events.put_nowait({"type": "error", "error": f"Failed to upload FAQs: {str(e)}"})
+        finally:
+            events.put_nowait(None)
+    
+    async def event_generator():
+        task = asyncio.create_task(ingest())
+        try:
+            while (event := await events.get()) is not None:
+                yield json.dumps(event) + "\n"
+        finally:
+            if not task.done():
+                task.cancel()
+    
+    return RequestStreamingResponse(event_generator())
+
+
 @router.post("/search")
 async def search_faqs(
     request: FAQSearchRequest,
-    current_user: dict = Depends(get_current_user)
+    current_user: dict = Depends(get_current_user),
+    kb_service: KnowledgeBaseService = Depends(get_knowledge_base)
 ) -> FAQSearchResponse:
     """
     Search for relevant FAQs using semantic search.
     """
     try:
-        kb_service = KnowledgeBaseService()
-        results = await kb_service.search_faqs(
+        results, plan = await kb_service.search_faqs_with_plan(
             query=request.query,
             top_k=request.top_k,
             category=request.category,
@@ -54,7 +136,9 @@ async def search_faqs(
         return FAQSearchResponse(
             results=results,
             query=request.query,
-            total_results=len(results)
+            total_results=len(results),
+            partitions=plan["partitions"],
+            vectors_scanned=plan["vectors_scanned"]
         )
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to search FAQs: {str(e)}")
@@ -63,14 +147,14 @@ async def search_faqs(
 @router.delete("/{faq_id}")
 async def delete_faq(
     faq_id: str,
-    current_user: dict = Depends(get_current_user)
+    current_user: dict = Depends(get_current_user),
+    kb_service: KnowledgeBaseService = Depends(get_knowledge_base)
 ) -> Dict:
     """
     Delete a specific FAQ from the knowledge base.
     """
     try:
-        kb_service = KnowledgeBaseService()
-        response = kb_service.delete_faq(faq_id)
+        response = await kb_service.delete_faq(faq_id)
         
         return {
             "message": f"Successfully deleted FAQ {faq_id}",
@@ -82,15 +166,15 @@ async def delete_faq(
 
 @router.delete("/")
 async def delete_all_faqs(
-    current_user: dict = Depends(get_current_user)
+    current_user: dict = Depends(get_current_user),
+    kb_service: KnowledgeBaseService = Depends(get_knowledge_base)
 ) -> Dict:
     """
     Delete all FAQs from the knowledge base.
     Use with caution!
     """
     try:
-        kb_service = KnowledgeBaseService()
-        response = kb_service.delete_all_faqs()
+        response = await kb_service.delete_all_faqs()
         
         return {
             "message": "Successfully deleted all FAQs",
@@ -102,17 +186,25 @@ async def delete_all_faqs(
 
 @router.get("/stats")
 async def get_stats(
-    current_user: dict = Depends(get_current_user)
+    current_user: dict = Depends(get_current_user),
+    kb_service: KnowledgeBaseService = Depends(get_knowledge_base)
 ) -> Dict:
     """
     Get knowledge base statistics.
     """
     try:
-        kb_service = KnowledgeBaseService()
-        stats = kb_service.get_stats()
+        stats = await kb_service.get_stats()
         
         return {
-            "stats": stats
+            "stats": stats,
+            "embedding_cache": kb_service.embedding_service.cache_stats(),
+            "embedding_batches": kb_service.embedding_service.batch_stats(),
+            "single_flight": kb_service.single_flight.stats(),
+            "reranker": kb_service.reranker.stats() if kb_service.reranker is not None else None,
+            "document_store": kb_service.document_store.stats() if kb_service.document_store is not None else None,
+            "partitions": kb_service.partition_stats(),
+            "snapshot": kb_service.snapshot_info(),
+            "openai": get_pool_stats()
         }
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to get stats: {str(e)}")
@@ -0,0 +1,287 @@
+import asyncio
+import heapq
+import math
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from app.config.chat import (
+    CHAT_RATE_PER_MINUTE,
+    CHAT_RATE_BURST,
+    CHAT_MAX_STREAMS_PER_USER,
+    CHAT_ANONYMOUS_RATE_PER_MINUTE,
+    CHAT_ANONYMOUS_RATE_BURST,
+    CHAT_ANONYMOUS_MAX_STREAMS_PER_USER,
+    CHAT_MAX_IN_FLIGHT,
+    CHAT_MAX_QUEUED,
+    CHAT_QUEUE_TIMEOUT_SECONDS,
+    CHAT_AUTHENTICATED_WEIGHT,
+    CHAT_ANONYMOUS_WEIGHT,
+    CHAT_ADMISSION_MAX_USERS
+)
+from app.utils.metrics import CHAT_ADMISSIONS, STAGE_SECONDS, Gauge, registry
+
+# Users examined for eviction per admission, so eviction cost stays constant
+EVICTION_BATCH = 8
+
+# Initial estimate of how long a stream holds its slot, used for Retry-After
+# until real streams have finished.
+INITIAL_HOLD_SECONDS = 10.0
+
+QUEUE_SECONDS = STAGE_SECONDS.labels("admission_queue")
+
+
+class RateLimited(Exception):
+    """
+    A chat request was refused admission; `retry_after` is the suggested
+    wait in seconds.
+    """
+    def __init__(self, reason: str, retry_after: float):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = retry_after
+    
+    @property
+    def retry_after_header(self) -> str:
+        return str(max(1, math.ceil(self.retry_after)))
+
+
+class AdmissionPolicy(NamedTuple):
+    rate: float
+    burst: int
+    max_streams: int
+    weight: float
+
+
+class _UserState:
+    __slots__ = ("policy", "tokens", "updated", "active", "tag")
+    
+    def __init__(self, policy: AdmissionPolicy, now: float):
+        self.policy = policy
+        self.tokens = float(policy.burst)
+        self.updated = now
+        # Streams queued or running
+        self.active = 0
+        # Fair-queue tag of the user's last queued request
+        self.tag = 0.0
+
+
+class AdmissionTicket:
+    """
+    A running stream's slot. `release` is idempotent, so it can be called
+    from both the stream's cleanup and the response's background task.
+    """
+    __slots__ = ("_controller", "_state", "_started", "released")
+    
+    def __init__(self, controller: "AdmissionController", state: _UserState, started: float):
+        self._controller = controller
+        self._state = state
+        self._started = started
+        self.released = False
+    
+    def release(self) -> None:
+        if self.released:
+            return
+        self.released = True
+        self._controller._finish(self._state, self._controller.clock() - self._started)
+
+
+class AdmissionController:
+    """
+    Per-user rate limits and fair sharing of chat stream slots.
+    
+    A request takes a token from its user's bucket and must be under the
+    user's stream cap. It runs at once if a slot is free and nobody is
+    waiting; otherwise it joins a start-time fair queue: each waiter is
+    tagged `max(virtual_time, user's last tag) + 1 / weight` and the lowest
+    tag is served next. A user with many waiting requests is interleaved
+    with everyone else, and users with a higher weight advance faster.
+    
+    Users are kept in least-recently-seen order. An entry whose bucket has
+    refilled and that holds no stream is the same as a new one, so a few
+    are examined and dropped on every admission; `max_users` bounds the
+    rest.
+    """
+    def __init__(
+        self,
+        max_in_flight: int = CHAT_MAX_IN_FLIGHT,
+        max_queued: int = CHAT_MAX_QUEUED,
+        queue_timeout: float = CHAT_QUEUE_TIMEOUT_SECONDS,
+        policies: Optional[Dict[bool, AdmissionPolicy]] = None,
+        max_users: int = CHAT_ADMISSION_MAX_USERS,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        """
+        Args:
+            max_in_flight: Streams allowed to run at once
+            max_queued: Requests allowed to wait for a slot
+            queue_timeout: Longest wait for a slot, in seconds
+            policies: Limits keyed by whether the user is anonymous
+            max_users: Hard cap on tracked users
+            clock: Monotonic time source, in seconds
+        """
+        self.max_in_flight = max_in_flight
+        self.max_queued = max_queued
+        self.queue_timeout = queue_timeout
+        self.policies = policies or {
+            False: AdmissionPolicy(
+                CHAT_RATE_PER_MINUTE / 60, CHAT_RATE_BURST, CHAT_MAX_STREAMS_PER_USER, CHAT_AUTHENTICATED_WEIGHT
+            ),
+            True: AdmissionPolicy(
+                CHAT_ANONYMOUS_RATE_PER_MINUTE / 60,
+                CHAT_ANONYMOUS_RATE_BURST,
+                CHAT_ANONYMOUS_MAX_STREAMS_PER_USER,
+                CHAT_ANONYMOUS_WEIGHT
+            )
+        }
+        self.max_users = max_users
+        self.clock = clock
+        self._users: "OrderedDict[str, _UserState]" = OrderedDict()
+        self._queue: List[Tuple[float, int, asyncio.Future, _UserState]] = []
+        self._sequence = 0
+        self._virtual_time = 0.0
+        self._hold_seconds = INITIAL_HOLD_SECONDS
+        self.in_flight = 0
+        self.queued = 0
+        self.evicted = 0
+    
+    @staticmethod
+    def _refill(state: _UserState, now: float) -> None:
+        state.tokens = min(state.policy.burst, state.tokens + (now - state.updated) * state.policy.rate)
+        state.updated = now
+    
+    def _evict(self, now: float) -> None:
+        for _ in range(EVICTION_BATCH):
+            if not self._users:
+                return
+            user_id, state = next(iter(self._users.items()))
+            if state.active:
+                # Holding a long stream; look at it again after newer users
+                self._users.move_to_end(user_id)
+                continue
+            self._refill(state, now)
+            if state.tokens < state.policy.burst and len(self._users) <= self.max_users:
+                return
+            del self._users[user_id]
+            self.evicted += 1
+    
+    def _user(self, user_id: str, anonymous: bool, now: float) -> _UserState:
+        policy = self.policies[anonymous]
+        state = self._users.get(user_id)
+        if state is None:
+            state = self._users[user_id] = _UserState(policy, now)
+        else:
+            self._users.move_to_end(user_id)
+            state.policy = policy
+            self._refill(state, now)
+        return state
+    
+    def _queue_wait_estimate(self) -> float:
+        return self._hold_seconds * (self.queued + 1) / self.max_in_flight
+    
+    def _reject(self, outcome: str, reason: str, retry_after: float) -> RateLimited:
+        CHAT_ADMISSIONS.labels(outcome).inc()
+        return RateLimited(reason, retry_after)
+    
+    async def acquire(self, user_id: str, anonymous: bool = False) -> AdmissionTicket:
+        """
+        Admit a chat stream for a user, waiting for a slot if needed.
+        
+        Args:
+            user_id: Id of the authenticated or anonymous user
+            anonymous: Whether the anonymous limits and weight apply
+        
+        Returns:
+            Ticket to release when the stream ends
+        
+        Raises:
+            RateLimited: Rate or stream limit exceeded, queue full, or no
+                slot within `queue_timeout`
+        """
+        now = self.clock()
+        self._evict(now)
+        state = self._user(user_id, anonymous, now)
+        policy = state.policy
+        
+        if state.tokens < 1:
+            raise self._reject("rate_limited", "Too many messages", (1 - state.tokens) / policy.rate)
+        if state.active >= policy.max_streams:
+            raise self._reject("too_many_streams", "Too many chat streams open", self._hold_seconds)
+        if self.in_flight >= self.max_in_flight and self.queued >= self.max_queued:
+            raise self._reject("queue_full", "Chat is at capacity", self._queue_wait_estimate())
+        
+        state.tokens -= 1
+        state.active += 1
+        if self.in_flight < self.max_in_flight and not self.queued:
+            self.in_flight += 1
+            CHAT_ADMISSIONS.labels("admitted").inc()
+            return AdmissionTicket(self, state, now)
+        
+        state.tag = max(self._virtual_time, state.tag) + 1 / policy.weight
+        waiter = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._queue, (state.tag, self._sequence, waiter, state))
+        self._sequence += 1
+        self.queued += 1
+        try:
+            await asyncio.wait_for(waiter, timeout=self.queue_timeout)
+        except BaseException as e:
+            if waiter.done() and not waiter.cancelled():
+                # Granted just as the wait ended; hand the slot on
+                self._finish(state, None)
+            else:
+                waiter.cancel()
+                self.queued -= 1
+                state.active -= 1
+                # Nothing was served, so the message doesn't count
+                state.tokens = min(policy.burst, state.tokens + 1)
+                if len(self._queue) > 2 * self.queued + 64:
+                    self._queue = [entry for entry in self._queue if not entry[2].done()]
+                    heapq.heapify(self._queue)
+            if isinstance(e, asyncio.TimeoutError):
+                raise self._reject("queue_timeout", "Timed out waiting for a chat slot", self._queue_wait_estimate())
+            raise
+        
+        started = self.clock()
+        QUEUE_SECONDS.observe(started - now)
+        CHAT_ADMISSIONS.labels("queued").inc()
+        return AdmissionTicket(self, state, started)
+    
+    def _finish(self, state: _UserState, held: Optional[float]) -> None:
+        self.in_flight -= 1
+        state.active -= 1
+        if held is not None:
+            self._hold_seconds += 0.1 * (held - self._hold_seconds)
+        
+        while self._queue and self.in_flight < self.max_in_flight:
+            tag, _, waiter, _ = heapq.heappop(self._queue)
+            if waiter.done():
+                # Timed out or cancelled
+                continue
+            waiter.set_result(None)
+            self._virtual_time = tag
+            self.queued -= 1
+            self.in_flight += 1
+    
+    def stats(self) -> Dict:
+        return {
+            "max_in_flight": self.max_in_flight,
+            "in_flight": self.in_flight,
+            "queued": self.queued,
+            "tracked_users": len(self._users),
+            "evicted_users": self.evicted,
+            "hold_seconds": round(self._hold_seconds, 3)
+        }
+
+
+admission = AdmissionController()
+
+registry.register(Gauge(
+    "faq_chatbot_chat_admission_queued",
+    "Chat requests waiting for a stream slot.",
+    function=lambda: admission.queued
+))
+registry.register(Gauge(
+    "faq_chatbot_chat_admission_users",
+    "Users tracked by chat admission control.",
+    function=lambda: len(admission._users)
+))
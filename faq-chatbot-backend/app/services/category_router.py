@@ -0,0 +1,90 @@
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import quote
+
+import numpy as np
+
+
+def partition_namespace(namespace: str, category: str) -> str:
+    """
+    Namespace holding the FAQs of one category. The category is
+    percent-encoded so it is safe as a Pinecone namespace and a file name.
+    """
+    return f"{namespace}--{quote(category, safe='')}"
+
+
+class CategoryCentroids:
+    """
+    Running per-category sum of unit-length FAQ vectors and FAQ counts.
+    
+    The centroid of a category is its normalised sum, so routing a query is
+    one small matrix-vector product over the categories. Sums are updated
+    incrementally on upsert and delete; replacing a vector needs the old
+    one, which the knowledge base already fetches to detect unchanged FAQs.
+    """
+    def __init__(self):
+        self._sums: Dict[str, np.ndarray] = {}
+        self.counts: Dict[str, int] = {}
+        self._matrix: Optional[np.ndarray] = None
+        self._categories: List[str] = []
+    
+    @staticmethod
+    def _unit(vector: List[float]) -> np.ndarray:
+        vector = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+    
+    def add(self, category: str, vector: List[float]) -> None:
+        unit = self._unit(vector)
+        if category in self._sums:
+            self._sums[category] += unit
+        else:
+            self._sums[category] = unit.copy()
+        self.counts[category] = self.counts.get(category, 0) + 1
+        self._matrix = None
+    
+    def remove(self, category: str, vector: List[float]) -> None:
+        if category not in self._sums:
+            return
+        self.counts[category] -= 1
+        if self.counts[category] <= 0:
+            del self._sums[category]
+            del self.counts[category]
+        else:
+            self._sums[category] -= self._unit(vector)
+        self._matrix = None
+    
+    def clear(self) -> None:
+        self._sums.clear()
+        self.counts.clear()
+        self._matrix = None
+    
+    @property
+    def total(self) -> int:
+        return sum(self.counts.values())
+    
+    def route(self, query_vector: List[float], top_n: int) -> List[Tuple[str, float]]:
+        """
+        Categories whose centroid is most similar to the query.
+        
+        Args:
+            query_vector: Query embedding
+            top_n: Number of categories to return
+        
+        Returns:
+            (category, cosine similarity) pairs, best first
+        """
+        if not self._sums:
+            return []
+        if self._matrix is None:
+            self._categories = list(self._sums)
+            matrix = np.stack([self._sums[category] for category in self._categories])
+            norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+            norms[norms == 0] = 1.0
+            self._matrix = matrix / norms
+        
+        scores = self._matrix @ self._unit(query_vector)
+        order = np.argsort(-scores)[:top_n]
+        return [(self._categories[i], float(scores[i])) for i in order]
+    
+    def stats(self) -> Dict:
+        return {"categories": len(self.counts), "faqs": self.total}
@@ -0,0 +1,291 @@
+import asyncio
+import logging
+import uuid
+from collections import OrderedDict, deque
+from datetime import datetime, timezone
+from typing import Deque, Dict, List, Optional
+
+import asyncpg
+from databases import Database
+
+from app.config.conversations import (
+    CONVERSATION_CACHE_SESSIONS,
+    CONVERSATION_WINDOW_MESSAGES,
+    CONVERSATION_WRITE_BATCH_SIZE,
+    CONVERSATION_FLUSH_INTERVAL_SECONDS,
+    CONVERSATION_MAX_PENDING_WRITES
+)
+
+logger = logging.getLogger(__name__)
+
+INSERT_MESSAGE = """
+    INSERT INTO chat_messages (id, chat_session_id, role, content, created_at)
+    VALUES (:id, :chat_session_id, :role, :content, :created_at)
+    ON CONFLICT (id) DO NOTHING
+"""
+
+TOUCH_SESSIONS = "UPDATE chat_sessions SET updated_at = :updated_at WHERE id = ANY(:ids)"
+
+# Failures worth retrying the same rows for; anything else is the rows' fault
+TRANSIENT_ERRORS = (
+    OSError,
+    asyncio.TimeoutError,
+    asyncpg.PostgresConnectionError,
+    asyncpg.InterfaceError,
+    asyncpg.exceptions.OperatorInterventionError,
+    asyncpg.exceptions.InsufficientResourcesError,
+    asyncpg.exceptions.TransactionRollbackError
+)
+
+
+class SessionNotFound(Exception):
+    """
+    The chat session does not exist or belongs to another user.
+    """
+
+
+def utcnow() -> datetime:
+    # chat_messages.created_at is a naive UTC timestamp, as Prisma writes it
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+class ConversationStore:
+    """
+    Chat sessions and messages in the Postgres tables the frontend created
+    (chat_sessions / chat_messages), so clients send a session id instead
+    of the whole history.
+    
+    The most recent `window` messages of recently active sessions are kept
+    in memory, so a turn normally reads no rows at all. New messages update
+    the window immediately and are written behind: a background task
+    inserts them in batches after the response has been streamed.
+    """
+    def __init__(
+        self,
+        database: Database,
+        window: int = CONVERSATION_WINDOW_MESSAGES,
+        max_sessions: int = CONVERSATION_CACHE_SESSIONS,
+        batch_size: int = CONVERSATION_WRITE_BATCH_SIZE,
+        flush_interval: float = CONVERSATION_FLUSH_INTERVAL_SECONDS,
+        max_pending: int = CONVERSATION_MAX_PENDING_WRITES
+    ):
+        self.database = database
+        self.window = window
+        self.max_sessions = max_sessions
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self._windows: "OrderedDict[str, Deque[Dict[str, str]]]" = OrderedDict()
+        self._owners: Dict[str, str] = {}
+        self._pending: Deque[Dict] = deque()
+        self._wakeup = asyncio.Event()
+        self._writer: Optional[asyncio.Task] = None
+        self.window_hits = 0
+        self.window_misses = 0
+        self.written = 0
+        self.write_batches = 0
+        self.write_failures = 0
+        self.rejected = 0
+        self.dropped = 0
+    
+    def start(self) -> None:
+        """
+        Start the background writer.
+        """
+        if self._writer is None:
+            self._writer = asyncio.create_task(self._run_writer())
+    
+    async def close(self) -> None:
+        """
+        Stop the writer and flush every pending message.
+        """
+        if self._writer is not None:
+            self._writer.cancel()
+            try:
+                await self._writer
+            except asyncio.CancelledError:
+                pass
+            self._writer = None
+        while self._pending:
+            if not await self.flush():
+                logger.error(f"Dropping {len(self._pending)} unsaved chat messages at shutdown")
+                break
+    
+    async def _check_owner(self, session_id: str, user_id: str) -> None:
+        owner = self._owners.get(session_id)
+        if owner is None:
+            owner = await self.database.fetch_val(
+                "SELECT user_id FROM chat_sessions WHERE id = :id",
+                {"id": session_id}
+            )
+            if owner is None:
+                raise SessionNotFound(session_id)
+            self._owners[session_id] = owner
+        if owner != user_id:
+            raise SessionNotFound(session_id)
+    
+    def _remember(self, session_id: str, messages: Deque[Dict[str, str]]) -> None:
+        self._windows[session_id] = messages
+        self._windows.move_to_end(session_id)
+        while len(self._windows) > self.max_sessions:
+            evicted, _ = self._windows.popitem(last=False)
+            self._owners.pop(evicted, None)
+    
+    async def get_history(self, session_id: str, user_id: str) -> List[Dict[str, str]]:
+        """
+        Recent messages of a session, oldest first.
+        
+        Args:
+            session_id: Chat session id (chat_sessions.id)
+            user_id: Id of the authenticated user, who must own the session
+        
+        Returns:
+            Up to `window` messages as [{"role": ..., "content": ...}]
+        
+        Raises:
+            SessionNotFound: If the session doesn't exist or isn't the user's
+        """
+        await self._check_owner(session_id, user_id)
+        
+        messages = self._windows.get(session_id)
+        if messages is not None:
+            self.window_hits += 1
+            self._windows.move_to_end(session_id)
+            return list(messages)
+        
+        self.window_misses += 1
+        rows = await self.database.fetch_all(
+            """
+            SELECT id, role, content FROM chat_messages
+            WHERE chat_session_id = :id
+            ORDER BY created_at DESC
+            LIMIT :limit
+            """,
+            {"id": session_id, "limit": self.window}
+        )
+        stored_ids = {row["id"] for row in rows}
+        messages = deque(
+            ({"role": row["role"], "content": row["content"]} for row in reversed(rows)),
+            maxlen=self.window
+        )
+        # Messages still waiting for the writer aren't in the table yet
+        for pending in self._pending:
+            if pending["chat_session_id"] == session_id and pending["id"] not in stored_ids:
+                messages.append({"role": pending["role"], "content": pending["content"]})
+        
+        self._remember(session_id, messages)
+        return list(messages)
+    
+    def append(self, session_id: str, role: str, content: str, created_at: Optional[datetime] = None) -> None:
+        """
+        Add a message to the session window and queue it for persistence.
+        Never waits on the database.
+        """
+        messages = self._windows.get(session_id)
+        if messages is not None:
+            messages.append({"role": role, "content": content})
+        
+        if len(self._pending) >= self.max_pending:
+            self._pending.popleft()
+            self.dropped += 1
+        self._pending.append({
+            "id": str(uuid.uuid4()),
+            "chat_session_id": session_id,
+            "role": role,
+            "content": content,
+            "created_at": created_at or utcnow()
+        })
+        if len(self._pending) >= self.batch_size:
+            self._wakeup.set()
+    
+    async def _insert(self, rows: List[Dict]) -> None:
+        async with self.database.transaction():
+            await self.database.execute_many(INSERT_MESSAGE, rows)
+            await self.database.execute(
+                TOUCH_SESSIONS,
+                {"updated_at": utcnow(), "ids": list({row["chat_session_id"] for row in rows})}
+            )
+    
+    def _dequeue(self, row: Dict) -> None:
+        # `append` may have dropped the head already while the queue was full
+        if self._pending and self._pending[0] is row:
+            self._pending.popleft()
+    
+    def _forget(self, session_id: str) -> None:
+        self._windows.pop(session_id, None)
+        self._owners.pop(session_id, None)
+    
+    async def flush(self) -> bool:
+        """
+        Write up to one batch of pending messages.
+        
+        Messages are inserted with their own id and `ON CONFLICT DO
+        NOTHING`, so a retried batch whose commit was lost isn't an error.
+        A batch the database rejects for another reason (e.g. a session
+        deleted in the meantime) is retried one message at a time and the
+        offending messages are dropped, so one bad row can't block every
+        later write; only connection errors and timeouts keep a batch
+        queued.
+        
+        Returns:
+            False if the database was unreachable; the unwritten messages
+            stay queued
+        """
+        if not self._pending:
+            return True
+        batch = [self._pending[i] for i in range(min(self.batch_size, len(self._pending)))]
+        try:
+            await self._insert(batch)
+        except TRANSIENT_ERRORS as e:
+            self.write_failures += 1
+            logger.warning(f"Failed to persist {len(batch)} chat messages, will retry: {str(e)}")
+            return False
+        except Exception as e:
+            logger.warning(f"Chat message batch rejected, writing its {len(batch)} messages one by one: {str(e)}")
+            for row in batch:
+                try:
+                    await self._insert([row])
+                except TRANSIENT_ERRORS as e:
+                    self.write_failures += 1
+                    logger.warning(f"Failed to persist chat messages, will retry: {str(e)}")
+                    return False
+                except Exception as e:
+                    self.rejected += 1
+                    # Most likely the session was deleted; reload it next time
+                    self._forget(row["chat_session_id"])
+                    logger.error(f"Dropping chat message for session {row['chat_session_id']}: {str(e)}")
+                else:
+                    self.written += 1
+                self._dequeue(row)
+            self.write_batches += 1
+            return True
+        
+        for row in batch:
+            self._dequeue(row)
+        self.written += len(batch)
+        self.write_batches += 1
+        return True
+    
+    async def _run_writer(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            while self._pending:
+                if not await self.flush():
+                    break
+    
+    def stats(self) -> Dict:
+        return {
+            "cached_sessions": len(self._windows),
+            "window_hits": self.window_hits,
+            "window_misses": self.window_misses,
+            "pending_writes": len(self._pending),
+            "written": self.written,
+            "write_batches": self.write_batches,
+            "write_failures": self.write_failures,
+            "rejected": self.rejected,
+            "dropped": self.dropped
+        }
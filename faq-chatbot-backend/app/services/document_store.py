@@ -0,0 +1,225 @@
+import sqlite3
+import threading
+import time
+import zlib
+from contextlib import contextmanager
+from typing import Dict, Iterable, List, Optional
+
+from app.config.vector_store import (
+    DOCUMENT_STORE_PATH,
+    DOCUMENT_STORE_COMPRESS_MIN_BYTES,
+    DOCUMENT_STORE_REFRESH_SECONDS
+)
+
+# First byte of a stored body: 0 = raw UTF-8, 1 = zlib-compressed UTF-8
+_RAW = b"\x00"
+_ZLIB = b"\x01"
+
+
+class DocumentStore:
+    """
+    FAQ answers keyed by FAQ id, kept out of the vector index.
+    
+    Bodies live in a SQLite file and, for fast joins at query time, in an
+    in-process dict of encoded bytes (long answers zlib-compressed). An
+    empty path keeps the store in memory.
+    
+    The file may be shared with other processes. Every write stamps its
+    rows with an increasing version; at most every `refresh_interval`
+    seconds, reads check SQLite's `data_version` and, if another
+    connection has committed since, load the rows with a newer version
+    (or everything, if rows were deleted). Ids missing from the dict are
+    looked up in the file directly.
+    """
+    def __init__(
+        self,
+        path: str = DOCUMENT_STORE_PATH,
+        compress_min_bytes: int = DOCUMENT_STORE_COMPRESS_MIN_BYTES,
+        refresh_interval: float = DOCUMENT_STORE_REFRESH_SECONDS
+    ):
+        self.path = path
+        self.compress_min_bytes = compress_min_bytes
+        self.refresh_interval = refresh_interval
+        self._bodies: Dict[str, bytes] = {}
+        self._lock = threading.Lock()
+        self._conn = None
+        self._version = 0
+        self._data_version = None
+        self._next_refresh = 0.0
+        if path:
+            self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS documents "
+                "(id TEXT PRIMARY KEY, body BLOB NOT NULL, version INTEGER NOT NULL DEFAULT 0)"
+            )
+            columns = [row[1] for row in self._conn.execute("PRAGMA table_info(documents)")]
+            if "version" not in columns:
+                # Files written before versioning
+                self._conn.execute("ALTER TABLE documents ADD COLUMN version INTEGER NOT NULL DEFAULT 0")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS documents_version ON documents (version)")
+            with self._lock:
+                self._load()
+    
+    def _load(self) -> None:
+        self._data_version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+        self._bodies = {}
+        self._version = 0
+        for doc_id, body, version in self._conn.execute("SELECT id, body, version FROM documents"):
+            self._bodies[doc_id] = bytes(body)
+            self._version = max(self._version, version)
+    
+    def _refresh(self) -> None:
+        """
+        Pick up rows other processes wrote since the last check. The
+        caller holds the lock.
+        """
+        now = time.monotonic()
+        if self._conn is None or now < self._next_refresh:
+            return
+        self._next_refresh = now + self.refresh_interval
+        
+        data_version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+        if data_version == self._data_version:
+            return
+        self._data_version = data_version
+        rows = self._conn.execute(
+            "SELECT id, body, version FROM documents WHERE version > ?",
+            (self._version,)
+        ).fetchall()
+        for doc_id, body, version in rows:
+            self._bodies[doc_id] = bytes(body)
+            self._version = max(self._version, version)
+        if self._conn.execute("SELECT COUNT(*) FROM documents").fetchone()[0] != len(self._bodies):
+            # Rows were deleted elsewhere
+            self._load()
+    
+    def _lookup(self, ids: List[str]) -> Dict[str, bytes]:
+        """
+        Bodies of ids missing from the dict, read from the file (e.g.
+        written by another process since the last refresh). The caller
+        holds the lock.
+        """
+        found = {}
+        if self._conn is None:
+            return found
+        for i in range(0, len(ids), 500):
+            chunk = ids[i:i + 500]
+            rows = self._conn.execute(
+                f"SELECT id, body FROM documents WHERE id IN ({','.join('?' * len(chunk))})",
+                chunk
+            )
+            for doc_id, body in rows:
+                found[doc_id] = self._bodies[doc_id] = bytes(body)
+        return found
+    
+    @contextmanager
+    def _transaction(self):
+        """
+        One write transaction, so a batch commits (and syncs) once. The
+        caller holds the lock.
+        """
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield
+        except BaseException:
+            self._conn.execute("ROLLBACK")
+            raise
+        self._conn.execute("COMMIT")
+    
+    def _encode(self, text: str) -> bytes:
+        raw = text.encode("utf-8")
+        if len(raw) >= self.compress_min_bytes:
+            compressed = zlib.compress(raw, 6)
+            if len(compressed) < len(raw):
+                return _ZLIB + compressed
+        return _RAW + raw
+    
+    @staticmethod
+    def _decode(body: bytes) -> str:
+        if body[:1] == _ZLIB:
+            return zlib.decompress(body[1:]).decode("utf-8")
+        return body[1:].decode("utf-8")
+    
+    def get(self, doc_id: str) -> Optional[str]:
+        return self.get_many([doc_id]).get(doc_id)
+    
+    def get_many(self, ids: Iterable[str]) -> Dict[str, str]:
+        """
+        Look up several documents.
+        
+        Args:
+            ids: FAQ ids
+        
+        Returns:
+            Dict of the ids that exist to their text
+        """
+        bodies = {}
+        missing = []
+        with self._lock:
+            self._refresh()
+            for doc_id in ids:
+                body = self._bodies.get(doc_id)
+                if body is not None:
+                    bodies[doc_id] = body
+                else:
+                    missing.append(doc_id)
+            if missing:
+                bodies.update(self._lookup(missing))
+        return {doc_id: self._decode(body) for doc_id, body in bodies.items()}
+    
+    def put_many(self, documents: Dict[str, str]) -> None:
+        """
+        Insert or replace documents.
+        
+        Args:
+            documents: Dict of FAQ id to text
+        """
+        encoded = {doc_id: self._encode(text) for doc_id, text in documents.items()}
+        with self._lock:
+            if self._conn is not None:
+                with self._transaction():
+                    # The whole batch shares one version; the write lock taken
+                    # by BEGIN IMMEDIATE keeps it above every committed row
+                    version = self._conn.execute(
+                        "SELECT COALESCE(MAX(version), 0) + 1 FROM documents"
+                    ).fetchone()[0]
+                    self._conn.executemany(
+                        "INSERT OR REPLACE INTO documents (id, body, version) VALUES (?, ?, ?)",
+                        [(doc_id, body, version) for doc_id, body in encoded.items()]
+                    )
+            self._bodies.update(encoded)
+    
+    def delete(self, ids: List[str]) -> None:
+        with self._lock:
+            if self._conn is not None:
+                with self._transaction():
+                    self._conn.executemany("DELETE FROM documents WHERE id = ?", [(doc_id,) for doc_id in ids])
+            for doc_id in ids:
+                self._bodies.pop(doc_id, None)
+    
+    def clear(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.execute("DELETE FROM documents")
+            self._bodies.clear()
+    
+    def stats(self) -> Dict:
+        return {
+            "documents": len(self._bodies),
+            "memory_bytes": sum(len(body) for body in self._bodies.values())
+        }
+    
+    def close(self) -> None:
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+
+def create_document_store() -> Optional[DocumentStore]:
+    """
+    Build the answer store, or None when DOCUMENT_STORE_PATH is unset and
+    answers stay in the vector metadata.
+    """
+    return DocumentStore() if DOCUMENT_STORE_PATH else None
@@ -0,0 +1,195 @@
+import asyncio
+import hashlib
+import sqlite3
+import threading
+import time
+from array import array
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from app.config.embeddings import (
+    EMBEDDING_CACHE_SIZE,
+    EMBEDDING_CACHE_TTL_SECONDS,
+    EMBEDDING_CACHE_SHARED_PATH
+)
+
+
+def normalise_text(text: str) -> str:
+    """
+    Case-fold and collapse whitespace so trivially different spellings of
+    the same question share a cache entry.
+    """
+    return " ".join(text.lower().split())
+
+
+def cache_key(text: str, model: str) -> str:
+    return hashlib.sha256(f"{model}\x00{normalise_text(text)}".encode("utf-8")).hexdigest()
+
+
+class SQLiteEmbeddingStore:
+    """
+    Embedding cache table in a local SQLite file, so several uvicorn workers
+    on the same host share hits. Rows expire by TTL and the least recently
+    used rows are trimmed once the table grows past `max_size`.
+    """
+    def __init__(self, path: str, max_size: int, ttl: float):
+        self.path = path
+        self.max_size = max_size
+        self.ttl = ttl
+        self._writes = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            "key TEXT PRIMARY KEY, vector BLOB NOT NULL, "
+            "expires_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS embeddings_accessed_at ON embeddings (accessed_at)"
+        )
+    
+    def get(self, key: str) -> Optional[List[float]]:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT vector FROM embeddings WHERE key = ? AND expires_at > ?",
+                (key, now)
+            ).fetchone()
+            if row is None:
+                return None
+            self._conn.execute("UPDATE embeddings SET accessed_at = ? WHERE key = ?", (now, key))
+        return array("f", row[0]).tolist()
+    
+    def set(self, key: str, vector: List[float]) -> int:
+        """
+        Store a vector and return the number of rows evicted to stay in bounds.
+        """
+        now = time.time()
+        evicted = 0
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO embeddings (key, vector, expires_at, accessed_at) "
+                "VALUES (?, ?, ?, ?)",
+                (key, array("f", vector).tobytes(), now + self.ttl, now)
+            )
+            self._writes += 1
+            # Trimming scans the table, so only do it every few hundred writes
+            if self._writes % 256 == 0:
+                evicted += self._conn.execute(
+                    "DELETE FROM embeddings WHERE expires_at <= ?", (now,)
+                ).rowcount
+                evicted += self._conn.execute(
+                    "DELETE FROM embeddings WHERE key IN ("
+                    "SELECT key FROM embeddings ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                    (self.max_size,)
+                ).rowcount
+        return evicted
+    
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM embeddings")
+    
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class EmbeddingCache:
+    """
+    Bounded LRU cache with TTL for query embeddings, with an optional
+    shared SQLite tier behind the in-process one.
+    """
+    def __init__(
+        self,
+        max_size: int = EMBEDDING_CACHE_SIZE,
+        ttl: float = EMBEDDING_CACHE_TTL_SECONDS,
+        shared: Optional[SQLiteEmbeddingStore] = None
+    ):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.shared = shared
+        self._entries: "OrderedDict[str, Tuple[float, List[float]]]" = OrderedDict()
+        self.hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+    
+    def _get_local(self, key: str) -> Optional[List[float]]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, vector = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            self.expirations += 1
+            return None
+        self._entries.move_to_end(key)
+        return vector
+    
+    def _set_local(self, key: str, vector: List[float]) -> None:
+        self._entries[key] = (time.monotonic() + self.ttl, vector)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+    
+    async def get(self, text: str, model: str) -> Optional[List[float]]:
+        key = cache_key(text, model)
+        
+        vector = self._get_local(key)
+        if vector is not None:
+            self.hits += 1
+            return vector
+        
+        if self.shared is not None:
+            vector = await asyncio.to_thread(self.shared.get, key)
+            if vector is not None:
+                self._set_local(key, vector)
+                self.hits += 1
+                self.shared_hits += 1
+                return vector
+        
+        self.misses += 1
+        return None
+    
+    async def set(self, text: str, model: str, vector: List[float]) -> None:
+        key = cache_key(text, model)
+        self._set_local(key, vector)
+        if self.shared is not None:
+            self.evictions += await asyncio.to_thread(self.shared.set, key, vector)
+    
+    def stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "ttl_seconds": self.ttl,
+            "shared": self.shared is not None,
+            "hits": self.hits,
+            "shared_hits": self.shared_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "hit_rate": self.hits / lookups if lookups else 0.0
+        }
+
+
+def create_embedding_cache() -> Optional[EmbeddingCache]:
+    """
+    Build the embedding cache from configuration, or None if disabled.
+    """
+    if EMBEDDING_CACHE_SIZE <= 0:
+        return None
+    
+    shared = None
+    if EMBEDDING_CACHE_SHARED_PATH:
+        shared = SQLiteEmbeddingStore(
+            EMBEDDING_CACHE_SHARED_PATH,
+            max_size=EMBEDDING_CACHE_SIZE,
+            ttl=EMBEDDING_CACHE_TTL_SECONDS
+        )
+    
+    return EmbeddingCache(shared=shared)
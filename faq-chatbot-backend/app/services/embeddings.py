@@ -1,26 +1,129 @@
-from openai import AsyncOpenAI
-import os
-from typing import List
+from typing import Awaitable, Callable, Dict, List, Optional
 import asyncio
+from app.config.embeddings import (
+    EMBEDDING_BACKEND,
+    EMBEDDING_MODEL,
+    OPENAI_EMBEDDING_DIMENSIONS,
+    EMBEDDING_BATCH_WINDOW_MS,
+    EMBEDDING_BATCH_MAX_SIZE
+)
+from app.services.embedding_cache import EmbeddingCache, create_embedding_cache
+from app.services.openai_client import budget, get_openai_client, openai_timeout
+from app.utils.metrics import CACHE_LOOKUPS
 
-client = None
+EMBEDDING_CACHE_HITS = CACHE_LOOKUPS.labels("embedding", "hit")
+EMBEDDING_CACHE_MISSES = CACHE_LOOKUPS.labels("embedding", "miss")
 
 
-def get_openai_client() -> AsyncOpenAI:
-    global client
-    if client is None:
-        api_key = os.getenv("OPENAI_API_KEY")
-        if not api_key:
-            raise ValueError("OPENAI_API_KEY not found in environment variables")
-        client = AsyncOpenAI(api_key=api_key)
-    return client
+class EmbeddingBatcher:
+    """
+    Micro-batches single-text embedding requests.
+    
+    A request arriving while no batch is in flight is sent at once, so a
+    lone query never waits. While a batch is in flight, requests queue and
+    are embedded together in one `embed_many` call (one
+    `embeddings.create` request, or one local model run) when that batch
+    finishes, `window_ms` after the first of them, or once `max_size`
+    distinct texts are queued, whichever comes first. Each caller gets its
+    own vector.
+    """
+    def __init__(
+        self,
+        embed_many: Callable[[List[str]], Awaitable[List[List[float]]]],
+        window_ms: float = EMBEDDING_BATCH_WINDOW_MS,
+        max_size: int = EMBEDDING_BATCH_MAX_SIZE
+    ):
+        self.embed_many = embed_many
+        self.window = window_ms / 1000
+        self.max_size = max_size
+        self._pending: Dict[str, asyncio.Future] = {}
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        self._sending = set()
+        self.requests = 0
+        self.batches = 0
+    
+    async def embed(self, text: str) -> List[float]:
+        self.requests += 1
+        future = self._pending.get(text)
+        if future is None:
+            future = asyncio.get_running_loop().create_future()
+            self._pending[text] = future
+            if len(self._pending) >= self.max_size or not self._sending:
+                self._flush()
+            elif self._flush_handle is None:
+                self._flush_handle = asyncio.get_running_loop().call_later(self.window, self._flush)
+        return await asyncio.shield(future)
+    
+    def _flush(self) -> None:
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        pending, self._pending = self._pending, {}
+        if pending:
+            self.batches += 1
+            task = asyncio.ensure_future(self._send(pending))
+            self._sending.add(task)
+            task.add_done_callback(self._sent)
+    
+    def _sent(self, task: asyncio.Future) -> None:
+        self._sending.discard(task)
+        if not self._sending and self._pending:
+            self._flush()
+    
+    async def _send(self, pending: Dict[str, asyncio.Future]) -> None:
+        texts = list(pending)
+        try:
+            embeddings = await self.embed_many(texts)
+            if len(embeddings) != len(texts):
+                raise ValueError(f"Expected {len(texts)} embeddings, got {len(embeddings)}")
+            for text, embedding in zip(texts, embeddings):
+                pending[text].set_result(embedding)
+        except Exception as e:
+            for future in pending.values():
+                if not future.done():
+                    future.set_exception(e)
+        finally:
+            # Cancelled mid-request: don't leave callers waiting forever
+            for future in pending.values():
+                if not future.done():
+                    future.cancel()
+    
+    def stats(self) -> Dict:
+        return {
+            "requests": self.requests,
+            "batches": self.batches,
+            "avg_batch_size": round(self.requests / self.batches, 2) if self.batches else 0.0
+        }
 
 
 class EmbeddingService:
-    def __init__(self, model: str = "text-embedding-3-small"):
+    """
+    Query and document embeddings from the OpenAI API.
+    
+    Subclasses for other backends only implement `_embed_texts` and set
+    `model` and `dimension`; caching and micro-batching are shared.
+    """
+    def __init__(
+        self,
+        model: str = EMBEDDING_MODEL,
+        cache: Optional[EmbeddingCache] = None
+    ):
         self.model = model
-        self.dimension = 1536
+        self.dimension = OPENAI_EMBEDDING_DIMENSIONS.get(model, 1536)
         self.client = get_openai_client()
+        self.cache = cache if cache is not None else create_embedding_cache()
+        self.batcher = EmbeddingBatcher(self._embed_texts) if EMBEDDING_BATCH_WINDOW_MS > 0 else None
+    
+    async def _embed_texts(self, texts: List[str]) -> List[List[float]]:
+        """
+        Embed stripped, non-empty texts in one upstream call, in input order.
+        """
+        response = await budget.call(lambda client: client.embeddings.create(
+            model=self.model,
+            input=texts,
+            timeout=openai_timeout("embedding")
+        ))
+        return [data.embedding for data in sorted(response.data, key=lambda data: data.index)]
     
     async def generate_embedding(self, text: str) -> List[float]:
         """
@@ -35,14 +138,37 @@ class EmbeddingService:
         if not text or not text.strip():
             raise ValueError("Text cannot be empty")
         
+        if self.cache is not None:
+            cached = await self.cache.get(text, self.model)
+            if cached is not None:
+                EMBEDDING_CACHE_HITS.inc()
+                return cached
+            EMBEDDING_CACHE_MISSES.inc()
+        
         try:
-            response = await self.client.embeddings.create(
-                model=self.model,
-                input=text.strip()
-            )
-            return response.data[0].embedding
+            if self.batcher is not None:
+                embedding = await self.batcher.embed(text.strip())
+            else:
+                embedding = (await self._embed_texts([text.strip()]))[0]
         except Exception as e:
             raise Exception(f"Failed to generate embedding: {str(e)}")
+        
+        if self.cache is not None:
+            await self.cache.set(text, self.model, embedding)
+        
+        return embedding
+    
+    def cache_stats(self) -> Optional[Dict]:
+        """
+        Hit, miss and eviction counters of the query-embedding cache.
+        """
+        return self.cache.stats() if self.cache is not None else None
+    
+    def batch_stats(self) -> Optional[Dict]:
+        """
+        Request and batch counters of the query-embedding micro-batcher.
+        """
+        return self.batcher.stats() if self.batcher is not None else None
     
     async def generate_batch_embeddings(self, texts: List[str], batch_size: int = 100) -> List[List[float]]:
         """
@@ -69,15 +195,34 @@ class EmbeddingService:
             batch = texts[i:i + batch_size]
             
             try:
-                response = await self.client.embeddings.create(
-                    model=self.model,
-                    input=batch
-                )
-                
-                batch_embeddings = [data.embedding for data in response.data]
+                batch_embeddings = await self._embed_texts(batch)
                 all_embeddings.extend(batch_embeddings)
                 
             except Exception as e:
                 raise Exception(f"Failed to generate batch embeddings: {str(e)}")
         
         return all_embeddings
+    
+    def close(self) -> None:
+        pass
+
+
+def create_embedding_service(backend: Optional[str] = None) -> EmbeddingService:
+    """
+    Build the embedding backend selected by EMBEDDING_BACKEND.
+    
+    Args:
+        backend: "openai" or "local"; defaults to the configured backend
+        
+    Returns:
+        An EmbeddingService or LocalEmbeddingService instance
+    """
+    backend = (backend or EMBEDDING_BACKEND).lower()
+    
+    if backend == "openai":
+        return EmbeddingService()
+    if backend == "local":
+        from app.services.local_embeddings import LocalEmbeddingService
+        return LocalEmbeddingService()
+    
+    raise ValueError(f"Unknown embedding backend: {backend}")
@@ -1,132 +1,983 @@
-from typing import List, Optional, Dict
-from app.services.embeddings import EmbeddingService
-from app.services.vector_store import VectorStore
-from app.models.faq import FAQ, FAQSearchResult
+from typing import AsyncIterable, Awaitable, Callable, Iterable, List, Optional, Dict, Tuple, Union
+import asyncio
+import hashlib
+import logging
+import os
+import random
+import time
+from app.services.embeddings import EmbeddingService, create_embedding_service
+from app.services.embedding_cache import normalise_text
+from app.services.vector_store import VectorStore, AsyncVectorStore, create_vector_store
+from app.services.document_store import DocumentStore, create_document_store
+from app.services.response_cache import SemanticResponseCache
+from app.services.lexical_index import BM25Index
+from app.services.reranker import FeatureReranker
+from app.services.category_router import CategoryCentroids, partition_namespace
+from app.services.snapshot import Snapshot, SnapshotVectorStore, write_snapshot
+from app.services.query_context import is_follow_up, previous_user_turns, history_weights, blend_embeddings
+from app.models.faq import FAQ, FAQSearchResult, FAQIngestionFailure, FAQIngestionReport
+from app.utils.single_flight import SingleFlight
+from app.utils.metrics import CACHE_LOOKUPS, STAGE_SECONDS
+from app.config.chat import (
+    RESPONSE_CACHE_ENABLED,
+    FAQ_SEARCH_MODE,
+    FOLLOW_UP_RETRIEVAL,
+    FOLLOW_UP_HISTORY_WEIGHT,
+    FOLLOW_UP_DECAY,
+    FOLLOW_UP_TURNS,
+    RERANK_ENABLED,
+    RERANK_CANDIDATES,
+    CATEGORY_PARTITIONS_ENABLED,
+    CATEGORY_ROUTING_ENABLED,
+    CATEGORY_ROUTE_TOP_N,
+    CATEGORY_ROUTE_FALLBACK_SCORE,
+    HYBRID_CANDIDATE_MULTIPLIER,
+    HYBRID_RRF_K,
+    HYBRID_BM25_PIVOT
+)
+from app.config.vector_store import KB_SNAPSHOT_PATH, SNAPSHOT_POLL_SECONDS, SNAPSHOT_SWAP_GRACE_SECONDS
+from app.config.ingestion import (
+    INGEST_EMBED_BATCH_SIZE,
+    INGEST_MAX_IN_FLIGHT,
+    INGEST_UPSERT_CHUNK_SIZE,
+    INGEST_MAX_RETRIES,
+    INGEST_RETRY_BACKOFF_SECONDS
+)
 from datetime import datetime
 
+logger = logging.getLogger(__name__)
+
+QUERY_EMBEDDING_SECONDS = STAGE_SECONDS.labels("query_embedding")
+RESPONSE_CACHE_HITS = CACHE_LOOKUPS.labels("response", "hit")
+RESPONSE_CACHE_MISSES = CACHE_LOOKUPS.labels("response", "miss")
+
 
 class KnowledgeBaseService:
-    def __init__(self):
-        self.embedding_service = EmbeddingService()
-        self.vector_store = VectorStore()
+    def __init__(
+        self,
+        embedding_service: Optional[EmbeddingService] = None,
+        vector_store: Optional[VectorStore] = None,
+        response_cache: Optional[SemanticResponseCache] = None,
+        document_store: Optional[DocumentStore] = None
+    ):
+        self.embedding_service = embedding_service or create_embedding_service()
+        self.vector_store = AsyncVectorStore(
+            vector_store or create_vector_store(dimension=self.embedding_service.dimension)
+        )
+        self._check_snapshot_model(self.vector_store.store)
+        # Answers are kept out of the vector metadata when a document store is configured
+        self.document_store = document_store if document_store is not None else create_document_store()
         self.namespace = "faqs"
+        self.response_cache = response_cache
+        if self.response_cache is None and RESPONSE_CACHE_ENABLED:
+            self.response_cache = SemanticResponseCache()
+        self.search_mode = FAQ_SEARCH_MODE
+        self.follow_up_mode = FOLLOW_UP_RETRIEVAL
+        self.reranker = FeatureReranker() if RERANK_ENABLED else None
+        self.lexical_index = BM25Index()
+        self.single_flight = SingleFlight()
+        self.partitions_enabled = CATEGORY_PARTITIONS_ENABLED
+        self.routing_enabled = CATEGORY_PARTITIONS_ENABLED and CATEGORY_ROUTING_ENABLED
+        self.centroids = CategoryCentroids()
+        self.searches = 0
+        self.routed_searches = 0
+        self.route_fallbacks = 0
+        self.vectors_scanned = 0
+        self._snapshot_watcher: Optional[asyncio.Task] = None
+        self._retired_stores = set()
     
-    async def add_faq(self, faq: FAQ) -> Dict:
+    async def warm_up(self) -> None:
         """
-        Add a single FAQ to the knowledge base.
+        Probe the vector store once at startup so the first chat turn does
+        not pay for connection setup, and load the lexical index when
+        hybrid search is enabled and the category centroids when
+        partitions are.
+        """
+        await self.vector_store.warm_up()
+        if self.search_mode == "hybrid":
+            await self.rebuild_lexical_index()
+        if self.partitions_enabled:
+            await self.rebuild_partitions()
+    
+    async def rebuild_lexical_index(self) -> int:
+        """
+        Rebuild the in-process BM25 index from the FAQs in the vector store.
         
-        Args:
-            faq: FAQ object to add
-            
         Returns:
-            Response from vector store
+            Number of FAQs indexed
+        """
+        self.lexical_index.clear()
+        ids = await self.vector_store.list_ids(namespace=self.namespace)
+        for i in range(0, len(ids), 100):
+            stored = await self.vector_store.fetch(ids=ids[i:i + 100], namespace=self.namespace)
+            answers = await self._stored_answers((faq_id, vector["metadata"]) for faq_id, vector in stored.items())
+            for faq_id, vector in stored.items():
+                self.lexical_index.add(self._faq_from_metadata(faq_id, vector["metadata"], answers))
+        return len(self.lexical_index)
+    
+    async def rebuild_partitions(self) -> int:
+        """
+        Recompute the category centroids from the global namespace and
+        re-sync any category partition whose size doesn't match, e.g.
+        after partitions were first enabled on an existing index.
+        
+        Returns:
+            Number of partitions re-synced
+        """
+        self.centroids.clear()
+        groups: Dict[str, List[tuple]] = {}
+        ids = await self.vector_store.list_ids(namespace=self.namespace)
+        for i in range(0, len(ids), 100):
+            stored = await self.vector_store.fetch(ids=ids[i:i + 100], namespace=self.namespace)
+            for faq_id, vector in stored.items():
+                category = vector["metadata"].get("category", "")
+                self.centroids.add(category, vector["values"])
+                groups.setdefault(category, []).append((faq_id, vector["values"], vector["metadata"]))
+        
+        namespaces = (await self.vector_store.get_stats())["namespaces"]
+        resynced = 0
+        for category, vectors in groups.items():
+            namespace = partition_namespace(self.namespace, category)
+            stored_count = namespaces[namespace]["vector_count"] if namespace in namespaces else 0
+            if stored_count == len(vectors):
+                continue
+            keep = {vector[0] for vector in vectors}
+            stale = [faq_id for faq_id in await self.vector_store.list_ids(namespace=namespace) if faq_id not in keep]
+            if stale:
+                await self.vector_store.delete(ids=stale, namespace=namespace)
+            for i in range(0, len(vectors), INGEST_UPSERT_CHUNK_SIZE):
+                await self.vector_store.upsert(vectors=vectors[i:i + INGEST_UPSERT_CHUNK_SIZE], namespace=namespace)
+            resynced += 1
+        if resynced:
+            logger.info(f"Re-synced {resynced} category partitions")
+        return resynced
+    
+    async def _write_partitions(self, vectors: List[tuple], existing: Dict[str, Dict]) -> None:
+        """
+        Mirror upserted vectors into their category partitions, removing
+        FAQs from the partition of the category they moved out of.
+        """
+        groups: Dict[str, List[tuple]] = {}
+        moved: Dict[str, List[str]] = {}
+        for faq_id, values, metadata in vectors:
+            groups.setdefault(metadata["category"], []).append((faq_id, values, metadata))
+            stored = existing.get(faq_id)
+            old_category = stored["metadata"].get("category") if stored else None
+            if old_category is not None and old_category != metadata["category"]:
+                moved.setdefault(old_category, []).append(faq_id)
+        
+        for category, group in groups.items():
+            await self._with_retry(
+                lambda: self.vector_store.upsert(vectors=group, namespace=partition_namespace(self.namespace, category)),
+                "Partition upsert"
+            )
+        for category, faq_ids in moved.items():
+            await self._with_retry(
+                lambda: self.vector_store.delete(ids=faq_ids, namespace=partition_namespace(self.namespace, category)),
+                "Partition delete"
+            )
+    
+    def _update_centroids(self, vectors: List[tuple], existing: Dict[str, Dict]) -> None:
+        for faq_id, values, metadata in vectors:
+            stored = existing.get(faq_id)
+            if stored:
+                self.centroids.remove(stored["metadata"].get("category", ""), stored["values"])
+            self.centroids.add(metadata["category"], values)
+    
+    async def _delete_from_partitions(self, faq_ids: List[str]) -> None:
         """
+        Remove FAQs from their partitions and centroids; call before they
+        are deleted from the global namespace.
+        """
+        stored = await self.vector_store.fetch(ids=faq_ids, namespace=self.namespace)
+        groups: Dict[str, List[str]] = {}
+        for faq_id, vector in stored.items():
+            category = vector["metadata"].get("category", "")
+            groups.setdefault(category, []).append(faq_id)
+            self.centroids.remove(category, vector["values"])
+        for category, ids in groups.items():
+            await self.vector_store.delete(ids=ids, namespace=partition_namespace(self.namespace, category))
+    
+    def partition_stats(self) -> Optional[Dict]:
+        """
+        Partition sizes and how many vectors searches scanned.
+        """
+        if not self.partitions_enabled:
+            return None
+        return {
+            **self.centroids.stats(),
+            "routing": self.routing_enabled,
+            "searches": self.searches,
+            "routed_searches": self.routed_searches,
+            "route_fallbacks": self.route_fallbacks,
+            "avg_vectors_scanned": round(self.vectors_scanned / self.searches, 1) if self.searches else 0.0
+        }
+    
+    def close(self) -> None:
+        """
+        Release resources held by the vector store, document store,
+        re-ranker and embedding backend.
+        """
+        if self._snapshot_watcher is not None:
+            self._snapshot_watcher.cancel()
+            self._snapshot_watcher = None
+        self.vector_store.close()
+        self.embedding_service.close()
+        if self.document_store is not None:
+            self.document_store.close()
+        if self.reranker is not None:
+            self.reranker.close()
+    
+    @staticmethod
+    def _embedding_text(faq: FAQ) -> str:
         combined_text = f"Question: {faq.question}\nAnswer: {faq.answer}"
         if faq.keywords:
             combined_text += f"\nKeywords: {', '.join(faq.keywords)}"
-        
-        embedding = await self.embedding_service.generate_embedding(combined_text)
+        return combined_text
+    
+    async def _stored_answers(self, items: Iterable[Tuple[str, Dict]]) -> Dict[str, str]:
+        """
+        Answers in the document store of the FAQs (id, metadata) whose
+        metadata has none, read in one call off the event loop.
+        """
+        if self.document_store is None:
+            return {}
+        ids = [faq_id for faq_id, metadata in items if "answer" not in metadata]
+        if not ids:
+            return {}
+        return await asyncio.to_thread(self.document_store.get_many, ids)
+    
+    @staticmethod
+    def _faq_from_metadata(faq_id: str, metadata: Dict, answers: Optional[Dict[str, str]] = None) -> FAQ:
+        answer = metadata.get("answer")
+        if answer is None and answers:
+            answer = answers.get(faq_id)
+        return FAQ(
+            id=faq_id,
+            question=metadata.get("question", ""),
+            answer=answer or "",
+            category=metadata.get("category", ""),
+            keywords=metadata.get("keywords", []),
+            created_at=metadata.get("created_at"),
+            updated_at=metadata.get("updated_at")
+        )
+    
+    def _content_hash(self, faq: FAQ) -> str:
+        """
+        Hash of everything that determines the FAQ's embedding: the
+        embedded text and the embedding model.
+        """
+        content = f"{self.embedding_service.model}\x00{self._embedding_text(faq)}"
+        return hashlib.sha256(content.encode("utf-8")).hexdigest()
+    
+    def _metadata(self, faq: FAQ, existing: Optional[Dict] = None) -> Dict:
+        now = datetime.utcnow().isoformat()
+        created_at = faq.created_at.isoformat() if faq.created_at else None
+        if created_at is None and existing:
+            created_at = existing.get("created_at")
         
         metadata = {
             "question": faq.question,
-            "answer": faq.answer,
             "category": faq.category,
             "keywords": faq.keywords,
-            "created_at": faq.created_at.isoformat() if faq.created_at else datetime.utcnow().isoformat(),
-            "updated_at": faq.updated_at.isoformat() if faq.updated_at else datetime.utcnow().isoformat()
+            "content_hash": self._content_hash(faq),
+            "created_at": created_at or now,
+            "updated_at": faq.updated_at.isoformat() if faq.updated_at else now
         }
+        if self.document_store is None:
+            metadata["answer"] = faq.answer
+        return metadata
+    
+    def _answer_stored(self, faq_id: str, metadata: Dict, answers: Dict[str, str]) -> bool:
+        """
+        Whether the FAQ's answer is where the current configuration expects
+        it, so switching the document store on or off migrates answers on
+        the next upload. `answers` is what `_stored_answers` found.
+        """
+        if self.document_store is None:
+            return "answer" in metadata
+        return "answer" not in metadata and faq_id in answers
+    
+    async def _store_answers(self, faqs: List[FAQ]) -> None:
+        if self.document_store is not None:
+            await asyncio.to_thread(self.document_store.put_many, {faq.id: faq.answer for faq in faqs})
+    
+    async def add_faq(self, faq: FAQ) -> Dict:
+        """
+        Add a single FAQ to the knowledge base.
+        
+        Args:
+            faq: FAQ object to add
         
-        response = self.vector_store.upsert(
-            vectors=[(faq.id, embedding, metadata)],
+        Returns:
+            Response from vector store
+        """
+        embedding = await self.embedding_service.generate_embedding(self._embedding_text(faq))
+        vectors = [(faq.id, embedding, self._metadata(faq))]
+        
+        # Answers go in first so a search never finds a vector without one
+        await self._store_answers([faq])
+        if self.partitions_enabled:
+            existing = await self.vector_store.fetch(ids=[faq.id], namespace=self.namespace)
+            await self._write_partitions(vectors, existing)
+        response = await self.vector_store.upsert(
+            vectors=vectors,
             namespace=self.namespace
         )
+        if self.partitions_enabled:
+            self._update_centroids(vectors, existing)
+        if self.search_mode == "hybrid":
+            self.lexical_index.add(faq)
+        self._invalidate_responses([faq.id])
         
         return response
     
-    async def add_faqs_batch(self, faqs: List[FAQ]) -> Dict:
+    async def add_faqs_batch(
+        self,
+        faqs: Union[Iterable[FAQ], AsyncIterable[FAQ]],
+        progress: Optional[Callable[[FAQIngestionReport], Awaitable[None]]] = None,
+        full_sync: bool = False,
+        invalid_records: Optional[List[FAQIngestionFailure]] = None
+    ) -> FAQIngestionReport:
         """
-        Add multiple FAQs to the knowledge base in batch.
+        Add multiple FAQs to the knowledge base through a pipelined ingestion.
+        
+        FAQs are embedded in batches of INGEST_EMBED_BATCH_SIZE with up to
+        INGEST_MAX_IN_FLIGHT batches running concurrently. Each batch is
+        upserted in chunks of INGEST_UPSERT_CHUNK_SIZE as soon as it is
+        embedded, so writes overlap with later embedding calls. Failed
+        embedding or upsert calls are retried with exponential backoff;
+        items that still fail are reported instead of aborting the upload.
+        
+        FAQs whose stored content hash matches are skipped without being
+        re-embedded; if only their category changed the stored vector is
+        reused.
         
         Args:
-            faqs: List of FAQ objects to add
-            
+            faqs: FAQs to add, as a list or any (async) iterable
+            progress: Optional coroutine called with the report after each batch
+            full_sync: Delete stored FAQs that are not part of this upload
+            invalid_records: Input records the parser rejected, filled in as
+                `faqs` is consumed. A full sync deletes nothing if any were
+                rejected, since their FAQs would look missing.
+        
         Returns:
-            Response from vector store
+            Ingestion report with counts and per-item failures
         """
-        texts = []
-        for faq in faqs:
-            combined_text = f"Question: {faq.question}\nAnswer: {faq.answer}"
-            if faq.keywords:
-                combined_text += f"\nKeywords: {', '.join(faq.keywords)}"
-            texts.append(combined_text)
+        report = FAQIngestionReport()
+        in_flight = asyncio.Semaphore(INGEST_MAX_IN_FLIGHT)
+        tasks = set()
+        seen_ids = set()
         
-        embeddings = await self.embedding_service.generate_batch_embeddings(texts)
+        async def run_batch(batch: List[FAQ]):
+            try:
+                await self._ingest_batch(batch, report)
+                if progress is not None:
+                    await progress(report)
+            finally:
+                in_flight.release()
+        
+        try:
+            async for batch in self._batched(faqs, INGEST_EMBED_BATCH_SIZE):
+                report.processed += len(batch)
+                if full_sync:
+                    seen_ids.update(faq.id for faq in batch)
+                await in_flight.acquire()
+                task = asyncio.create_task(run_batch(batch))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+            
+            if tasks:
+                await asyncio.gather(*tasks)
+        except BaseException:
+            # The input failed (e.g. the client disconnected mid-upload) or a
+            # batch raised: stop the batches still writing before giving up
+            outstanding = list(tasks)
+            for task in outstanding:
+                task.cancel()
+            await asyncio.gather(*outstanding, return_exceptions=True)
+            raise
+        
+        if full_sync and invalid_records:
+            report.deletes_skipped = True
+            logger.warning(
+                f"Full sync kept stored FAQs: {len(invalid_records)} input records were invalid"
+            )
+        elif full_sync:
+            await self._delete_missing(seen_ids, report)
+        await self.vector_store.flush()
+        
+        logger.info(
+            f"Ingested {report.processed} FAQs in {report.batches} batches: "
+            f"{report.added} added, {report.updated} updated, {report.skipped} skipped, "
+            f"{report.deleted} deleted, {len(report.failures)} failures"
+        )
+        return report
+    
+    async def _delete_missing(self, seen_ids: set, report: FAQIngestionReport) -> None:
+        stored_ids = await self.vector_store.list_ids(namespace=self.namespace)
+        missing = [faq_id for faq_id in stored_ids if faq_id not in seen_ids]
+        
+        # Pinecone accepts at most 1000 ids per delete call
+        for i in range(0, len(missing), 1000):
+            chunk = missing[i:i + 1000]
+            if self.partitions_enabled:
+                await self._with_retry(lambda: self._delete_from_partitions(chunk), "Partition delete")
+            await self._with_retry(
+                lambda: self.vector_store.delete(ids=chunk, namespace=self.namespace),
+                "Delete chunk"
+            )
+            report.deleted += len(chunk)
+            if self.document_store is not None:
+                await asyncio.to_thread(self.document_store.delete, chunk)
+            if self.search_mode == "hybrid":
+                for faq_id in chunk:
+                    self.lexical_index.remove(faq_id)
+            self._invalidate_responses(chunk)
+    
+    @staticmethod
+    async def _batched(
+        faqs: Union[Iterable[FAQ], AsyncIterable[FAQ]],
+        size: int
+    ):
+        batch = []
+        if hasattr(faqs, "__aiter__"):
+            async for faq in faqs:
+                batch.append(faq)
+                if len(batch) >= size:
+                    yield batch
+                    batch = []
+        else:
+            for faq in faqs:
+                batch.append(faq)
+                if len(batch) >= size:
+                    yield batch
+                    batch = []
+        if batch:
+            yield batch
+    
+    @staticmethod
+    async def _with_retry(operation: Callable[[], Awaitable], description: str):
+        for attempt in range(INGEST_MAX_RETRIES + 1):
+            try:
+                return await operation()
+            except Exception as e:
+                if attempt == INGEST_MAX_RETRIES:
+                    raise
+                delay = INGEST_RETRY_BACKOFF_SECONDS * (2 ** attempt) * (0.5 + random.random())
+                logger.warning(f"{description} failed (attempt {attempt + 1}), retrying in {delay:.2f}s: {str(e)}")
+                await asyncio.sleep(delay)
+    
+    async def _ingest_batch(self, batch: List[FAQ], report: FAQIngestionReport) -> None:
+        try:
+            existing = await self._with_retry(
+                lambda: self.vector_store.fetch(ids=[faq.id for faq in batch], namespace=self.namespace),
+                "Fetch batch"
+            )
+        except Exception as e:
+            logger.warning(f"Could not fetch stored FAQs, re-embedding batch: {str(e)}")
+            existing = {}
+        answers = await self._stored_answers((faq_id, stored["metadata"]) for faq_id, stored in existing.items())
         
         vectors = []
-        for i, faq in enumerate(faqs):
-            metadata = {
-                "question": faq.question,
-                "answer": faq.answer,
-                "category": faq.category,
-                "keywords": faq.keywords,
-                "created_at": faq.created_at.isoformat() if faq.created_at else datetime.utcnow().isoformat(),
-                "updated_at": faq.updated_at.isoformat() if faq.updated_at else datetime.utcnow().isoformat()
-            }
-            vectors.append((faq.id, embeddings[i], metadata))
-        
-        response = self.vector_store.upsert(
-            vectors=vectors,
-            namespace=self.namespace
+        changes = {}
+        to_embed = []
+        for faq in batch:
+            stored = existing.get(faq.id)
+            stored_metadata = stored["metadata"] if stored else {}
+            
+            if stored and stored_metadata.get("content_hash") == self._content_hash(faq):
+                if stored_metadata.get("category") == faq.category and self._answer_stored(faq.id, stored_metadata, answers):
+                    report.skipped += 1
+                    continue
+                # Only metadata or answer placement changed: reuse the stored vector
+                vectors.append((faq.id, stored["values"], self._metadata(faq, stored_metadata)))
+                changes[faq.id] = "updated"
+            else:
+                to_embed.append(faq)
+                changes[faq.id] = "updated" if stored else "added"
+        
+        if to_embed:
+            texts = [self._embedding_text(faq) for faq in to_embed]
+            try:
+                embeddings = await self._with_retry(
+                    lambda: self.embedding_service.generate_batch_embeddings(texts, batch_size=len(texts)),
+                    "Embedding batch"
+                )
+                vectors.extend(
+                    (faq.id, embedding, self._metadata(faq, existing.get(faq.id, {}).get("metadata")))
+                    for faq, embedding in zip(to_embed, embeddings)
+                )
+            except Exception as e:
+                report.failures.extend(
+                    FAQIngestionFailure(id=faq.id, error=f"Embedding failed: {str(e)}") for faq in to_embed
+                )
+        
+        faqs_by_id = {faq.id: faq for faq in batch}
+        for i in range(0, len(vectors), INGEST_UPSERT_CHUNK_SIZE):
+            chunk = vectors[i:i + INGEST_UPSERT_CHUNK_SIZE]
+            chunk_ids = [vector[0] for vector in chunk]
+            try:
+                await self._write_chunk(chunk, existing, faqs_by_id)
+            except Exception as e:
+                report.failures.extend(
+                    FAQIngestionFailure(id=faq_id, error=f"Upsert failed: {str(e)}") for faq_id in chunk_ids
+                )
+                continue
+            for faq_id in chunk_ids:
+                if changes[faq_id] == "added":
+                    report.added += 1
+                else:
+                    report.updated += 1
+            report.upserted += len(chunk)
+        
+        report.batches += 1
+    
+    async def _write_chunk(self, chunk: List[tuple], existing: Dict[str, Dict], faqs_by_id: Dict[str, FAQ]) -> None:
+        """
+        Write one chunk of vectors to every place an FAQ lives: document
+        store, category partitions, the global namespace, and the
+        in-process centroids and lexical index.
+        """
+        chunk_ids = [vector[0] for vector in chunk]
+        await self._store_answers([faqs_by_id[faq_id] for faq_id in chunk_ids])
+        # Partitions first: if the global upsert then fails, the next
+        # upload finds no matching hash and rewrites both
+        if self.partitions_enabled:
+            await self._write_partitions(chunk, existing)
+        await self._with_retry(
+            lambda: self.vector_store.upsert(vectors=chunk, namespace=self.namespace),
+            "Upsert chunk"
+        )
+        if self.partitions_enabled:
+            self._update_centroids(chunk, existing)
+        # The BM25 index is only kept (and built in `warm_up`) for hybrid search
+        if self.search_mode == "hybrid":
+            for faq_id in chunk_ids:
+                self.lexical_index.add(faqs_by_id[faq_id])
+        self._invalidate_responses(chunk_ids)
+    
+    async def export_snapshot(self, path: str) -> Dict:
+        """
+        Write every FAQ with its vector, metadata, answer and content hash
+        to a versioned snapshot directory (see app.services.snapshot).
+        
+        Args:
+            path: Directory to create
+        
+        Returns:
+            The snapshot manifest
+        """
+        records = []
+        ids = await self.vector_store.list_ids(namespace=self.namespace)
+        for i in range(0, len(ids), 100):
+            stored = await self.vector_store.fetch(ids=ids[i:i + 100], namespace=self.namespace)
+            answers = await self._stored_answers((faq_id, vector["metadata"]) for faq_id, vector in stored.items())
+            for faq_id, vector in stored.items():
+                metadata = dict(vector["metadata"])
+                metadata["answer"] = self._faq_from_metadata(faq_id, metadata, answers).answer
+                records.append((faq_id, vector["values"], metadata))
+        
+        manifest = await asyncio.to_thread(
+            write_snapshot,
+            path,
+            records,
+            self.embedding_service.model,
+            self.embedding_service.dimension,
+            self.namespace
         )
+        logger.info(f"Exported {manifest['count']} FAQs to snapshot {manifest['snapshot_id']}")
+        return manifest
+    
+    async def import_snapshot(self, path: str) -> Dict:
+        """
+        Load a snapshot into the configured (writable) vector store without
+        re-embedding, e.g. to seed a fresh deployment.
         
-        return response
+        Args:
+            path: Snapshot directory
+        
+        Returns:
+            Snapshot id and number of FAQs imported
+        """
+        snapshot = await asyncio.to_thread(Snapshot, path)
+        self._check_snapshot_model(snapshot)
+        
+        imported = 0
+        for start in range(0, snapshot.count, INGEST_UPSERT_CHUNK_SIZE):
+            rows = range(start, min(start + INGEST_UPSERT_CHUNK_SIZE, snapshot.count))
+            faqs_by_id = {}
+            chunk = []
+            records = [(snapshot.string("id", row), snapshot.metadata(row)) for row in rows]
+            answers = await self._stored_answers(records)
+            for row, (faq_id, metadata) in zip(rows, records):
+                faq = self._faq_from_metadata(faq_id, metadata, answers)
+                faqs_by_id[faq_id] = faq
+                chunk.append((faq_id, snapshot.vectors[row].tolist(), self._metadata(faq, metadata)))
+            existing = {}
+            if self.partitions_enabled:
+                existing = await self.vector_store.fetch(ids=list(faqs_by_id), namespace=self.namespace)
+            await self._write_chunk(chunk, existing, faqs_by_id)
+            imported += len(chunk)
+        
+        await self.vector_store.flush()
+        logger.info(f"Imported {imported} FAQs from snapshot {snapshot.snapshot_id}")
+        return {"snapshot_id": snapshot.snapshot_id, "imported": imported}
+    
+    def _check_snapshot_model(self, store) -> None:
+        snapshot = store if isinstance(store, Snapshot) else getattr(store, "snapshot", None)
+        if snapshot is not None and snapshot.embedding_model != self.embedding_service.model:
+            raise ValueError(
+                f"Snapshot {snapshot.snapshot_id} was embedded with {snapshot.embedding_model}, "
+                f"but queries are embedded with {self.embedding_service.model}"
+            )
+    
+    def snapshot_info(self) -> Optional[Dict]:
+        """
+        Manifest of the snapshot being served, if any.
+        """
+        snapshot = getattr(self.vector_store.store, "snapshot", None)
+        return dict(snapshot.manifest, path=snapshot.path) if snapshot is not None else None
+    
+    def _index_snapshot(self, snapshot: Snapshot) -> Tuple[BM25Index, CategoryCentroids]:
+        lexical_index = BM25Index()
+        centroids = CategoryCentroids()
+        for row in range(snapshot.count):
+            if self.search_mode == "hybrid":
+                # Exported snapshots carry every answer in their metadata
+                lexical_index.add(self._faq_from_metadata(snapshot.string("id", row), snapshot.metadata(row)))
+            if self.partitions_enabled:
+                centroids.add(snapshot.category(row), snapshot.vectors[row])
+        return lexical_index, centroids
+    
+    async def swap_snapshot(self, path: str) -> Dict:
+        """
+        Serve searches from another snapshot without dropping requests.
+        
+        The new snapshot is opened and its lexical index and centroids are
+        built off the event loop; then the store, indexes and response
+        cache are switched in one step. Searches already running finish on
+        the old snapshot, which is closed after SNAPSHOT_SWAP_GRACE_SECONDS.
+        
+        Args:
+            path: Snapshot directory (or symlink to one)
+        
+        Returns:
+            The new snapshot's manifest
+        """
+        store = await asyncio.to_thread(SnapshotVectorStore, path, self.embedding_service.dimension)
+        self._check_snapshot_model(store)
+        lexical_index, centroids = await asyncio.to_thread(self._index_snapshot, store.snapshot)
+        
+        # No awaits between these assignments: every request sees either
+        # the old snapshot or the new one
+        old_store = self.vector_store
+        self.vector_store = AsyncVectorStore(store)
+        self.lexical_index = lexical_index
+        self.centroids = centroids
+        if self.response_cache is not None:
+            self.response_cache.clear()
+        
+        task = asyncio.create_task(self._retire_store(old_store))
+        self._retired_stores.add(task)
+        task.add_done_callback(self._retired_stores.discard)
+        logger.info(f"Swapped to snapshot {store.snapshot.snapshot_id}")
+        return store.snapshot.manifest
+    
+    @staticmethod
+    async def _retire_store(store: AsyncVectorStore) -> None:
+        await asyncio.sleep(SNAPSHOT_SWAP_GRACE_SECONDS)
+        await asyncio.to_thread(store.close)
+    
+    def start_snapshot_watcher(self, path: str = KB_SNAPSHOT_PATH, interval: float = SNAPSHOT_POLL_SECONDS) -> None:
+        """
+        Poll `path` and swap whenever it resolves to another snapshot
+        directory, so every worker follows `export-snapshot --publish`.
+        """
+        if self._snapshot_watcher is None and interval > 0:
+            self._snapshot_watcher = asyncio.create_task(self._watch_snapshot(path, interval))
+    
+    async def _watch_snapshot(self, path: str, interval: float) -> None:
+        while True:
+            await asyncio.sleep(interval)
+            current = self.snapshot_info()
+            target = os.path.realpath(path)
+            if current is not None and current["path"] == target:
+                continue
+            try:
+                await self.swap_snapshot(target)
+            except Exception as e:
+                logger.warning(f"Could not swap to snapshot {target}: {str(e)}")
+    
+    async def embed_query(self, query: str) -> List[float]:
+        """
+        Embed a user query so it can be shared between search and caching.
+        
+        Args:
+            query: User's search query
+        
+        Returns:
+            Query embedding vector
+        """
+        start = time.perf_counter()
+        try:
+            return await self.single_flight.do(
+                ("embed", normalise_text(query)),
+                lambda: self.embedding_service.generate_embedding(query)
+            )
+        finally:
+            QUERY_EMBEDDING_SECONDS.observe(time.perf_counter() - start)
+    
+    async def contextual_query(
+        self,
+        message: str,
+        history: List[Dict[str, str]],
+        mode: Optional[str] = None
+    ) -> Tuple[str, Optional[List[float]]]:
+        """
+        Build the retrieval query for a message in a conversation.
+        
+        In "blend" mode a message that looks like a follow-up is searched
+        with its embedding mixed with those of the previous user turns, and
+        with those turns prepended to the text used for BM25. Earlier turns
+        were embedded when they were asked, so their vectors normally come
+        from the embedding cache.
+        
+        Args:
+            message: New user message
+            history: Previous messages, oldest first
+            mode: "off" or "blend"; defaults to FOLLOW_UP_RETRIEVAL
+        
+        Returns:
+            Tuple of (query text, query embedding or None to embed the text)
+        """
+        if (mode or self.follow_up_mode) != "blend" or not is_follow_up(message):
+            return message, None
+        
+        previous = previous_user_turns(history, FOLLOW_UP_TURNS)
+        if not previous:
+            return message, None
+        
+        embeddings = await asyncio.gather(
+            self.embed_query(message),
+            *(self.embed_query(turn) for turn in previous)
+        )
+        weights = history_weights(len(previous), FOLLOW_UP_HISTORY_WEIGHT, FOLLOW_UP_DECAY)
+        query_embedding = blend_embeddings(embeddings[0], list(zip(embeddings[1:], weights)))
+        query = " ".join([*reversed(previous), message])
+        return query, query_embedding
     
     async def search_faqs(
         self,
         query: str,
         top_k: int = 5,
         category: Optional[str] = None,
-        min_score: float = 0.7
+        min_score: float = 0.7,
+        query_embedding: Optional[List[float]] = None,
+        mode: Optional[str] = None
     ) -> List[FAQSearchResult]:
         """
-        Search for relevant FAQs using semantic search.
+        Search for relevant FAQs using semantic or hybrid search.
+        
+        Concurrent searches for the same normalised query and parameters
+        share one in-flight search.
         
         Args:
             query: User's search query
             top_k: Number of results to return
             category: Optional category filter
             min_score: Minimum similarity score (0-1)
-            
+            query_embedding: Precomputed embedding of the query, if available
+            mode: "dense" or "hybrid"; defaults to FAQ_SEARCH_MODE
+        
         Returns:
             List of matching FAQs with scores
         """
-        query_embedding = await self.embedding_service.generate_embedding(query)
+        results, _ = await self.search_faqs_with_plan(query, top_k, category, min_score, query_embedding, mode)
+        return results
+    
+    async def search_faqs_with_plan(
+        self,
+        query: str,
+        top_k: int = 5,
+        category: Optional[str] = None,
+        min_score: float = 0.7,
+        query_embedding: Optional[List[float]] = None,
+        mode: Optional[str] = None
+    ) -> Tuple[List[FAQSearchResult], Dict]:
+        """
+        Same as `search_faqs`, also returning how the search was executed.
+        
+        Returns:
+            (results, plan): plan has the searched "partitions" (None for the
+            global namespace only), whether the routed search fell back to
+            the global namespace, and "vectors_scanned" (None when
+            partitions are disabled and the index size isn't tracked)
+        """
+        mode = mode or self.search_mode
+        key = ("search", normalise_text(query), top_k, category, min_score, mode)
+        results, plan = await self.single_flight.do(
+            key,
+            lambda: self._search(query, top_k, category, min_score, query_embedding, mode)
+        )
+        return list(results), dict(plan)
+    
+    async def _search(
+        self,
+        query: str,
+        top_k: int,
+        category: Optional[str],
+        min_score: float,
+        query_embedding: Optional[List[float]],
+        mode: str
+    ) -> Tuple[List[FAQSearchResult], Dict]:
+        # With a re-ranker, over-fetch so it has candidates to promote
+        fetch_k = max(top_k, RERANK_CANDIDATES) if self.reranker is not None else top_k
+        plan = {"partitions": None, "fallback": False, "vectors_scanned": 0 if self.partitions_enabled else None}
+        
+        if mode == "hybrid":
+            results = await self._hybrid_search(query, fetch_k, category, min_score, query_embedding, plan)
+        else:
+            matches = [
+                match
+                for match in await self._dense_search(query, fetch_k, category, query_embedding, plan)
+                if match.score >= min_score
+            ]
+            answers = await self._stored_answers((match.id, match.metadata) for match in matches)
+            results = [
+                FAQSearchResult(faq=self._faq_from_metadata(match.id, match.metadata, answers), score=match.score)
+                for match in matches
+            ]
+        
+        if self.reranker is not None:
+            results = await self.reranker.rerank(query, results)
+        
+        self.searches += 1
+        self.routed_searches += plan["partitions"] is not None and category is None
+        self.route_fallbacks += plan["fallback"]
+        self.vectors_scanned += plan["vectors_scanned"] or 0
+        return results[:top_k], plan
+    
+    async def _dense_search(
+        self,
+        query: str,
+        top_k: int,
+        category: Optional[str],
+        query_embedding: Optional[List[float]],
+        plan: Dict
+    ) -> List:
+        """
+        Vector search, recording the partitions searched and vectors
+        scanned in `plan`.
+        
+        With partitions, a category filter searches that category's
+        partition only. With routing, an unfiltered search goes to the
+        partitions whose centroids are closest to the query, and to the
+        global namespace only if the best routed match is weak.
+        """
+        if query_embedding is None:
+            query_embedding = await self.embed_query(query)
         
-        filter_dict = {"category": category} if category else None
+        if not self.partitions_enabled:
+            filter_dict = {"category": category} if category else None
+            return await self.vector_store.search(
+                query_vector=query_embedding,
+                top_k=top_k,
+                filter=filter_dict,
+                namespace=self.namespace
+            )
+        
+        if category:
+            plan["partitions"] = [category]
+            plan["vectors_scanned"] += self.centroids.counts.get(category, 0)
+            return await self.vector_store.search(
+                query_vector=query_embedding,
+                top_k=top_k,
+                namespace=partition_namespace(self.namespace, category)
+            )
+        
+        if self.routing_enabled:
+            categories = [category for category, _ in self.centroids.route(query_embedding, CATEGORY_ROUTE_TOP_N)]
+            if categories:
+                groups = await asyncio.gather(*(
+                    self.vector_store.search(
+                        query_vector=query_embedding,
+                        top_k=top_k,
+                        namespace=partition_namespace(self.namespace, category)
+                    )
+                    for category in categories
+                ))
+                matches = sorted(
+                    (match for group in groups for match in group),
+                    key=lambda match: match.score,
+                    reverse=True
+                )
+                plan["partitions"] = categories
+                plan["vectors_scanned"] += sum(self.centroids.counts.get(category, 0) for category in categories)
+                if matches and matches[0].score >= CATEGORY_ROUTE_FALLBACK_SCORE:
+                    return matches[:top_k]
+                plan["fallback"] = True
         
-        results = self.vector_store.search(
+        plan["vectors_scanned"] += self.centroids.total
+        return await self.vector_store.search(
             query_vector=query_embedding,
             top_k=top_k,
-            filter=filter_dict,
             namespace=self.namespace
         )
+    
+    async def _hybrid_search(
+        self,
+        query: str,
+        top_k: int,
+        category: Optional[str],
+        min_score: float,
+        query_embedding: Optional[List[float]],
+        plan: Dict
+    ) -> List[FAQSearchResult]:
+        """
+        Fuse dense and BM25 rankings with reciprocal-rank fusion.
         
-        faq_results = []
-        for result in results:
-            if result.score >= min_score:
-                metadata = result.metadata
-                faq = FAQ(
-                    id=result.id,
-                    question=metadata.get("question", ""),
-                    answer=metadata.get("answer", ""),
-                    category=metadata.get("category", ""),
-                    keywords=metadata.get("keywords", []),
-                    created_at=metadata.get("created_at"),
-                    updated_at=metadata.get("updated_at")
-                )
-                faq_results.append(FAQSearchResult(faq=faq, score=result.score))
+        Each candidate's reported score is the higher of its cosine score
+        and its BM25 score mapped to 0-1, so exact terms such as "IBAN" can
+        clear min_score even when the embedding match is weak. When the
+        whole query equals a known keyword or question, the lexical results
+        are returned directly and no embedding is computed.
+        """
+        candidates = top_k * HYBRID_CANDIDATE_MULTIPLIER
+        lexical = self.lexical_index.search(query, top_k=candidates, category=category)
+        lexical_scores = {faq.id: score / (score + HYBRID_BM25_PIVOT) for faq, score in lexical}
+        
+        exact = self.lexical_index.exact_matches(query, category=category)
+        if exact:
+            exact_ids = {faq.id for faq in exact}
+            results = [FAQSearchResult(faq=faq, score=1.0) for faq in exact]
+            results.extend(
+                FAQSearchResult(faq=faq, score=lexical_scores[faq.id])
+                for faq, _ in lexical
+                if faq.id not in exact_ids and lexical_scores[faq.id] >= min_score
+            )
+            return results[:top_k]
+        
+        dense = await self._dense_search(query, candidates, category, query_embedding, plan)
+        
+        faqs = {faq.id: faq for faq, _ in lexical}
+        answers = await self._stored_answers((result.id, result.metadata) for result in dense if result.id not in faqs)
+        scores = dict(lexical_scores)
+        fused = {}
+        for rank, result in enumerate(dense):
+            if result.id not in faqs:
+                faqs[result.id] = self._faq_from_metadata(result.id, result.metadata, answers)
+            scores[result.id] = max(scores.get(result.id, 0.0), result.score)
+            fused[result.id] = 1 / (HYBRID_RRF_K + rank + 1)
+        for rank, (faq, _) in enumerate(lexical):
+            fused[faq.id] = fused.get(faq.id, 0.0) + 1 / (HYBRID_RRF_K + rank + 1)
         
-        return faq_results
+        ranked = sorted(fused, key=fused.get, reverse=True)
+        return [
+            FAQSearchResult(faq=faqs[faq_id], score=scores[faq_id])
+            for faq_id in ranked
+            if scores[faq_id] >= min_score
+        ][:top_k]
     
     async def update_faq(self, faq: FAQ) -> Dict:
         """
@@ -134,50 +985,118 @@ class KnowledgeBaseService:
         
         Args:
             faq: FAQ object with updated data
-            
+        
         Returns:
             Response from vector store
         """
         faq.updated_at = datetime.utcnow()
         return await self.add_faq(faq)
     
-    def delete_faq(self, faq_id: str) -> Dict:
+    async def delete_faq(self, faq_id: str) -> Dict:
         """
         Delete an FAQ from the knowledge base.
         
         Args:
             faq_id: ID of the FAQ to delete
-            
+        
         Returns:
             Response from vector store
         """
-        response = self.vector_store.delete(
+        if self.partitions_enabled:
+            await self._delete_from_partitions([faq_id])
+        response = await self.vector_store.delete(
             ids=[faq_id],
             namespace=self.namespace
         )
+        if self.document_store is not None:
+            await asyncio.to_thread(self.document_store.delete, [faq_id])
+        if self.search_mode == "hybrid":
+            self.lexical_index.remove(faq_id)
+        self._invalidate_responses([faq_id])
         return response
     
-    def delete_all_faqs(self) -> Dict:
+    async def delete_all_faqs(self) -> Dict:
         """
         Delete all FAQs from the knowledge base.
         
         Returns:
             Response from vector store
         """
-        response = self.vector_store.delete(
+        response = await self.vector_store.delete(
             delete_all=True,
             namespace=self.namespace
         )
+        if self.partitions_enabled:
+            prefix = partition_namespace(self.namespace, "")
+            for namespace in (await self.vector_store.get_stats())["namespaces"]:
+                if namespace.startswith(prefix):
+                    await self.vector_store.delete(delete_all=True, namespace=namespace)
+            self.centroids.clear()
+        if self.document_store is not None:
+            await asyncio.to_thread(self.document_store.clear)
+        self.lexical_index.clear()
+        if self.response_cache is not None:
+            self.response_cache.clear()
         return response
     
-    def get_stats(self) -> Dict:
+    async def get_stats(self) -> Dict:
         """
         Get knowledge base statistics.
         
         Returns:
             Statistics from vector store
         """
-        return self.vector_store.get_stats()
+        return await self.vector_store.get_stats()
+    
+    def get_cached_response(
+        self,
+        query_embedding: List[float],
+        search_results: List[FAQSearchResult],
+        model: str
+    ) -> Optional[str]:
+        """
+        Look up a previous answer to a near-duplicate question grounded on
+        the same FAQs.
+        
+        Args:
+            query_embedding: Embedding of the current query
+            search_results: FAQs retrieved for the current query
+            model: Chat model that would generate the answer
+        
+        Returns:
+            The cached answer, or None on a miss or when caching is disabled
+        """
+        if self.response_cache is None or not search_results:
+            return None
+        faq_ids = [result.faq.id for result in search_results]
+        response = self.response_cache.lookup(query_embedding, faq_ids, model)
+        (RESPONSE_CACHE_MISSES if response is None else RESPONSE_CACHE_HITS).inc()
+        return response
+    
+    def cache_response(
+        self,
+        query_embedding: List[float],
+        search_results: List[FAQSearchResult],
+        model: str,
+        response: str
+    ) -> None:
+        """
+        Remember a complete answer for later near-duplicate questions.
+        
+        Args:
+            query_embedding: Embedding of the query that was answered
+            search_results: FAQs the answer was grounded on
+            model: Chat model that generated the answer
+            response: Full answer text
+        """
+        if self.response_cache is None or not search_results or not response:
+            return
+        faq_ids = [result.faq.id for result in search_results]
+        self.response_cache.store(query_embedding, faq_ids, model, response)
+    
+    def _invalidate_responses(self, faq_ids: List[str]) -> None:
+        if self.response_cache is not None:
+            self.response_cache.invalidate(faq_ids)
     
     def format_context_for_chat(self, search_results: List[FAQSearchResult]) -> str:
         """
@@ -185,7 +1104,7 @@ class KnowledgeBaseService:
         
         Args:
             search_results: List of FAQ search results
-            
+        
         Returns:
             Formatted context string
         """
@@ -0,0 +1,161 @@
+import math
+import re
+from collections import Counter
+from typing import Dict, List, Optional, Set, Tuple
+
+from app.models.faq import FAQ
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+_STOPWORDS = frozenset(
+    "a an and are as at be by can do does for from how i if in is it me my of on or "
+    "our so that the their there this to we what when where which who why will with "
+    "you your".split()
+)
+
+
+def tokenize(text: str) -> List[str]:
+    return [token for token in _TOKEN_RE.findall(text.lower()) if token not in _STOPWORDS]
+
+
+def normalise_phrase(text: str) -> str:
+    return " ".join(_TOKEN_RE.findall(text.lower()))
+
+
+class BM25Index:
+    """
+    In-process inverted index with BM25 scoring over FAQ question, answer
+    and keywords.
+    
+    Postings map each term to {doc slot: term frequency}, so a query only
+    touches the documents that share a term with it. Keyword phrases and
+    questions are also kept in an exact-match table, which lets callers
+    answer a query that *is* a known keyword without embedding it.
+    """
+    def __init__(self, k1: float = 1.2, b: float = 0.75, keyword_weight: int = 2):
+        self.k1 = k1
+        self.b = b
+        self.keyword_weight = keyword_weight
+        self.clear()
+    
+    def clear(self) -> None:
+        self._postings: Dict[str, Dict[int, int]] = {}
+        self._term_counts: List[Optional[Counter]] = []
+        self._doc_len: List[int] = []
+        self._faqs: List[Optional[FAQ]] = []
+        self._slots: Dict[str, int] = {}
+        self._free: List[int] = []
+        self._total_len = 0
+        self._phrases: Dict[str, Set[int]] = {}
+    
+    def __len__(self) -> int:
+        return len(self._slots)
+    
+    def _doc_phrases(self, faq: FAQ) -> Set[str]:
+        phrases = {normalise_phrase(keyword) for keyword in faq.keywords}
+        phrases.add(normalise_phrase(faq.question))
+        phrases.discard("")
+        return phrases
+    
+    def add(self, faq: FAQ) -> None:
+        """
+        Index an FAQ, replacing any previous version with the same id.
+        """
+        self.remove(faq.id)
+        
+        tokens = tokenize(faq.question) + tokenize(faq.answer)
+        for keyword in faq.keywords:
+            tokens.extend(tokenize(keyword) * self.keyword_weight)
+        counts = Counter(tokens)
+        
+        if self._free:
+            slot = self._free.pop()
+            self._term_counts[slot] = counts
+            self._doc_len[slot] = len(tokens)
+            self._faqs[slot] = faq
+        else:
+            slot = len(self._faqs)
+            self._term_counts.append(counts)
+            self._doc_len.append(len(tokens))
+            self._faqs.append(faq)
+        
+        self._slots[faq.id] = slot
+        self._total_len += len(tokens)
+        for term, tf in counts.items():
+            self._postings.setdefault(term, {})[slot] = tf
+        for phrase in self._doc_phrases(faq):
+            self._phrases.setdefault(phrase, set()).add(slot)
+    
+    def remove(self, faq_id: str) -> None:
+        slot = self._slots.pop(faq_id, None)
+        if slot is None:
+            return
+        
+        for term in self._term_counts[slot]:
+            postings = self._postings[term]
+            del postings[slot]
+            if not postings:
+                del self._postings[term]
+        for phrase in self._doc_phrases(self._faqs[slot]):
+            slots = self._phrases[phrase]
+            slots.discard(slot)
+            if not slots:
+                del self._phrases[phrase]
+        
+        self._total_len -= self._doc_len[slot]
+        self._term_counts[slot] = None
+        self._doc_len[slot] = 0
+        self._faqs[slot] = None
+        self._free.append(slot)
+    
+    def exact_matches(self, query: str, category: Optional[str] = None) -> List[FAQ]:
+        """
+        FAQs with a keyword or question equal to the whole (normalised) query.
+        """
+        slots = self._phrases.get(normalise_phrase(query), ())
+        faqs = [self._faqs[slot] for slot in slots]
+        return [faq for faq in faqs if category is None or faq.category == category]
+    
+    def search(
+        self,
+        query: str,
+        top_k: int = 5,
+        category: Optional[str] = None
+    ) -> List[Tuple[FAQ, float]]:
+        """
+        Rank FAQs by BM25 score for the query.
+        
+        Args:
+            query: Free-text query
+            top_k: Number of results to return
+            category: Optional category filter
+            
+        Returns:
+            List of (FAQ, BM25 score) tuples, best first
+        """
+        doc_count = len(self._slots)
+        if doc_count == 0:
+            return []
+        
+        avg_len = self._total_len / doc_count
+        scores: Dict[int, float] = {}
+        for term in set(tokenize(query)):
+            postings = self._postings.get(term)
+            if not postings:
+                continue
+            df = len(postings)
+            idf = math.log(1 + (doc_count - df + 0.5) / (df + 0.5))
+            for slot, tf in postings.items():
+                norm = self.k1 * (1 - self.b + self.b * self._doc_len[slot] / avg_len)
+                scores[slot] = scores.get(slot, 0.0) + idf * tf * (self.k1 + 1) / (tf + norm)
+        
+        ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+        results = []
+        for slot, score in ranked:
+            faq = self._faqs[slot]
+            if category is not None and faq.category != category:
+                continue
+            results.append((faq, score))
+            if len(results) >= top_k:
+                break
+        return results
@@ -0,0 +1,123 @@
+import asyncio
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional
+
+import numpy as np
+
+from app.config.embeddings import (
+    LOCAL_EMBEDDING_MODEL_PATH,
+    LOCAL_EMBEDDING_MAX_LENGTH,
+    LOCAL_EMBEDDING_THREADS,
+    LOCAL_EMBEDDING_BATCH_WINDOW_MS,
+    LOCAL_EMBEDDING_BATCH_MAX_SIZE
+)
+from app.services.embedding_cache import EmbeddingCache, create_embedding_cache
+from app.services.embeddings import EmbeddingBatcher, EmbeddingService
+
+logger = logging.getLogger(__name__)
+
+
+class LocalEmbeddingService(EmbeddingService):
+    """
+    Embeddings from a sentence-embedding model run in-process with ONNX
+    Runtime, so a query embedding costs a few milliseconds of CPU instead
+    of an API round trip.
+    
+    The model directory holds `model.onnx` (inputs input_ids /
+    attention_mask [/ token_type_ids], token embeddings as first output)
+    and the matching `tokenizer.json`. Vectors are mean-pooled over the
+    attention mask and L2-normalised. The model is loaded once, inference
+    runs on a dedicated thread pool, and concurrent queries are grouped by
+    the same micro-batcher the OpenAI backend uses.
+    """
+    def __init__(
+        self,
+        model_path: str = LOCAL_EMBEDDING_MODEL_PATH,
+        cache: Optional[EmbeddingCache] = None,
+        threads: int = LOCAL_EMBEDDING_THREADS,
+        max_length: int = LOCAL_EMBEDDING_MAX_LENGTH
+    ):
+        try:
+            import onnxruntime
+            from tokenizers import Tokenizer
+        except ImportError:
+            raise RuntimeError(
+                "EMBEDDING_BACKEND=local needs the onnxruntime and tokenizers packages"
+            )
+        
+        model_file = os.path.join(model_path, "model.onnx")
+        tokenizer_file = os.path.join(model_path, "tokenizer.json")
+        if not os.path.exists(model_file) or not os.path.exists(tokenizer_file):
+            raise RuntimeError(f"No model.onnx and tokenizer.json found in {model_path}")
+        
+        self.tokenizer = Tokenizer.from_file(tokenizer_file)
+        self.tokenizer.enable_truncation(max_length=max_length)
+        self.tokenizer.enable_padding()
+        
+        options = onnxruntime.SessionOptions()
+        options.intra_op_num_threads = threads
+        options.inter_op_num_threads = 1
+        self.session = onnxruntime.InferenceSession(
+            model_file,
+            sess_options=options,
+            providers=["CPUExecutionProvider"]
+        )
+        self.input_names = {model_input.name for model_input in self.session.get_inputs()}
+        
+        # Cache keys and FAQ content hashes include the model id, so vectors
+        # from different backends never mix
+        self.model = f"local:{os.path.basename(os.path.normpath(model_path))}"
+        self.client = None
+        self.cache = cache if cache is not None else create_embedding_cache()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="local-embeddings")
+        self.batcher = (
+            EmbeddingBatcher(
+                self._embed_texts,
+                window_ms=LOCAL_EMBEDDING_BATCH_WINDOW_MS,
+                max_size=LOCAL_EMBEDDING_BATCH_MAX_SIZE
+            )
+            if LOCAL_EMBEDDING_BATCH_WINDOW_MS > 0 else None
+        )
+        
+        output_dim = self.session.get_outputs()[0].shape[-1]
+        self.dimension = output_dim if isinstance(output_dim, int) else len(self.encode(["warm up"])[0])
+        logger.info(f"Loaded local embedding model {self.model} ({self.dimension} dimensions)")
+    
+    def encode(self, texts: List[str]) -> np.ndarray:
+        """
+        Embed texts synchronously.
+        
+        Args:
+            texts: Input texts
+        
+        Returns:
+            float32 array of shape (len(texts), dimension), unit length rows
+        """
+        encodings = self.tokenizer.encode_batch(texts)
+        input_ids = np.array([encoding.ids for encoding in encodings], dtype=np.int64)
+        attention_mask = np.array([encoding.attention_mask for encoding in encodings], dtype=np.int64)
+        
+        feeds = {"input_ids": input_ids, "attention_mask": attention_mask}
+        if "token_type_ids" in self.input_names:
+            feeds["token_type_ids"] = np.zeros_like(input_ids)
+        token_embeddings = self.session.run(None, {
+            name: value for name, value in feeds.items() if name in self.input_names
+        })[0]
+        
+        if token_embeddings.ndim == 2:
+            pooled = token_embeddings
+        else:
+            mask = attention_mask[..., None].astype(np.float32)
+            pooled = (token_embeddings * mask).sum(axis=1) / np.maximum(mask.sum(axis=1), 1e-9)
+        norms = np.linalg.norm(pooled, axis=1, keepdims=True)
+        return (pooled / np.maximum(norms, 1e-12)).astype(np.float32)
+    
+    async def _embed_texts(self, texts: List[str]) -> List[List[float]]:
+        loop = asyncio.get_running_loop()
+        vectors = await loop.run_in_executor(self._executor, self.encode, texts)
+        return vectors.tolist()
+    
+    def close(self) -> None:
+        self._executor.shutdown(wait=False)
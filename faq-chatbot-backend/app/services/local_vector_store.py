@@ -0,0 +1,574 @@
+import json
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from app.config.vector_store import (
+    LOCAL_INDEX_PATH,
+    LOCAL_INDEX_SAVE_INTERVAL_SECONDS,
+    LOCAL_INDEX_PRECISION,
+    LOCAL_INDEX_RESCORE_FACTOR
+)
+
+PRECISIONS = {"float32": np.float32, "float16": np.float16, "int8": np.int8}
+
+# Rows converted to float32 at a time when scanning a compact matrix; small
+# enough for the converted block to stay in cache
+SCAN_BLOCK_ROWS = 128
+
+
+@dataclass
+class VectorMatch:
+    """
+    Search hit with the same attribute shape as a Pinecone match.
+    """
+    id: str
+    score: float
+    metadata: Optional[Dict[str, Any]] = None
+
+
+def quantize(vectors: np.ndarray, precision: str) -> tuple:
+    """
+    Compact copy of unit-length vectors for scanning.
+    
+    Returns:
+        (codes, scales): int8 codes use one symmetric scale per vector;
+        float16/float32 codes have a scale of 1
+    """
+    if precision == "int8":
+        scales = np.abs(vectors).max(axis=1) / 127.0
+        scales[scales == 0] = 1.0
+        codes = np.rint(vectors / scales[:, None]).astype(np.int8)
+        return codes, scales.astype(np.float32)
+    return vectors.astype(PRECISIONS[precision]), np.ones(len(vectors), dtype=np.float32)
+
+
+@dataclass
+class _Namespace:
+    dimension: int
+    precision: str = "float32"
+    ids: List[str] = field(default_factory=list)
+    rows: Dict[str, int] = field(default_factory=dict)
+    metadata: List[Dict[str, Any]] = field(default_factory=list)
+    # Scan matrix in `precision`; the full vectors when that is float32
+    vectors: np.ndarray = None
+    scales: np.ndarray = None
+    # Full-precision vectors of a compact namespace: the memory-mapped file
+    # written by the last save, plus rows upserted since then
+    full: Optional[np.ndarray] = None
+    full_rows: Dict[str, int] = field(default_factory=dict)
+    pending: Dict[str, np.ndarray] = field(default_factory=dict)
+    
+    def __post_init__(self):
+        if self.vectors is None:
+            self.vectors = np.empty((0, self.dimension), dtype=PRECISIONS[self.precision])
+        if self.scales is None:
+            self.scales = np.ones(self.vectors.shape[0], dtype=np.float32)
+    
+    @property
+    def count(self) -> int:
+        return len(self.ids)
+    
+    @property
+    def compact(self) -> bool:
+        return self.precision != "float32"
+    
+    def _reserve(self, size: int) -> None:
+        capacity = self.vectors.shape[0]
+        if size <= capacity:
+            return
+        new_capacity = max(size, capacity * 2, 64)
+        grown = np.empty((new_capacity, self.dimension), dtype=self.vectors.dtype)
+        grown[:self.count] = self.vectors[:self.count]
+        self.vectors = grown
+        scales = np.ones(new_capacity, dtype=np.float32)
+        scales[:self.count] = self.scales[:self.count]
+        self.scales = scales
+    
+    def full_vector(self, row: int) -> np.ndarray:
+        if not self.compact:
+            return self.vectors[row]
+        vector_id = self.ids[row]
+        vector = self.pending.get(vector_id)
+        if vector is None:
+            vector = np.asarray(self.full[self.full_rows[vector_id]], dtype=np.float32)
+        return vector
+    
+    def upsert(self, ids: List[str], vectors: np.ndarray, metadata: List[Dict[str, Any]]) -> None:
+        self._reserve(self.count + len(ids))
+        codes, scales = quantize(vectors, self.precision)
+        for vector_id, vector, code, scale, meta in zip(ids, vectors, codes, scales, metadata):
+            row = self.rows.get(vector_id)
+            if row is None:
+                row = self.count
+                self.rows[vector_id] = row
+                self.ids.append(vector_id)
+                self.metadata.append(meta)
+            else:
+                self.metadata[row] = meta
+            self.vectors[row] = code
+            self.scales[row] = scale
+            if self.compact:
+                self.pending[vector_id] = np.array(vector, dtype=np.float32)
+    
+    def delete(self, ids: List[str]) -> int:
+        deleted = 0
+        for vector_id in ids:
+            row = self.rows.pop(vector_id, None)
+            if row is None:
+                continue
+            self.pending.pop(vector_id, None)
+            last = self.count - 1
+            if row != last:
+                # Move the last row into the hole to keep the matrix contiguous
+                moved_id = self.ids[last]
+                self.vectors[row] = self.vectors[last]
+                self.scales[row] = self.scales[last]
+                self.ids[row] = moved_id
+                self.metadata[row] = self.metadata[last]
+                self.rows[moved_id] = row
+            self.ids.pop()
+            self.metadata.pop()
+            deleted += 1
+        return deleted
+    
+    def approximate_scores(self, query: np.ndarray) -> np.ndarray:
+        if not self.compact:
+            return self.vectors[:self.count] @ query
+        # NumPy has no int8/float16 matrix product, so convert block by block
+        # into a cache-sized float32 buffer and use the float32 BLAS kernel
+        scores = np.empty(self.count, dtype=np.float32)
+        block = np.empty((SCAN_BLOCK_ROWS, self.dimension), dtype=np.float32)
+        for start in range(0, self.count, SCAN_BLOCK_ROWS):
+            stop = min(start + SCAN_BLOCK_ROWS, self.count)
+            rows = block[:stop - start]
+            np.copyto(rows, self.vectors[start:stop], casting="unsafe")
+            np.dot(rows, query, out=scores[start:stop])
+        if self.precision == "int8":
+            scores *= self.scales[:self.count]
+        return scores
+    
+    def nbytes(self) -> int:
+        """
+        Resident bytes of the scan matrix and scales (not counting the
+        memory-mapped full-precision file).
+        """
+        scan = self.count * self.dimension * self.vectors.itemsize
+        scales = self.count * 4 if self.precision == "int8" else 0
+        pending = len(self.pending) * self.dimension * 4
+        return scan + scales + pending
+
+
+def _match_value(value: Any, condition: Any) -> bool:
+    values = value if isinstance(value, list) else [value]
+    
+    if not isinstance(condition, dict):
+        return condition in values
+    
+    for operator, operand in condition.items():
+        if operator == "$eq":
+            matched = operand in values
+        elif operator == "$ne":
+            matched = operand not in values
+        elif operator == "$in":
+            matched = any(v in operand for v in values)
+        elif operator == "$nin":
+            matched = not any(v in operand for v in values)
+        elif operator in ("$gt", "$gte", "$lt", "$lte"):
+            if value is None or isinstance(value, list):
+                return False
+            matched = {
+                "$gt": value > operand,
+                "$gte": value >= operand,
+                "$lt": value < operand,
+                "$lte": value <= operand,
+            }[operator]
+        else:
+            raise ValueError(f"Unsupported filter operator: {operator}")
+        if not matched:
+            return False
+    return True
+
+
+def matches_filter(metadata: Dict[str, Any], filter: Dict[str, Any]) -> bool:
+    """
+    Evaluate a Pinecone-style metadata filter against a metadata dict.
+    """
+    for key, condition in filter.items():
+        if key == "$and":
+            if not all(matches_filter(metadata, sub) for sub in condition):
+                return False
+        elif key == "$or":
+            if not any(matches_filter(metadata, sub) for sub in condition):
+                return False
+        elif not _match_value(metadata.get(key), condition):
+            return False
+    return True
+
+
+class LocalVectorStore:
+    """
+    In-process vector index backed by NumPy.
+    
+    Vectors are L2-normalised on insert and kept in one contiguous float32
+    matrix per namespace, so cosine top-k is a single matrix-vector product
+    followed by `argpartition`. Namespaces are persisted to disk so
+    restarts don't need to re-embed the corpus; saves are throttled to one
+    per `save_interval` seconds and completed by `flush()`.
+    
+    With `precision` "float16" or "int8" the scan matrix is kept at 2 or 4
+    times lower size and the best `top_k * rescore_factor` candidates are
+    re-scored against the full-precision vectors, so returned scores and
+    order are exact for everything that reaches the candidate set.
+    """
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        dimension: int = 1536,
+        metric: str = "cosine",
+        save_interval: float = LOCAL_INDEX_SAVE_INTERVAL_SECONDS,
+        precision: str = LOCAL_INDEX_PRECISION,
+        rescore_factor: int = LOCAL_INDEX_RESCORE_FACTOR
+    ):
+        if metric != "cosine":
+            raise ValueError("LocalVectorStore only supports the cosine metric")
+        if precision not in PRECISIONS:
+            raise ValueError(f"Unsupported index precision: {precision}")
+        
+        self.path = path if path is not None else LOCAL_INDEX_PATH
+        self.dimension = dimension
+        self.metric = metric
+        self.save_interval = save_interval
+        self.precision = precision
+        self.rescore_factor = max(1, rescore_factor)
+        self._namespaces: Dict[str, _Namespace] = {}
+        self._dirty = set()
+        self._last_save = 0.0
+        self._lock = threading.RLock()
+        
+        if self.path:
+            os.makedirs(self.path, exist_ok=True)
+            self._load()
+    
+    def _file_prefix(self, namespace: str) -> str:
+        return os.path.join(self.path, namespace or "__default__")
+    
+    def _load(self) -> None:
+        for filename in os.listdir(self.path):
+            if not filename.endswith(".npz"):
+                continue
+            prefix = os.path.join(self.path, filename[:-len(".npz")])
+            with np.load(prefix + ".npz", allow_pickle=False) as data:
+                vectors = np.ascontiguousarray(data["vectors"])
+                scales = data["scales"] if "scales" in data else None
+                ids = [str(i) for i in data["ids"]]
+            with open(prefix + ".json", "r", encoding="utf-8") as f:
+                stored = json.load(f)
+            stored_precision = stored.get("precision", "float32")
+            
+            if vectors.shape[1] != self.dimension:
+                raise ValueError(
+                    f"Persisted index has dimension {vectors.shape[1]}, expected {self.dimension}"
+                )
+            
+            if stored_precision == "float32":
+                full = vectors
+            else:
+                full = np.load(prefix + ".full.npy", mmap_mode="r", allow_pickle=False)
+            
+            if stored_precision != self.precision:
+                # Precision changed since the last save: rebuild the scan
+                # matrix from the full vectors and save in the new layout
+                vectors, scales = quantize(np.asarray(full, dtype=np.float32), self.precision)
+                self._dirty.add(stored["namespace"])
+            
+            namespace = _Namespace(
+                dimension=self.dimension,
+                precision=self.precision,
+                ids=ids,
+                rows={vector_id: row for row, vector_id in enumerate(ids)},
+                metadata=stored["metadata"],
+                vectors=vectors,
+                scales=scales
+            )
+            if namespace.compact:
+                if stored_precision == "float32":
+                    namespace.pending = {vector_id: full[row] for row, vector_id in enumerate(ids)}
+                else:
+                    namespace.full = full
+                    namespace.full_rows = dict(namespace.rows)
+            self._namespaces[stored["namespace"]] = namespace
+    
+    def _mark_dirty(self, namespace: str) -> None:
+        if not self.path:
+            return
+        self._dirty.add(namespace)
+        if time.monotonic() - self._last_save >= self.save_interval:
+            self.flush()
+    
+    def flush(self) -> None:
+        """
+        Write every namespace changed since the last save to disk.
+        """
+        with self._lock:
+            for namespace in list(self._dirty):
+                self._persist(namespace)
+            self._dirty.clear()
+            self._last_save = time.monotonic()
+    
+    def _persist(self, namespace: str) -> None:
+        prefix = self._file_prefix(namespace)
+        ns = self._namespaces.get(namespace)
+        if ns is None or ns.count == 0:
+            for suffix in (".npz", ".json", ".full.npy"):
+                if os.path.exists(prefix + suffix):
+                    os.remove(prefix + suffix)
+            return
+        
+        # Write to temporary files and rename so readers never see partial data
+        if ns.compact:
+            full = np.empty((ns.count, self.dimension), dtype=np.float32)
+            for row in range(ns.count):
+                full[row] = ns.full_vector(row)
+            with open(prefix + ".full.npy.tmp", "wb") as f:
+                np.save(f, full)
+        with open(prefix + ".npz.tmp", "wb") as f:
+            np.savez(
+                f,
+                vectors=ns.vectors[:ns.count],
+                scales=ns.scales[:ns.count],
+                ids=np.array(ns.ids)
+            )
+        with open(prefix + ".json.tmp", "w", encoding="utf-8") as f:
+            json.dump({"namespace": namespace, "precision": ns.precision, "metadata": ns.metadata}, f)
+        if ns.compact:
+            os.replace(prefix + ".full.npy.tmp", prefix + ".full.npy")
+            del full
+            ns.full = np.load(prefix + ".full.npy", mmap_mode="r", allow_pickle=False)
+            ns.full_rows = dict(ns.rows)
+            ns.pending = {}
+        elif os.path.exists(prefix + ".full.npy"):
+            os.remove(prefix + ".full.npy")
+        os.replace(prefix + ".npz.tmp", prefix + ".npz")
+        os.replace(prefix + ".json.tmp", prefix + ".json")
+    
+    def _normalise(self, vectors: np.ndarray) -> np.ndarray:
+        if vectors.ndim != 2 or vectors.shape[1] != self.dimension:
+            raise ValueError(f"Expected vectors of dimension {self.dimension}")
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return vectors / norms
+    
+    def _filter_mask(self, ns: _Namespace, filter: Dict) -> np.ndarray:
+        return np.fromiter(
+            (matches_filter(meta, filter) for meta in ns.metadata),
+            dtype=bool,
+            count=ns.count
+        )
+    
+    def upsert(
+        self,
+        vectors: List[tuple],
+        namespace: str = ""
+    ) -> Dict:
+        """
+        Insert or update vectors in the index.
+        
+        Args:
+            vectors: List of tuples (id, embedding, metadata)
+            namespace: Optional namespace for organizing vectors
+        
+        Returns:
+            Dict with the upserted count
+        """
+        if not vectors:
+            return {"upserted_count": 0}
+        
+        ids = [str(v[0]) for v in vectors]
+        matrix = self._normalise(np.asarray([v[1] for v in vectors], dtype=np.float32))
+        metadata = [dict(v[2]) if len(v) > 2 and v[2] else {} for v in vectors]
+        
+        with self._lock:
+            ns = self._namespaces.get(namespace)
+            if ns is None:
+                ns = self._namespaces[namespace] = _Namespace(dimension=self.dimension, precision=self.precision)
+            ns.upsert(ids, matrix, metadata)
+            self._mark_dirty(namespace)
+        
+        return {"upserted_count": len(ids)}
+    
+    def search(
+        self,
+        query_vector: List[float],
+        top_k: int = 5,
+        filter: Optional[Dict] = None,
+        namespace: str = "",
+        include_metadata: bool = True
+    ) -> List[VectorMatch]:
+        """
+        Search for similar vectors.
+        
+        Args:
+            query_vector: Query embedding vector
+            top_k: Number of results to return
+            filter: Metadata filter (e.g., {"category": "payments"})
+            namespace: Optional namespace to search in
+            include_metadata: Whether to include metadata in results
+        
+        Returns:
+            List of matches ordered by descending cosine similarity
+        """
+        query = self._normalise(np.asarray([query_vector], dtype=np.float32))[0]
+        
+        with self._lock:
+            ns = self._namespaces.get(namespace)
+            if ns is None or ns.count == 0 or top_k <= 0:
+                return []
+            
+            scores = ns.approximate_scores(query)
+            candidates = ns.count
+            if filter:
+                mask = self._filter_mask(ns, filter)
+                candidates = int(mask.sum())
+                scores[~mask] = -np.inf
+            
+            k = min(top_k, candidates)
+            if k == 0:
+                return []
+            
+            # Compact scans keep extra candidates for exact re-scoring
+            pool = min(k * self.rescore_factor, candidates) if ns.compact else k
+            if pool < ns.count:
+                top = np.argpartition(-scores, pool - 1)[:pool]
+            else:
+                top = np.arange(ns.count)
+            if ns.compact:
+                scores[top] = [float(ns.full_vector(row) @ query) for row in top]
+            top = top[np.argsort(-scores[top], kind="stable")][:k]
+            
+            return [
+                VectorMatch(
+                    id=ns.ids[row],
+                    score=float(scores[row]),
+                    metadata=dict(ns.metadata[row]) if include_metadata else None
+                )
+                for row in top
+            ]
+    
+    def fetch(
+        self,
+        ids: List[str],
+        namespace: str = ""
+    ) -> Dict[str, Dict]:
+        """
+        Fetch stored vectors and metadata by ID.
+        
+        Args:
+            ids: List of vector IDs to fetch
+            namespace: Optional namespace
+        
+        Returns:
+            Dict mapping each existing ID to {"values": [...], "metadata": {...}}
+        """
+        with self._lock:
+            ns = self._namespaces.get(namespace)
+            if ns is None:
+                return {}
+            found = {}
+            for vector_id in ids:
+                row = ns.rows.get(vector_id)
+                if row is not None:
+                    found[vector_id] = {
+                        "values": ns.full_vector(row).tolist(),
+                        "metadata": dict(ns.metadata[row])
+                    }
+            return found
+    
+    def list_ids(self, namespace: str = "") -> List[str]:
+        """
+        List every vector ID in a namespace.
+        
+        Args:
+            namespace: Optional namespace
+        
+        Returns:
+            List of vector IDs
+        """
+        with self._lock:
+            ns = self._namespaces.get(namespace)
+            return list(ns.ids) if ns is not None else []
+    
+    def delete(
+        self,
+        ids: Optional[List[str]] = None,
+        delete_all: bool = False,
+        namespace: str = "",
+        filter: Optional[Dict] = None
+    ) -> Dict:
+        """
+        Delete vectors from the index.
+        
+        Args:
+            ids: List of vector IDs to delete
+            delete_all: Delete all vectors in namespace
+            namespace: Optional namespace
+            filter: Metadata filter for deletion
+        
+        Returns:
+            Empty dict, matching Pinecone's delete response
+        """
+        with self._lock:
+            ns = self._namespaces.get(namespace)
+            
+            if delete_all:
+                self._namespaces.pop(namespace, None)
+            elif filter:
+                if ns is not None:
+                    mask = self._filter_mask(ns, filter)
+                    ns.delete([ns.ids[row] for row in np.flatnonzero(mask)])
+            elif ids:
+                if ns is not None:
+                    ns.delete(ids)
+            else:
+                raise ValueError("Must provide ids, filter, or delete_all=True")
+            
+            self._mark_dirty(namespace)
+        
+        return {}
+    
+    def get_stats(self, namespace: str = "") -> Dict:
+        """
+        Get index statistics.
+        
+        Args:
+            namespace: Optional namespace
+        
+        Returns:
+            Index statistics in the same shape as Pinecone's describe_index_stats
+        """
+        with self._lock:
+            namespaces = {
+                name: {"vector_count": ns.count, "memory_bytes": ns.nbytes()}
+                for name, ns in self._namespaces.items()
+                if ns.count
+            }
+        return {
+            "dimension": self.dimension,
+            "precision": self.precision,
+            "index_fullness": 0.0,
+            "total_vector_count": sum(ns["vector_count"] for ns in namespaces.values()),
+            "namespaces": namespaces
+        }
+    
+    def warm_up(self) -> Dict:
+        """
+        Nothing to connect to; return stats for parity with VectorStore.
+        """
+        return self.get_stats()
+    
+    def close(self) -> None:
+        self.flush()
@@ -0,0 +1,294 @@
+import asyncio
+import logging
+import os
+import random
+import time
+from contextlib import asynccontextmanager
+from typing import Awaitable, Callable, Dict, TypeVar
+
+import httpx
+from openai import (
+    AsyncOpenAI,
+    APIConnectionError,
+    APITimeoutError,
+    InternalServerError,
+    RateLimitError
+)
+
+from app.config.openai import (
+    OPENAI_MAX_CONNECTIONS,
+    OPENAI_MAX_KEEPALIVE_CONNECTIONS,
+    OPENAI_KEEPALIVE_EXPIRY_SECONDS,
+    OPENAI_HTTP2,
+    OPENAI_TIMEOUTS,
+    OPENAI_MAX_CONCURRENCY,
+    OPENAI_MAX_STREAMS,
+    OPENAI_QUEUE_TIMEOUT_SECONDS,
+    OPENAI_MAX_RETRIES,
+    OPENAI_RETRY_BUDGET_RATIO,
+    OPENAI_RETRY_BUDGET_RESERVE,
+    OPENAI_RETRY_BACKOFF_SECONDS
+)
+from app.utils.metrics import OPENAI_RETRIES, Gauge, registry
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+RETRIES = OPENAI_RETRIES.labels("retried")
+RETRIES_DENIED = OPENAI_RETRIES.labels("denied")
+
+RETRYABLE_ERRORS = (RateLimitError, APIConnectionError, APITimeoutError, InternalServerError)
+
+client = None
+http_client = None
+# When the shared client last sent a request or got response headers back
+# (monotonic). httpx doesn't expose its pool, so connection reuse is
+# inferred from this instead.
+last_activity = None
+upstream_requests = 0
+
+
+async def _record_request(request: httpx.Request) -> None:
+    global last_activity, upstream_requests
+    last_activity = time.monotonic()
+    upstream_requests += 1
+
+
+async def _record_response(response: httpx.Response) -> None:
+    global last_activity
+    last_activity = time.monotonic()
+
+
+def get_openai_client() -> AsyncOpenAI:
+    """
+    Get or create the process-wide OpenAI client.
+    Lazy initialization to ensure env vars are loaded.
+    
+    All callers share one explicitly sized HTTP/2 keep-alive connection
+    pool. SDK retries are disabled; retries go through `budget` so
+    they count against the shared retry budget.
+    """
+    global client, http_client
+    if client is None:
+        api_key = os.getenv("OPENAI_API_KEY")
+        if not api_key:
+            raise ValueError("OPENAI_API_KEY not found in environment variables")
+        http_client = httpx.AsyncClient(
+            http2=OPENAI_HTTP2,
+            limits=httpx.Limits(
+                max_connections=OPENAI_MAX_CONNECTIONS,
+                max_keepalive_connections=OPENAI_MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=OPENAI_KEEPALIVE_EXPIRY_SECONDS
+            ),
+            timeout=openai_timeout("chat_stream"),
+            event_hooks={"request": [_record_request], "response": [_record_response]}
+        )
+        client = AsyncOpenAI(api_key=api_key, http_client=http_client, max_retries=0)
+    return client
+
+
+async def close_openai_client() -> None:
+    global client, http_client, last_activity
+    if client is not None:
+        await client.close()
+    client = None
+    http_client = None
+    last_activity = None
+
+
+def connection_warm() -> bool:
+    """
+    Whether the pool most likely holds an open connection: a request is
+    running, or the last one finished within the keep-alive expiry.
+    """
+    if budget.in_flight or stream_budget.in_flight:
+        return True
+    return last_activity is not None and time.monotonic() - last_activity < OPENAI_KEEPALIVE_EXPIRY_SECONDS
+
+
+async def prewarm_connection() -> None:
+    """
+    Open a connection to the API ahead of a request unless one is likely
+    open (see `connection_warm`), so the following call skips the TCP and
+    TLS handshakes. A busy connection counts: with HTTP/2 it is
+    multiplexed and takes the request just as well. The
+    unauthenticated HEAD is answered without touching any model. Failures
+    are logged and ignored; the real request will surface them.
+    """
+    try:
+        openai_client = get_openai_client()
+        if connection_warm():
+            return
+        await http_client.head(str(openai_client.base_url), timeout=openai_timeout("embedding"))
+    except Exception as e:
+        logger.debug(f"OpenAI connection prewarm failed: {str(e)}")
+
+
+def openai_timeout(operation: str) -> httpx.Timeout:
+    """
+    Timeout for an operation: "embedding", "chat_stream" or "title".
+    """
+    return httpx.Timeout(**OPENAI_TIMEOUTS[operation])
+
+
+class OpenAIBudget:
+    """
+    Process-wide admission control for OpenAI requests.
+    
+    A semaphore caps concurrent upstream requests so bursts queue locally
+    rather than turning into 429s. Retries draw from a token bucket that
+    every request tops up by OPENAI_RETRY_BUDGET_RATIO, so during an outage
+    retries stay a small fraction of traffic instead of multiplying it.
+    """
+    def __init__(
+        self,
+        max_concurrency: int = OPENAI_MAX_CONCURRENCY,
+        queue_timeout: float = OPENAI_QUEUE_TIMEOUT_SECONDS,
+        max_retries: int = OPENAI_MAX_RETRIES,
+        retry_ratio: float = OPENAI_RETRY_BUDGET_RATIO,
+        retry_reserve: float = OPENAI_RETRY_BUDGET_RESERVE
+    ):
+        self.max_concurrency = max_concurrency
+        self.queue_timeout = queue_timeout
+        self.max_retries = max_retries
+        self.retry_ratio = retry_ratio
+        self.retry_reserve = retry_reserve
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._retry_tokens = float(retry_reserve)
+        self.in_flight = 0
+        self.queued = 0
+        self.requests = 0
+        self.retries = 0
+        self.retries_denied = 0
+        self.queue_timeouts = 0
+    
+    @asynccontextmanager
+    async def slot(self):
+        """
+        Hold one upstream slot, e.g. for the whole life of a stream.
+        """
+        self.queued += 1
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), timeout=self.queue_timeout)
+        except asyncio.TimeoutError:
+            self.queue_timeouts += 1
+            raise
+        finally:
+            self.queued -= 1
+        
+        self.in_flight += 1
+        try:
+            yield
+        finally:
+            self.in_flight -= 1
+            self._semaphore.release()
+    
+    def _withdraw_retry(self) -> bool:
+        if self._retry_tokens >= 1:
+            self._retry_tokens -= 1
+            return True
+        self.retries_denied += 1
+        RETRIES_DENIED.inc()
+        return False
+    
+    @staticmethod
+    def _retry_delay(error: Exception, attempt: int) -> float:
+        response = getattr(error, "response", None)
+        retry_after = response.headers.get("retry-after") if response is not None else None
+        if retry_after:
+            try:
+                return min(float(retry_after), 10.0)
+            except ValueError:
+                pass
+        return OPENAI_RETRY_BACKOFF_SECONDS * (2 ** attempt) * (0.5 + random.random())
+    
+    async def with_retries(self, request: Callable[[AsyncOpenAI], Awaitable[T]]) -> T:
+        """
+        Run a request, retrying retryable errors while the budget allows.
+        Does not take a slot; see `call`.
+        """
+        openai_client = get_openai_client()
+        self.requests += 1
+        self._retry_tokens = min(
+            self._retry_tokens + self.retry_ratio,
+            self.retry_reserve + self.max_concurrency * self.retry_ratio
+        )
+        
+        for attempt in range(self.max_retries + 1):
+            try:
+                return await request(openai_client)
+            except RETRYABLE_ERRORS as e:
+                if attempt == self.max_retries or not self._withdraw_retry():
+                    raise
+                self.retries += 1
+                RETRIES.inc()
+                delay = self._retry_delay(e, attempt)
+                logger.warning(f"OpenAI request failed ({type(e).__name__}), retrying in {delay:.2f}s")
+                await asyncio.sleep(delay)
+    
+    async def call(self, request: Callable[[AsyncOpenAI], Awaitable[T]]) -> T:
+        """
+        Run a non-streaming request inside a slot with budgeted retries.
+        """
+        async with self.slot():
+            return await self.with_retries(request)
+    
+    def stats(self) -> Dict:
+        return {
+            "max_concurrency": self.max_concurrency,
+            "in_flight": self.in_flight,
+            "queued": self.queued,
+            "requests": self.requests,
+            "retries": self.retries,
+            "retries_denied": self.retries_denied,
+            "retry_tokens": round(self._retry_tokens, 2),
+            "queue_timeouts": self.queue_timeouts
+        }
+
+
+budget = OpenAIBudget()
+# Chat completion streams, which hold a slot for the whole answer
+stream_budget = OpenAIBudget(max_concurrency=OPENAI_MAX_STREAMS)
+
+registry.register(Gauge(
+    "faq_chatbot_openai_in_flight",
+    "OpenAI requests (other than chat streams) holding a concurrency slot.",
+    function=lambda: budget.in_flight
+))
+registry.register(Gauge(
+    "faq_chatbot_openai_queued",
+    "OpenAI requests (other than chat streams) waiting for a concurrency slot.",
+    function=lambda: budget.queued
+))
+registry.register(Gauge(
+    "faq_chatbot_openai_streams_in_flight",
+    "OpenAI chat streams holding a stream slot.",
+    function=lambda: stream_budget.in_flight
+))
+registry.register(Gauge(
+    "faq_chatbot_openai_streams_queued",
+    "OpenAI chat streams waiting for a stream slot.",
+    function=lambda: stream_budget.queued
+))
+
+
+def get_pool_stats() -> Dict:
+    """
+    Connection pool settings, activity and budget counters for the shared
+    client.
+    """
+    return {
+        "pool": {
+            "max_connections": OPENAI_MAX_CONNECTIONS,
+            "max_keepalive_connections": OPENAI_MAX_KEEPALIVE_CONNECTIONS,
+            "http2": OPENAI_HTTP2,
+            "requests": upstream_requests,
+            "seconds_since_activity": (
+                round(time.monotonic() - last_activity, 3) if last_activity is not None else None
+            ),
+            "warm": connection_warm()
+        },
+        "budget": budget.stats(),
+        "stream_budget": stream_budget.stats()
+    }
@@ -1,112 +1,84 @@
-from openai import AsyncOpenAI
-import os
 import logging
 from typing import AsyncGenerator, List, Dict
-from app.config.chat import HISTORY_MESSAGE_LIMIT
+from app.config.chat import CHAT_MODEL
+from app.services.openai_client import budget, openai_timeout, stream_budget
+from app.services.prompt_builder import build_messages
+from app.utils.metrics import CHAT_TOKENS
 
 logger = logging.getLogger(__name__)
 
-client = None
+PROMPT_TOKENS = CHAT_TOKENS.labels("prompt")
+COMPLETION_TOKENS = CHAT_TOKENS.labels("completion")
 
 
-def get_openai_client() -> AsyncOpenAI:
+class ChatResponseError(Exception):
     """
-    Get or create OpenAI client instance.
-    Lazy initialization to ensure env vars are loaded.
+    The chat completion could not be started or broke off; deltas already
+    yielded are still valid.
     """
-    global client
-    if client is None:
-        api_key = os.getenv("OPENAI_API_KEY")
-        if not api_key:
-            raise ValueError("OPENAI_API_KEY not found in environment variables")
-        client = AsyncOpenAI(api_key=api_key)
-    return client
 
 
 async def generate_chat_response(
     message: str,
     history: List[Dict[str, str]] = None,
     context: str = "",
-    model: str = "gpt-4o",
+    model: str = CHAT_MODEL,
     temperature: float = 0
 ) -> AsyncGenerator[str, None]:
     """
     Generate streaming chat response with conversation history for context.
     
+    History and context are fitted into the model's prompt token budget;
+    see `build_messages`.
+    
     Args:
         message: Current user message
         history: List of previous messages [{"role": "user|assistant", "content": "..."}]
         context: Additional context (e.g., from RAG)
         model: OpenAI model to use
         temperature: Response randomness (0-1)
-    """
-    client = get_openai_client()
     
-    system_prompt = """You are a helpful AI assistant specializing in fintech FAQs. 
-You provide accurate, concise, and friendly answers to questions about financial technology, 
-banking, payments, and related topics.
-
-You have access to the conversation history and should reference it when relevant. 
-If a user asks about something mentioned earlier in the conversation, acknowledge it and provide context-aware responses.
-
-CRITICAL: You MUST use actual newline characters in your response. Use \n\n (two newlines) for spacing between sections, paragraphs, and markdown elements.
-
-Format your responses using Markdown with proper line breaks:
-- Use ## for section headers with \n\n before and after
-- Use **bold** for emphasis
-- Use - or * for bullet lists with \n before each item
-- Use 1. 2. 3. for numbered lists with \n before each item
-- Use `code` for technical terms
-- Add \n\n (two newlines) between paragraphs
-- Add \n\n (two newlines) between sections
-- Add \n\n after closing code blocks ```
-- Keep paragraphs under 90 words
-
-Example structure:
-## Header
-
-Paragraph text here.
-
-Another paragraph here.
-
-- List item one
-- List item two
-
-Structure your answers clearly with proper \n\n spacing between all sections."""
-
-    if context:
-        system_prompt += f"\n\nRelevant context from knowledge base:\n{context}"
-
-    messages = [{"role": "system", "content": system_prompt}]
-    
-    if history:
-        messages.extend(history[-HISTORY_MESSAGE_LIMIT:])
-    
-    messages.append({"role": "user", "content": message})
+    Raises:
+        ChatResponseError: If the request or the stream fails
+    """
+    messages, prompt_tokens = build_messages(message, history, context, model)
+    logger.debug(f"Chat prompt: {len(messages)} messages, ~{prompt_tokens} tokens")
 
     try:
-        stream = await client.chat.completions.create(
-            model=model,
-            messages=messages,
-            temperature=temperature,
-            stream=True,
-        )
-
-        async for chunk in stream:
-            if chunk.choices and len(chunk.choices) > 0:
-                delta = chunk.choices[0].delta
-                if delta.content:
-                    yield delta.content
+        # The stream slot is held until the stream finishes; retries only
+        # cover opening the stream, never a partially delivered response.
+        async with stream_budget.slot():
+            stream = await stream_budget.with_retries(lambda client: client.chat.completions.create(
+                model=model,
+                messages=messages,
+                temperature=temperature,
+                stream=True,
+                # The last chunk then carries the token usage of the request
+                stream_options={"include_usage": True},
+                timeout=openai_timeout("chat_stream")
+            ))
+
+            try:
+                async for chunk in stream:
+                    if chunk.usage is not None:
+                        PROMPT_TOKENS.observe(chunk.usage.prompt_tokens)
+                        COMPLETION_TOKENS.observe(chunk.usage.completion_tokens)
+                    if chunk.choices and len(chunk.choices) > 0:
+                        delta = chunk.choices[0].delta
+                        if delta.content:
+                            yield delta.content
+            finally:
+                # Also runs when the consumer stops early (client gone):
+                # closing the HTTP stream ends the completion upstream
+                await stream.close()
 
     except Exception as e:
-        yield f"Error generating response: {str(e)}"
+        raise ChatResponseError(f"Error generating response: {str(e)}") from e
 
 
 async def generate_chat_title(message: str) -> str:
-    client = get_openai_client()
-    
     try:
-        response = await client.chat.completions.create(
+        response = await budget.call(lambda client: client.chat.completions.create(
             model="gpt-4o-mini",
             messages=[
                 {
@@ -119,8 +91,9 @@ async def generate_chat_title(message: str) -> str:
                 }
             ],
             temperature=0.7,
-            max_tokens=20
-        )
+            max_tokens=20,
+            timeout=openai_timeout("title")
+        ))
         
         title = response.choices[0].message.content.strip()
         
@@ -0,0 +1,186 @@
+import logging
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+from app.config.chat import (
+    PROMPT_TOKEN_BUDGETS,
+    DEFAULT_PROMPT_TOKEN_BUDGET,
+    PROMPT_TOKEN_BUDGET,
+    CONTEXT_TOKEN_SHARE,
+    HISTORY_RECENT_MESSAGES,
+    HISTORY_OLD_MESSAGE_MAX_TOKENS
+)
+
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+logger = logging.getLogger(__name__)
+
+# Static instructions, sent byte-identical as the first message of every
+# request so the provider can reuse its cached prompt prefix.
+SYSTEM_PROMPT = """You are a helpful AI assistant specializing in fintech FAQs. 
+You provide accurate, concise, and friendly answers to questions about financial technology, 
+banking, payments, and related topics.
+
+You have access to the conversation history and should reference it when relevant. 
+If a user asks about something mentioned earlier in the conversation, acknowledge it and provide context-aware responses.
+
+CRITICAL: You MUST use actual newline characters in your response. Use \n\n (two newlines) for spacing between sections, paragraphs, and markdown elements.
+
+Format your responses using Markdown with proper line breaks:
+- Use ## for section headers with \n\n before and after
+- Use **bold** for emphasis
+- Use - or * for bullet lists with \n before each item
+- Use 1. 2. 3. for numbered lists with \n before each item
+- Use `code` for technical terms
+- Add \n\n (two newlines) between paragraphs
+- Add \n\n (two newlines) between sections
+- Add \n\n after closing code blocks ```
+- Keep paragraphs under 90 words
+
+Example structure:
+## Header
+
+Paragraph text here.
+
+Another paragraph here.
+
+- List item one
+- List item two
+
+Structure your answers clearly with proper \n\n spacing between all sections."""
+
+CONTEXT_HEADER = "Relevant context from knowledge base:\n"
+TRUNCATION_MARKER = " [...]"
+
+# Tokens the chat format adds around each message
+MESSAGE_OVERHEAD_TOKENS = 4
+
+
+class Tokenizer:
+    """
+    Token counter for one model. Uses tiktoken when it is installed and
+    falls back to a four-characters-per-token estimate otherwise. Counts
+    are memoised, since the same history is re-sent on every turn.
+    """
+    def __init__(self, model: str):
+        self.encoding = None
+        if tiktoken is not None:
+            try:
+                try:
+                    self.encoding = tiktoken.encoding_for_model(model)
+                except KeyError:
+                    self.encoding = tiktoken.get_encoding("o200k_base")
+            except Exception as e:
+                # tiktoken downloads encodings on first use; offline hosts fall back
+                logger.warning(f"tiktoken encoding unavailable for {model}, estimating tokens: {str(e)}")
+        self._count = lru_cache(maxsize=4096)(self._count_uncached)
+    
+    def _count_uncached(self, text: str) -> int:
+        if self.encoding is not None:
+            return len(self.encoding.encode(text, disallowed_special=()))
+        return (len(text) + 3) // 4
+    
+    def count(self, text: str) -> int:
+        return self._count(text)
+    
+    def truncate(self, text: str, max_tokens: int) -> str:
+        """
+        Cut `text` to at most `max_tokens` tokens, marking the cut.
+        """
+        if self.count(text) <= max_tokens:
+            return text
+        keep = max(max_tokens - self.count(TRUNCATION_MARKER), 0)
+        if self.encoding is not None:
+            tokens = self.encoding.encode(text, disallowed_special=())
+            return self.encoding.decode(tokens[:keep]) + TRUNCATION_MARKER
+        return text[:keep * 4] + TRUNCATION_MARKER
+
+
+@lru_cache(maxsize=None)
+def get_tokenizer(model: str) -> Tokenizer:
+    return Tokenizer(model)
+
+
+def get_token_budget(model: str) -> int:
+    if PROMPT_TOKEN_BUDGET > 0:
+        return PROMPT_TOKEN_BUDGET
+    return PROMPT_TOKEN_BUDGETS.get(model, DEFAULT_PROMPT_TOKEN_BUDGET)
+
+
+def build_messages(
+    message: str,
+    history: Optional[List[Dict[str, str]]],
+    context: str,
+    model: str,
+    budget: Optional[int] = None
+) -> Tuple[List[Dict[str, str]], int]:
+    """
+    Assemble chat messages that fit the model's prompt token budget.
+    
+    Message order is system prompt, history, FAQ context, new message:
+    the static system prompt and earlier turns stay a stable prefix from
+    one turn to the next, while the per-turn context sits at the end.
+    The new message and system prompt are always sent; context gets up to
+    CONTEXT_TOKEN_SHARE of the budget, and history fills what remains
+    from the most recent turn backwards.
+    
+    Args:
+        message: Current user message
+        history: Previous messages, oldest first
+        context: FAQ context for this turn
+        model: Chat model the prompt is for
+        budget: Token budget; defaults to the model's configured budget
+        
+    Returns:
+        Tuple of (messages, estimated prompt tokens)
+    """
+    tokenizer = get_tokenizer(model)
+    budget = budget or get_token_budget(model)
+    
+    def cost(text: str) -> int:
+        return tokenizer.count(text) + MESSAGE_OVERHEAD_TOKENS
+    
+    system_message = {"role": "system", "content": SYSTEM_PROMPT}
+    used = cost(SYSTEM_PROMPT)
+    
+    # A pasted wall of text can't crowd out everything else
+    user_message = {"role": "user", "content": tokenizer.truncate(message, budget // 2)}
+    used += cost(user_message["content"])
+    
+    context_message = None
+    if context:
+        context_budget = min(int(budget * CONTEXT_TOKEN_SHARE), budget - used) - MESSAGE_OVERHEAD_TOKENS
+        if context_budget > 0:
+            content = CONTEXT_HEADER + tokenizer.truncate(context, context_budget - tokenizer.count(CONTEXT_HEADER))
+            context_message = {"role": "system", "content": content}
+            used += cost(content)
+    
+    kept = []
+    for age, turn in enumerate(reversed(history or [])):
+        content = turn.get("content") or ""
+        if age >= HISTORY_RECENT_MESSAGES:
+            content = tokenizer.truncate(content, HISTORY_OLD_MESSAGE_MAX_TOKENS)
+        remaining = budget - used - MESSAGE_OVERHEAD_TOKENS
+        if tokenizer.count(content) > remaining:
+            # Keep the start of the turn that straddles the budget, then stop
+            if remaining >= 32:
+                content = tokenizer.truncate(content, remaining)
+                kept.append({"role": turn["role"], "content": content})
+                used += cost(content)
+            break
+        kept.append({"role": turn["role"], "content": content})
+        used += cost(content)
+    kept.reverse()
+    
+    messages = [system_message, *kept]
+    if context_message is not None:
+        messages.append(context_message)
+    messages.append(user_message)
+    
+    if history and len(kept) < len(history):
+        logger.debug(f"Prompt budget {budget}: kept {len(kept)} of {len(history)} history messages")
+    
+    return messages, used
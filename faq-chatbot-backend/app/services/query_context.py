@@ -0,0 +1,69 @@
+import re
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+
+_WORD_RE = re.compile(r"[a-z0-9']+")
+
+# Words that usually point back at something said earlier
+_REFERENCES = frozenset(
+    "it its it's that that's this these those they them their there then "
+    "one ones same also too else instead".split()
+)
+
+_FOLLOW_UP_OPENERS = ("and ", "but ", "so ", "what about", "how about", "what if", "then ")
+
+# Messages this short rarely carry a topic of their own ("how long?")
+_SHORT_MESSAGE_WORDS = 4
+
+
+def is_follow_up(message: str) -> bool:
+    """
+    Cheap local check for a message that depends on earlier turns.
+    """
+    text = message.strip().lower()
+    words = _WORD_RE.findall(text)
+    if len(words) <= _SHORT_MESSAGE_WORDS:
+        return True
+    if text.startswith(_FOLLOW_UP_OPENERS):
+        return True
+    return any(word in _REFERENCES for word in words)
+
+
+def previous_user_turns(history: Sequence[Dict[str, str]], turns: int) -> List[str]:
+    """
+    The last `turns` user messages of `history`, most recent first.
+    """
+    messages = []
+    for message in reversed(history):
+        content = (message.get("content") or "").strip()
+        if message.get("role") == "user" and content:
+            messages.append(content)
+            if len(messages) == turns:
+                break
+    return messages
+
+
+def history_weights(turns: int, weight: float, decay: float) -> List[float]:
+    return [weight * decay ** i for i in range(turns)]
+
+
+def blend_embeddings(current: List[float], previous: List[Tuple[List[float], float]]) -> List[float]:
+    """
+    Weighted sum of the current embedding and previous-turn embeddings,
+    scaled back to unit length for cosine search.
+    
+    Args:
+        current: Embedding of the new message (weight 1)
+        previous: (embedding, weight) pairs for earlier turns
+        
+    Returns:
+        Blended unit-length vector
+    """
+    blended = np.array(current, dtype=np.float32)
+    for vector, weight in previous:
+        blended += weight * np.asarray(vector, dtype=np.float32)
+    norm = float(np.linalg.norm(blended))
+    if norm:
+        blended /= norm
+    return blended.tolist()
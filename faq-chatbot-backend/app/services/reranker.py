@@ -0,0 +1,107 @@
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Dict, FrozenSet, List, Optional, Tuple
+
+from app.config.chat import RERANK_TIMEOUT_MS, RERANK_WEIGHTS
+from app.models.faq import FAQ, FAQSearchResult
+from app.services.lexical_index import normalise_phrase, tokenize
+
+logger = logging.getLogger(__name__)
+
+
+@lru_cache(maxsize=4096)
+def _faq_terms(
+    question: str,
+    answer: str,
+    keywords: Tuple[str, ...],
+    category: str
+) -> Tuple[FrozenSet[str], FrozenSet[str], Tuple[str, ...], FrozenSet[str]]:
+    return (
+        frozenset(tokenize(question)),
+        frozenset(tokenize(answer)),
+        tuple(phrase for phrase in (normalise_phrase(keyword) for keyword in keywords) if phrase),
+        frozenset(tokenize(category))
+    )
+
+
+class FeatureReranker:
+    """
+    Re-orders first-stage candidates with a linear score over cheap
+    features: the first-stage score, whole keyword phrases found in the
+    query, query-term overlap with the question and answer, and a prior
+    for queries that name the FAQ's category.
+    
+    Scoring runs on a small thread pool under a per-request time budget;
+    when the budget runs out the candidates are returned in their original
+    order. Result scores are left as the first-stage scores, so min_score
+    and the relevance shown to the model keep their meaning.
+    """
+    def __init__(
+        self,
+        weights: Optional[Dict[str, float]] = None,
+        timeout_ms: float = RERANK_TIMEOUT_MS,
+        max_workers: int = 2
+    ):
+        self.weights = weights or dict(RERANK_WEIGHTS)
+        self.timeout = timeout_ms / 1000
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="reranker")
+        self.reranked = 0
+        self.timeouts = 0
+    
+    def features(self, query: str, faq: FAQ) -> Dict[str, float]:
+        query_terms = set(tokenize(query))
+        if not query_terms:
+            return dict.fromkeys(self.weights, 0.0)
+        question_terms, answer_terms, phrases, category_terms = _faq_terms(
+            faq.question, faq.answer, tuple(faq.keywords), faq.category
+        )
+        padded_query = f" {normalise_phrase(query)} "
+        return {
+            "keyword": 1.0 if any(f" {phrase} " in padded_query for phrase in phrases) else 0.0,
+            "question_overlap": len(query_terms & question_terms) / len(query_terms),
+            "answer_overlap": len(query_terms & answer_terms) / len(query_terms),
+            "category": 1.0 if query_terms & category_terms else 0.0,
+        }
+    
+    def score(self, query: str, result: FAQSearchResult) -> float:
+        features = self.features(query, result.faq)
+        return result.score + sum(self.weights.get(name, 0.0) * value for name, value in features.items())
+    
+    def rerank_sync(self, query: str, candidates: List[FAQSearchResult]) -> List[FAQSearchResult]:
+        scores = [self.score(query, candidate) for candidate in candidates]
+        order = sorted(range(len(candidates)), key=lambda i: scores[i], reverse=True)
+        return [candidates[i] for i in order]
+    
+    async def rerank(self, query: str, candidates: List[FAQSearchResult]) -> List[FAQSearchResult]:
+        """
+        Re-rank candidates within the time budget.
+        
+        Args:
+            query: Text the candidates were retrieved for
+            candidates: First-stage results, best first
+            
+        Returns:
+            Candidates in re-ranked order, or unchanged if over budget
+        """
+        if len(candidates) < 2:
+            return candidates
+        loop = asyncio.get_running_loop()
+        try:
+            reranked = await asyncio.wait_for(
+                loop.run_in_executor(self._executor, self.rerank_sync, query, candidates),
+                timeout=self.timeout
+            )
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            logger.warning(f"Re-ranking exceeded {self.timeout * 1000:.0f}ms; using first-stage order")
+            return candidates
+        self.reranked += 1
+        return reranked
+    
+    def stats(self) -> Dict:
+        return {"reranked": self.reranked, "timeouts": self.timeouts}
+    
+    def close(self) -> None:
+        self._executor.shutdown(wait=False)
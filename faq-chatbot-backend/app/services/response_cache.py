@@ -0,0 +1,156 @@
+import re
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from itertools import count
+from typing import AsyncGenerator, Dict, FrozenSet, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+
+from app.config.chat import (
+    RESPONSE_CACHE_SIMILARITY_THRESHOLD,
+    RESPONSE_CACHE_MAX_ENTRIES,
+    RESPONSE_CACHE_TTL_SECONDS
+)
+
+GroupKey = Tuple[str, FrozenSet[str]]
+
+
+@dataclass
+class _CachedResponse:
+    group: GroupKey
+    vector: np.ndarray
+    response: str
+    expires_at: float
+
+
+class SemanticResponseCache:
+    """
+    Cache of complete chat answers keyed on the query embedding.
+    
+    An entry is only reused when the new query retrieved exactly the same
+    FAQ ids with the same model and its embedding is within the cosine
+    similarity threshold of the cached query. Entries are evicted LRU, by
+    TTL, and whenever one of their FAQs is upserted or deleted.
+    """
+    def __init__(
+        self,
+        threshold: float = RESPONSE_CACHE_SIMILARITY_THRESHOLD,
+        max_entries: int = RESPONSE_CACHE_MAX_ENTRIES,
+        ttl: float = RESPONSE_CACHE_TTL_SECONDS
+    ):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._ids = count()
+        self._entries: "OrderedDict[int, _CachedResponse]" = OrderedDict()
+        self._groups: Dict[GroupKey, Set[int]] = {}
+        self._groups_by_faq: Dict[str, Set[GroupKey]] = {}
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+    
+    @staticmethod
+    def _normalise(embedding: List[float]) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+    
+    def _remove(self, entry_id: int) -> None:
+        entry = self._entries.pop(entry_id, None)
+        if entry is None:
+            return
+        members = self._groups.get(entry.group)
+        if members is not None:
+            members.discard(entry_id)
+            if not members:
+                del self._groups[entry.group]
+                for faq_id in entry.group[1]:
+                    groups = self._groups_by_faq.get(faq_id)
+                    if groups is not None:
+                        groups.discard(entry.group)
+                        if not groups:
+                            del self._groups_by_faq[faq_id]
+    
+    def lookup(self, embedding: List[float], faq_ids: Iterable[str], model: str) -> Optional[str]:
+        """
+        Return a cached answer for a near-duplicate query, or None.
+        """
+        group = (model, frozenset(faq_ids))
+        members = self._groups.get(group)
+        if not members:
+            self.misses += 1
+            return None
+        
+        now = time.monotonic()
+        for entry_id in [i for i in members if self._entries[i].expires_at <= now]:
+            self._remove(entry_id)
+        
+        candidates = list(self._groups.get(group, ()))
+        if not candidates:
+            self.misses += 1
+            return None
+        
+        query = self._normalise(embedding)
+        scores = np.stack([self._entries[i].vector for i in candidates]) @ query
+        best = int(np.argmax(scores))
+        if scores[best] < self.threshold:
+            self.misses += 1
+            return None
+        
+        entry_id = candidates[best]
+        self._entries.move_to_end(entry_id)
+        self.hits += 1
+        return self._entries[entry_id].response
+    
+    def store(self, embedding: List[float], faq_ids: Iterable[str], model: str, response: str) -> None:
+        group = (model, frozenset(faq_ids))
+        entry_id = next(self._ids)
+        self._entries[entry_id] = _CachedResponse(
+            group=group,
+            vector=self._normalise(embedding),
+            response=response,
+            expires_at=time.monotonic() + self.ttl
+        )
+        self._groups.setdefault(group, set()).add(entry_id)
+        for faq_id in group[1]:
+            self._groups_by_faq.setdefault(faq_id, set()).add(group)
+        
+        while len(self._entries) > self.max_entries:
+            self._remove(next(iter(self._entries)))
+    
+    def invalidate(self, faq_ids: Iterable[str]) -> None:
+        """
+        Drop every cached answer that was grounded on any of the given FAQs.
+        """
+        for faq_id in faq_ids:
+            for group in list(self._groups_by_faq.get(faq_id, ())):
+                for entry_id in list(self._groups.get(group, ())):
+                    self._remove(entry_id)
+                    self.invalidations += 1
+    
+    def clear(self) -> None:
+        self.invalidations += len(self._entries)
+        self._entries.clear()
+        self._groups.clear()
+        self._groups_by_faq.clear()
+    
+    def stats(self) -> Dict:
+        return {
+            "size": len(self._entries),
+            "max_entries": self.max_entries,
+            "threshold": self.threshold,
+            "hits": self.hits,
+            "misses": self.misses,
+            "invalidations": self.invalidations
+        }
+
+
+async def replay_response(response: str, words_per_chunk: int = 4) -> AsyncGenerator[str, None]:
+    """
+    Split a cached answer into small token-like chunks so a replay streams
+    the same way a live completion does.
+    """
+    pieces = re.findall(r"\S+\s*|\s+", response)
+    for i in range(0, len(pieces), words_per_chunk):
+        yield "".join(pieces[i:i + words_per_chunk])
@@ -0,0 +1,387 @@
+import json
+import os
+import shutil
+import tempfile
+import time
+import uuid
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from urllib.parse import unquote
+
+import numpy as np
+
+from app.config.vector_store import KB_SNAPSHOT_PATH
+from app.services.category_router import partition_namespace
+from app.services.local_vector_store import VectorMatch, matches_filter
+
+# Bump when the on-disk layout changes; readers refuse other versions.
+SNAPSHOT_FORMAT = 1
+
+MANIFEST_FILE = "manifest.json"
+VECTORS_FILE = "vectors.npy"
+STRINGS_FILE = "metadata.bin"
+OFFSETS_FILE = "metadata_offsets.npy"
+CATEGORIES_FILE = "categories.npy"
+
+# String columns of metadata.bin, stored one after another; keywords are
+# JSON-encoded lists. Categories are dictionary-encoded in categories.npy.
+STRING_COLUMNS = ("id", "question", "answer", "keywords", "content_hash", "created_at", "updated_at")
+COLUMN_INDEX = {column: index for index, column in enumerate(STRING_COLUMNS)}
+
+
+def _column_value(column: str, faq_id: str, metadata: Dict[str, Any]) -> str:
+    if column == "id":
+        return faq_id
+    if column == "keywords":
+        return json.dumps(metadata.get("keywords", []), ensure_ascii=False)
+    return metadata.get(column) or ""
+
+
+def new_snapshot_id() -> str:
+    return f"{time.strftime('%Y%m%dT%H%M%SZ', time.gmtime())}-{uuid.uuid4().hex[:8]}"
+
+
+def write_snapshot(
+    path: str,
+    records: Iterable[Tuple[str, List[float], Dict[str, Any]]],
+    embedding_model: str,
+    dimension: int,
+    namespace: str
+) -> Dict:
+    """
+    Write a knowledge base snapshot directory.
+    
+    The snapshot is assembled in a temporary sibling directory and renamed
+    into place, so readers never see a partial snapshot.
+    
+    Args:
+        path: Directory to create; must not exist yet
+        records: (id, vector, metadata) tuples, metadata including the answer
+        embedding_model: Model the vectors were produced with
+        dimension: Vector dimension
+        namespace: Namespace the FAQs were exported from
+    
+    Returns:
+        The snapshot manifest
+    """
+    records = list(records)
+    if not records:
+        raise ValueError("Cannot write an empty snapshot")
+    if os.path.exists(path):
+        raise FileExistsError(f"Snapshot path already exists: {path}")
+    parent = os.path.dirname(os.path.abspath(path))
+    os.makedirs(parent, exist_ok=True)
+    tmp = tempfile.mkdtemp(prefix=".snapshot-", dir=parent)
+    
+    try:
+        categories = sorted({metadata.get("category", "") for _, _, metadata in records})
+        if len(categories) > np.iinfo(np.uint16).max:
+            raise ValueError("Too many categories for a snapshot")
+        category_codes = {category: code for code, category in enumerate(categories)}
+        
+        vectors = np.lib.format.open_memmap(
+            os.path.join(tmp, VECTORS_FILE),
+            mode="w+",
+            dtype=np.float32,
+            shape=(len(records), dimension)
+        )
+        codes = np.empty(len(records), dtype=np.uint16)
+        for row, (_, values, metadata) in enumerate(records):
+            vector = np.asarray(values, dtype=np.float32)
+            norm = np.linalg.norm(vector)
+            vectors[row] = vector / norm if norm else vector
+            codes[row] = category_codes[metadata.get("category", "")]
+        vectors.flush()
+        del vectors
+        np.save(os.path.join(tmp, CATEGORIES_FILE), codes)
+        
+        offsets = np.zeros((len(STRING_COLUMNS), len(records) + 1), dtype=np.int64)
+        position = 0
+        with open(os.path.join(tmp, STRINGS_FILE), "wb") as f:
+            for index, column in enumerate(STRING_COLUMNS):
+                offsets[index, 0] = position
+                for row, (faq_id, _, metadata) in enumerate(records):
+                    data = _column_value(column, faq_id, metadata).encode("utf-8")
+                    f.write(data)
+                    position += len(data)
+                    offsets[index, row + 1] = position
+        np.save(os.path.join(tmp, OFFSETS_FILE), offsets)
+        
+        manifest = {
+            "format": SNAPSHOT_FORMAT,
+            "snapshot_id": os.path.basename(os.path.normpath(path)),
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "embedding_model": embedding_model,
+            "dimension": dimension,
+            "namespace": namespace,
+            "count": len(records),
+            "categories": categories,
+            "columns": list(STRING_COLUMNS)
+        }
+        with open(os.path.join(tmp, MANIFEST_FILE), "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=2)
+        
+        os.rename(tmp, path)
+    except BaseException:
+        shutil.rmtree(tmp, ignore_errors=True)
+        raise
+    return manifest
+
+
+def publish_snapshot(snapshot_path: str, link_path: str) -> None:
+    """
+    Atomically point `link_path` (a symlink) at a snapshot directory.
+    Workers watching the link pick the new snapshot up on their next poll.
+    """
+    target = os.path.relpath(os.path.abspath(snapshot_path), os.path.dirname(os.path.abspath(link_path)))
+    tmp_link = f"{link_path}.{uuid.uuid4().hex[:8]}.tmp"
+    os.symlink(target, tmp_link)
+    os.replace(tmp_link, link_path)
+
+
+class Snapshot:
+    """
+    Read-only view of a snapshot directory.
+    
+    Vectors, string offsets and category codes are memory-mapped, so
+    opening a snapshot reads only the manifest, and every worker on the
+    host shares the same page-cache pages. Strings are decoded per row on
+    access; the id-to-row map is built on first lookup by id.
+    """
+    def __init__(self, path: str):
+        self.path = os.path.realpath(path)
+        with open(os.path.join(self.path, MANIFEST_FILE), "r", encoding="utf-8") as f:
+            self.manifest = json.load(f)
+        if self.manifest.get("format") != SNAPSHOT_FORMAT:
+            raise ValueError(
+                f"Unsupported snapshot format {self.manifest.get('format')} in {self.path}"
+            )
+        
+        self.vectors = np.load(os.path.join(self.path, VECTORS_FILE), mmap_mode="r")
+        self.offsets = np.load(os.path.join(self.path, OFFSETS_FILE), mmap_mode="r")
+        self.category_codes = np.load(os.path.join(self.path, CATEGORIES_FILE), mmap_mode="r")
+        strings_file = os.path.join(self.path, STRINGS_FILE)
+        # np.memmap can't map an empty file
+        if os.path.getsize(strings_file):
+            self.strings = np.memmap(strings_file, dtype=np.uint8, mode="r")
+        else:
+            self.strings = np.empty(0, dtype=np.uint8)
+        self.categories: List[str] = self.manifest["categories"]
+        self._rows: Optional[Dict[str, int]] = None
+        self._category_rows: Dict[str, np.ndarray] = {}
+    
+    @property
+    def snapshot_id(self) -> str:
+        return self.manifest["snapshot_id"]
+    
+    @property
+    def embedding_model(self) -> str:
+        return self.manifest["embedding_model"]
+    
+    @property
+    def namespace(self) -> str:
+        return self.manifest["namespace"]
+    
+    @property
+    def count(self) -> int:
+        return self.manifest["count"]
+    
+    def string(self, column: str, row: int) -> str:
+        index = COLUMN_INDEX[column]
+        start, end = self.offsets[index, row], self.offsets[index, row + 1]
+        return self.strings[start:end].tobytes().decode("utf-8")
+    
+    def category(self, row: int) -> str:
+        return self.categories[self.category_codes[row]]
+    
+    def metadata(self, row: int) -> Dict[str, Any]:
+        return {
+            "question": self.string("question", row),
+            "answer": self.string("answer", row),
+            "category": self.category(row),
+            "keywords": json.loads(self.string("keywords", row)),
+            "content_hash": self.string("content_hash", row),
+            "created_at": self.string("created_at", row) or None,
+            "updated_at": self.string("updated_at", row) or None
+        }
+    
+    @property
+    def rows(self) -> Dict[str, int]:
+        if self._rows is None:
+            self._rows = {self.string("id", row): row for row in range(self.count)}
+        return self._rows
+    
+    def category_rows(self, category: str) -> np.ndarray:
+        rows = self._category_rows.get(category)
+        if rows is None:
+            try:
+                code = self.categories.index(category)
+            except ValueError:
+                rows = np.empty(0, dtype=np.int64)
+            else:
+                rows = np.flatnonzero(np.asarray(self.category_codes) == code)
+            self._category_rows[category] = rows
+        return rows
+
+
+class SnapshotVectorStore:
+    """
+    Vector store interface over a memory-mapped snapshot, for serving
+    searches without Pinecone. The snapshot's namespace holds every FAQ
+    and each category partition namespace (see `partition_namespace`)
+    resolves to that category's rows. Writes are rejected.
+    """
+    def __init__(self, path: str = KB_SNAPSHOT_PATH, dimension: int = 1536, metric: str = "cosine"):
+        if metric != "cosine":
+            raise ValueError("SnapshotVectorStore only supports the cosine metric")
+        self.snapshot = Snapshot(path)
+        self.dimension = dimension
+        self.metric = metric
+        if self.snapshot.manifest["dimension"] != dimension:
+            raise ValueError(
+                f"Snapshot has dimension {self.snapshot.manifest['dimension']}, expected {dimension}"
+            )
+        self._partition_prefix = partition_namespace(self.snapshot.namespace, "")
+    
+    def _namespace_rows(self, namespace: str) -> Optional[np.ndarray]:
+        """
+        Rows of a namespace; None means every row.
+        """
+        if namespace == self.snapshot.namespace:
+            return None
+        if namespace.startswith(self._partition_prefix):
+            return self.snapshot.category_rows(unquote(namespace[len(self._partition_prefix):]))
+        return np.empty(0, dtype=np.int64)
+    
+    def _rows(self, namespace: str, filter: Optional[Dict]) -> Optional[np.ndarray]:
+        rows = self._namespace_rows(namespace)
+        if not filter:
+            return rows
+        if set(filter) == {"category"} and isinstance(filter["category"], str):
+            category_rows = self.snapshot.category_rows(filter["category"])
+            return category_rows if rows is None else np.intersect1d(rows, category_rows)
+        candidates = range(self.snapshot.count) if rows is None else rows
+        return np.array(
+            [row for row in candidates if matches_filter(self.snapshot.metadata(row), filter)],
+            dtype=np.int64
+        )
+    
+    def upsert(self, vectors: List[tuple], namespace: str = "") -> Dict:
+        raise ValueError("The snapshot index is read-only; publish a new snapshot instead")
+    
+    def delete(
+        self,
+        ids: Optional[List[str]] = None,
+        delete_all: bool = False,
+        namespace: str = "",
+        filter: Optional[Dict] = None
+    ) -> Dict:
+        raise ValueError("The snapshot index is read-only; publish a new snapshot instead")
+    
+    def search(
+        self,
+        query_vector: List[float],
+        top_k: int = 5,
+        filter: Optional[Dict] = None,
+        namespace: str = "",
+        include_metadata: bool = True
+    ) -> List[VectorMatch]:
+        """
+        Search for similar vectors.
+        
+        Args:
+            query_vector: Query embedding vector
+            top_k: Number of results to return
+            filter: Metadata filter (e.g., {"category": "payments"})
+            namespace: Snapshot namespace or one of its partitions
+            include_metadata: Whether to include metadata in results
+        
+        Returns:
+            List of matches ordered by descending cosine similarity
+        """
+        query = np.asarray(query_vector, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        if norm:
+            query = query / norm
+        
+        rows = self._rows(namespace, filter)
+        if rows is None:
+            scores = self.snapshot.vectors @ query
+            rows = np.arange(self.snapshot.count)
+        else:
+            scores = self.snapshot.vectors[rows] @ query
+        
+        k = min(top_k, len(rows))
+        if k <= 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k] if k < len(rows) else np.arange(len(rows))
+        top = top[np.argsort(-scores[top], kind="stable")]
+        
+        return [
+            VectorMatch(
+                id=self.snapshot.string("id", int(rows[i])),
+                score=float(scores[i]),
+                metadata=self.snapshot.metadata(int(rows[i])) if include_metadata else None
+            )
+            for i in top
+        ]
+    
+    def fetch(self, ids: List[str], namespace: str = "") -> Dict[str, Dict]:
+        """
+        Fetch stored vectors and metadata by ID.
+        
+        Args:
+            ids: List of vector IDs to fetch
+            namespace: Snapshot namespace or one of its partitions
+        
+        Returns:
+            Dict mapping each existing ID to {"values": [...], "metadata": {...}}
+        """
+        allowed = self._namespace_rows(namespace)
+        allowed = None if allowed is None else set(allowed.tolist())
+        found = {}
+        for vector_id in ids:
+            row = self.snapshot.rows.get(vector_id)
+            if row is not None and (allowed is None or row in allowed):
+                found[vector_id] = {
+                    "values": self.snapshot.vectors[row].tolist(),
+                    "metadata": self.snapshot.metadata(row)
+                }
+        return found
+    
+    def list_ids(self, namespace: str = "") -> List[str]:
+        rows = self._namespace_rows(namespace)
+        rows = range(self.snapshot.count) if rows is None else rows
+        return [self.snapshot.string("id", int(row)) for row in rows]
+    
+    def get_stats(self, namespace: str = "") -> Dict:
+        """
+        Index statistics in the same shape as Pinecone's describe_index_stats,
+        with the partitions listed as namespaces.
+        """
+        namespaces = {}
+        if self.snapshot.count:
+            namespaces[self.snapshot.namespace] = {"vector_count": self.snapshot.count}
+        counts = np.bincount(np.asarray(self.snapshot.category_codes), minlength=len(self.snapshot.categories))
+        for category, count in zip(self.snapshot.categories, counts):
+            if count:
+                namespaces[partition_namespace(self.snapshot.namespace, category)] = {"vector_count": int(count)}
+        return {
+            "dimension": self.dimension,
+            "index_fullness": 0.0,
+            "total_vector_count": self.snapshot.count,
+            "namespaces": namespaces,
+            "snapshot_id": self.snapshot.snapshot_id
+        }
+    
+    def warm_up(self) -> Dict:
+        """
+        Nothing to connect to; return stats for parity with VectorStore.
+        """
+        return self.get_stats()
+    
+    def flush(self) -> None:
+        pass
+    
+    def close(self) -> None:
+        # The mapped files are released once the last array view is dropped
+        pass
@@ -1,7 +1,14 @@
 from pinecone import Pinecone, ServerlessSpec
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+import asyncio
 import os
-from typing import List, Dict, Optional
+from typing import Any, Callable, List, Dict, Optional
 import time
+from app.config.vector_store import VECTOR_STORE_MAX_CONCURRENCY, VECTOR_STORE_BACKEND
+from app.utils.metrics import STAGE_SECONDS
+
+VECTOR_SEARCH_SECONDS = STAGE_SECONDS.labels("vector_search")
 
 
 class VectorStore:
@@ -42,6 +49,32 @@ class VectorStore:
             
             while not self.pc.describe_index(self.index_name).status['ready']:
                 time.sleep(1)
+        else:
+            existing_dimension = self.pc.describe_index(self.index_name).dimension
+            if existing_dimension != self.dimension:
+                raise ValueError(
+                    f"Pinecone index {self.index_name} has dimension {existing_dimension}, "
+                    f"but the embedding backend produces {self.dimension}; "
+                    "use another PINECONE_INDEX_NAME or recreate the index"
+                )
+    
+    def warm_up(self) -> Dict:
+        """
+        Issue a cheap probe against the index so the connection pool is
+        established before the first user request arrives.
+        
+        Returns:
+            Index statistics returned by the probe
+        """
+        return self.get_stats()
+    
+    def flush(self) -> None:
+        """
+        Pinecone writes are durable once acknowledged; nothing to flush.
+        """
+    
+    def close(self) -> None:
+        pass
     
     def upsert(
         self,
@@ -101,6 +134,45 @@ class VectorStore:
         except Exception as e:
             raise Exception(f"Failed to search vectors: {str(e)}")
     
+    def fetch(
+        self,
+        ids: List[str],
+        namespace: str = ""
+    ) -> Dict[str, Dict]:
+        """
+        Fetch stored vectors and metadata by ID.
+        
+        Args:
+            ids: List of vector IDs to fetch
+            namespace: Optional namespace
+            
+        Returns:
+            Dict mapping each existing ID to {"values": [...], "metadata": {...}}
+        """
+        try:
+            response = self.index.fetch(ids=ids, namespace=namespace)
+            return {
+                vector_id: {"values": vector.values, "metadata": vector.metadata or {}}
+                for vector_id, vector in response.vectors.items()
+            }
+        except Exception as e:
+            raise Exception(f"Failed to fetch vectors: {str(e)}")
+    
+    def list_ids(self, namespace: str = "") -> List[str]:
+        """
+        List every vector ID in a namespace.
+        
+        Args:
+            namespace: Optional namespace
+            
+        Returns:
+            List of vector IDs
+        """
+        try:
+            return [vector_id for page in self.index.list(namespace=namespace) for vector_id in page]
+        except Exception as e:
+            raise Exception(f"Failed to list vectors: {str(e)}")
+    
     def delete(
         self,
         ids: Optional[List[str]] = None,
@@ -149,3 +221,114 @@ class VectorStore:
             return stats
         except Exception as e:
             raise Exception(f"Failed to get stats: {str(e)}")
+
+
+def create_vector_store(backend: Optional[str] = None, dimension: int = 1536):
+    """
+    Build the vector store backend selected by VECTOR_STORE_BACKEND.
+    
+    Args:
+        backend: "pinecone", "local" or "snapshot"; defaults to the configured backend
+        dimension: Embedding dimension of the index
+        
+    Returns:
+        A VectorStore, LocalVectorStore or SnapshotVectorStore instance
+    """
+    backend = (backend or VECTOR_STORE_BACKEND).lower()
+    
+    if backend == "pinecone":
+        return VectorStore(dimension=dimension)
+    if backend == "local":
+        from app.services.local_vector_store import LocalVectorStore
+        return LocalVectorStore(dimension=dimension)
+    
+    if backend == "snapshot":
+        from app.services.snapshot import SnapshotVectorStore
+        return SnapshotVectorStore(dimension=dimension)
+    
+    raise ValueError(f"Unknown vector store backend: {backend}")
+
+
+class AsyncVectorStore:
+    """
+    Async interface over a synchronous vector store.
+    
+    Every call runs on a dedicated, bounded thread pool so a slow network
+    round trip never blocks the event loop. A semaphore caps in-flight calls
+    at the pool size; excess callers wait on the loop instead of queueing
+    unboundedly inside the executor.
+    """
+    def __init__(self, store, max_concurrency: int = VECTOR_STORE_MAX_CONCURRENCY):
+        self.store = store
+        self.max_concurrency = max_concurrency
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_concurrency,
+            thread_name_prefix="vector-store"
+        )
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+    
+    async def _run(self, func: Callable, *args, **kwargs) -> Any:
+        async with self._semaphore:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, partial(func, *args, **kwargs))
+    
+    async def upsert(self, vectors: List[tuple], namespace: str = "") -> Dict:
+        return await self._run(self.store.upsert, vectors=vectors, namespace=namespace)
+    
+    async def search(
+        self,
+        query_vector: List[float],
+        top_k: int = 5,
+        filter: Optional[Dict] = None,
+        namespace: str = "",
+        include_metadata: bool = True
+    ) -> List[Dict]:
+        start = time.perf_counter()
+        try:
+            return await self._run(
+                self.store.search,
+                query_vector=query_vector,
+                top_k=top_k,
+                filter=filter,
+                namespace=namespace,
+                include_metadata=include_metadata
+            )
+        finally:
+            VECTOR_SEARCH_SECONDS.observe(time.perf_counter() - start)
+    
+    async def fetch(self, ids: List[str], namespace: str = "") -> Dict[str, Dict]:
+        return await self._run(self.store.fetch, ids=ids, namespace=namespace)
+    
+    async def list_ids(self, namespace: str = "") -> List[str]:
+        return await self._run(self.store.list_ids, namespace=namespace)
+    
+    async def delete(
+        self,
+        ids: Optional[List[str]] = None,
+        delete_all: bool = False,
+        namespace: str = "",
+        filter: Optional[Dict] = None
+    ) -> Dict:
+        return await self._run(
+            self.store.delete,
+            ids=ids,
+            delete_all=delete_all,
+            namespace=namespace,
+            filter=filter
+        )
+    
+    async def get_stats(self, namespace: str = "") -> Dict:
+        return await self._run(self.store.get_stats, namespace=namespace)
+    
+    async def warm_up(self) -> Dict:
+        return await self._run(self.store.warm_up)
+    
+    async def flush(self) -> None:
+        await self._run(self.store.flush)
+    
+    def close(self) -> None:
+        """
+        Wait for pending calls, then close the underlying store.
+        """
+        self._executor.shutdown(wait=True)
+        self.store.close()
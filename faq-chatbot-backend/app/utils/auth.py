@@ -1,36 +1,208 @@
 from fastapi import HTTPException, Security
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from jose import jwt, JWTError
-from datetime import datetime
-import os
-from typing import Optional
+from collections import OrderedDict
+import base64
+import binascii
+import hashlib
+import hmac
+import json
+import time
+from typing import Callable, Dict, Optional, Tuple
+from app.config.auth import (
+    NEXTAUTH_SECRET,
+    JWT_ALGORITHM,
+    JWT_BACKEND,
+    JWT_CACHE_SIZE,
+    JWT_CACHE_MAX_TTL_SECONDS
+)
+from app.utils.metrics import CACHE_LOOKUPS, STAGE_SECONDS
 
 security = HTTPBearer()
 
+JWT_VERIFICATION_SECONDS = STAGE_SECONDS.labels("jwt_verification")
+JWT_CACHE_HITS = CACHE_LOOKUPS.labels("jwt", "hit")
+JWT_CACHE_MISSES = CACHE_LOOKUPS.labels("jwt", "miss")
 
-def verify_jwt_token(token: str) -> Optional[dict]:
-    SECRET_KEY = os.getenv("NEXTAUTH_SECRET")
-    if not SECRET_KEY:
-        raise ValueError("NEXTAUTH_SECRET not found in environment variables")
+
+class InvalidTokenError(Exception):
+    pass
+
+
+def _b64decode(segment: str) -> bytes:
+    return base64.urlsafe_b64decode(segment + "=" * (-len(segment) % 4))
+
+
+class HMACTokenDecoder:
+    """
+    Standard-library verifier for HMAC-signed JWTs.
     
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=["HS256"])
+    The HMAC is keyed once; each token copies it instead of re-deriving
+    the key pads. Only the configured algorithm is accepted, the signature
+    is compared in constant time, and `exp`/`nbf` are checked like jose
+    does (no leeway).
+    """
+    DIGESTS = {"HS256": hashlib.sha256, "HS384": hashlib.sha384, "HS512": hashlib.sha512}
+    
+    def __init__(self, secret: str, algorithm: str):
+        if algorithm not in self.DIGESTS:
+            raise ValueError(f"JWT_BACKEND=hmac does not support {algorithm}")
+        self.algorithm = algorithm
+        self._mac = hmac.new(secret.encode("utf-8"), digestmod=self.DIGESTS[algorithm])
+    
+    def decode(self, token: str) -> dict:
+        if token.count(".") != 2:
+            raise InvalidTokenError("Not enough segments")
+        signing_input, _, signature_segment = token.rpartition(".")
+        header_segment, _, payload_segment = signing_input.partition(".")
+        try:
+            header = json.loads(_b64decode(header_segment))
+            signature = _b64decode(signature_segment)
+        except (ValueError, binascii.Error):
+            raise InvalidTokenError("Invalid header or signature padding")
+        if not isinstance(header, dict) or header.get("alg") != self.algorithm:
+            raise InvalidTokenError("The specified alg value is not allowed")
+        
+        mac = self._mac.copy()
+        mac.update(signing_input.encode("ascii", errors="replace"))
+        if not hmac.compare_digest(mac.digest(), signature):
+            raise InvalidTokenError("Signature verification failed.")
         
-        exp = payload.get("exp")
-        if exp and datetime.fromtimestamp(exp) < datetime.now():
-            raise HTTPException(status_code=401, detail="Token expired")
+        try:
+            payload = json.loads(_b64decode(payload_segment))
+        except (ValueError, binascii.Error):
+            raise InvalidTokenError("Invalid payload string")
+        if not isinstance(payload, dict):
+            raise InvalidTokenError("Invalid payload string: must be a json object")
         
+        now = time.time()
+        for claim in ("exp", "nbf"):
+            if claim in payload and not isinstance(payload[claim], (int, float)):
+                raise InvalidTokenError(f"{claim.capitalize()} claim must be a number.")
+        if "exp" in payload and payload["exp"] < now:
+            raise InvalidTokenError("Signature has expired.")
+        if "nbf" in payload and payload["nbf"] > now:
+            raise InvalidTokenError("The token is not yet valid (nbf)")
         return payload
+
+
+def load_jwt_backend(backend: str, secret: str, algorithm: str) -> Tuple[Callable[[str], dict], Tuple[type, ...]]:
+    """
+    Decode function `token -> claims` and the exceptions it raises for
+    invalid tokens. Every backend checks the signature and the `exp` and
+    `nbf` claims.
+    """
+    if backend == "jose":
+        from jose import jwt, JWTError
+        return (lambda token: jwt.decode(token, secret, algorithms=[algorithm])), (JWTError,)
+    if backend == "hmac":
+        return HMACTokenDecoder(secret, algorithm).decode, (InvalidTokenError,)
+    raise ValueError(f"Unknown JWT backend: {backend}")
+
+
+class TokenVerifier:
+    """
+    Verifies session tokens and caches the claims of valid ones.
+    
+    Entries are keyed by the SHA-256 of the token, so raw tokens are not
+    kept in memory, and expire at the token's `exp` (at most `max_ttl`
+    seconds for tokens without one). The least recently used entry is
+    evicted beyond `cache_size`. Invalid tokens are never cached.
+    """
+    def __init__(
+        self,
+        secret: Optional[str] = NEXTAUTH_SECRET,
+        algorithm: str = JWT_ALGORITHM,
+        backend: str = JWT_BACKEND,
+        cache_size: int = JWT_CACHE_SIZE,
+        max_ttl: float = JWT_CACHE_MAX_TTL_SECONDS
+    ):
+        self.secret = secret
+        self.algorithm = algorithm
+        self.backend = backend
+        self.cache_size = cache_size
+        self.max_ttl = max_ttl
+        self._decode, self._errors = load_jwt_backend(backend, secret, algorithm) if secret else (None, ())
+        self._cache: "OrderedDict[bytes, Tuple[float, dict]]" = OrderedDict()
+    
+    def verify(self, token: str) -> dict:
+        """
+        Return the claims of a valid token.
         
-    except JWTError as e:
-        raise HTTPException(status_code=401, detail=f"Invalid token: {str(e)}")
+        Args:
+            token: Encoded JWT
+        
+        Returns:
+            Decoded claims
+        
+        Raises:
+            HTTPException: 401 if the token is invalid or expired
+        """
+        if not self.secret:
+            raise ValueError("NEXTAUTH_SECRET not found in environment variables")
+        
+        now = time.time()
+        key = hashlib.sha256(token.encode("utf-8")).digest() if self.cache_size > 0 else None
+        if key is not None:
+            entry = self._cache.get(key)
+            if entry is not None:
+                expires_at, payload = entry
+                if now < expires_at:
+                    self._cache.move_to_end(key)
+                    JWT_CACHE_HITS.inc()
+                    return payload
+                del self._cache[key]
+                if payload.get("exp") is not None and now >= payload["exp"]:
+                    raise HTTPException(status_code=401, detail="Token expired")
+            JWT_CACHE_MISSES.inc()
+        
+        try:
+            payload = self._decode(token)
+        except self._errors as e:
+            raise HTTPException(status_code=401, detail=f"Invalid token: {str(e)}")
+        
+        if key is not None:
+            exp = payload.get("exp")
+            expires_at = now + self.max_ttl
+            if isinstance(exp, (int, float)):
+                expires_at = min(expires_at, exp)
+            self._cache[key] = (expires_at, payload)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return payload
+    
+    def clear(self) -> None:
+        self._cache.clear()
+    
+    def stats(self) -> Dict:
+        return {"backend": self.backend, "cached_tokens": len(self._cache), "max_size": self.cache_size}
+
+
+verifier = None
+
+
+def get_token_verifier() -> TokenVerifier:
+    """
+    Get or create the process-wide token verifier.
+    """
+    global verifier
+    if verifier is None:
+        verifier = TokenVerifier()
+    return verifier
+
+
+def verify_jwt_token(token: str) -> Optional[dict]:
+    return get_token_verifier().verify(token)
 
 
 async def get_current_user(
     credentials: HTTPAuthorizationCredentials = Security(security)
 ) -> dict:
     token = credentials.credentials
-    payload = verify_jwt_token(token)
+    start = time.perf_counter()
+    try:
+        payload = verify_jwt_token(token)
+    finally:
+        JWT_VERIFICATION_SECONDS.observe(time.perf_counter() - start)
     
     user = {
         "id": payload.get("sub") or payload.get("id"),
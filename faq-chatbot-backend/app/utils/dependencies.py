@@ -0,0 +1,30 @@
+from fastapi import HTTPException, Request
+from typing import Optional
+from app.services.knowledge_base import KnowledgeBaseService
+from app.services.conversation_store import ConversationStore
+
+
+def get_optional_knowledge_base(request: Request) -> Optional[KnowledgeBaseService]:
+    """
+    Return the process-wide knowledge base created in the app lifespan,
+    or None if it could not be initialised at startup.
+    """
+    return getattr(request.app.state, "knowledge_base", None)
+
+
+def get_knowledge_base(request: Request) -> KnowledgeBaseService:
+    """
+    Return the process-wide knowledge base, failing with 503 if it is unavailable.
+    """
+    kb_service = get_optional_knowledge_base(request)
+    if kb_service is None:
+        raise HTTPException(status_code=503, detail="Knowledge base is not available")
+    return kb_service
+
+
+def get_optional_conversation_store(request: Request) -> Optional[ConversationStore]:
+    """
+    Return the process-wide conversation store, or None when no database
+    is configured or it was unreachable at startup.
+    """
+    return getattr(request.app.state, "conversations", None)
@@ -0,0 +1,248 @@
+from bisect import bisect_left
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+# Seconds; covers cache hits (sub-millisecond) to full chat streams
+LATENCY_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0
+)
+TOKEN_BUCKETS = (16, 64, 256, 512, 1024, 2048, 4096, 8192, 16384)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _CounterChild:
+    __slots__ = ("value",)
+    
+    def __init__(self):
+        self.value = 0
+    
+    def inc(self, amount: float = 1) -> None:
+        self.value += amount
+
+
+class _GaugeChild(_CounterChild):
+    __slots__ = ()
+    
+    def dec(self, amount: float = 1) -> None:
+        self.value -= amount
+    
+    def set(self, value: float) -> None:
+        self.value = value
+
+
+class _HistogramChild:
+    __slots__ = ("bounds", "counts", "sum")
+    
+    def __init__(self, bounds: Tuple[float, ...]):
+        self.bounds = bounds
+        # One slot per bucket plus the +Inf overflow; made cumulative on export
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+    
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+
+
+class _Metric:
+    kind = ""
+    
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], object] = {}
+        if not self.labelnames:
+            self._children[()] = self._new_child()
+    
+    def _new_child(self):
+        raise NotImplementedError
+    
+    def labels(self, *values: str):
+        """
+        Series for one combination of label values. Look it up once and
+        keep it (e.g. in a module constant) on hot paths.
+        """
+        if len(values) != len(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {values}")
+        child = self._children.get(values)
+        if child is None:
+            child = self._children[values] = self._new_child()
+        return child
+    
+    def _samples(self) -> List[str]:
+        raise NotImplementedError
+    
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self._samples())
+        return "\n".join(lines)
+
+
+class Counter(_Metric):
+    """
+    Monotonically increasing count, e.g. cache hits or upstream retries.
+    """
+    kind = "counter"
+    
+    def _new_child(self):
+        return _CounterChild()
+    
+    def inc(self, amount: float = 1) -> None:
+        self._children[()].inc(amount)
+    
+    def _samples(self) -> List[str]:
+        return [
+            f"{self.name}{_format_labels(self.labelnames, values)} {_format_value(child.value)}"
+            for values, child in self._children.items()
+        ]
+
+
+class Gauge(Counter):
+    """
+    Value that goes up and down, e.g. streams in flight. With `function`
+    the value is read from it at scrape time instead.
+    """
+    kind = "gauge"
+    
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        function: Optional[Callable[[], float]] = None
+    ):
+        self.function = function
+        super().__init__(name, documentation, labelnames)
+    
+    def _new_child(self):
+        return _GaugeChild()
+    
+    def dec(self, amount: float = 1) -> None:
+        self._children[()].dec(amount)
+    
+    def set(self, value: float) -> None:
+        self._children[()].set(value)
+    
+    def _samples(self) -> List[str]:
+        if self.function is not None:
+            return [f"{self.name} {_format_value(self.function())}"]
+        return super()._samples()
+
+
+class Histogram(_Metric):
+    """
+    Distribution over fixed buckets, e.g. stage latency in seconds.
+    """
+    kind = "histogram"
+    
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS
+    ):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames)
+    
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+    
+    def observe(self, value: float) -> None:
+        self._children[()].observe(value)
+    
+    def _samples(self) -> List[str]:
+        lines = []
+        for values, child in self._children.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), child.counts):
+                cumulative += count
+                le = f'le="{_format_value(float(bound))}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, values, le)} {cumulative}")
+            labels = _format_labels(self.labelnames, values)
+            lines.append(f"{self.name}_sum{labels} {_format_value(child.sum)}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class Registry:
+    """
+    Process-local metrics exported together on one `/metrics` page.
+    
+    Counters, gauges and fixed-bucket histograms are plain Python objects,
+    so recording a sample costs well under a microsecond (a `bisect` and
+    two additions) and nothing is formatted until a scrape. Updates are not
+    locked: they happen on the event loop thread. With several worker
+    processes each exposes its own series; aggregate them in Prometheus.
+    """
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+    
+    def register(self, metric: _Metric) -> _Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} is already registered")
+        self._metrics[metric.name] = metric
+        return metric
+    
+    def render(self) -> str:
+        """
+        All metrics in the Prometheus text format (version 0.0.4).
+        """
+        return "\n".join(metric.render() for metric in self._metrics.values()) + "\n"
+
+
+registry = Registry()
+
+STAGE_SECONDS = registry.register(Histogram(
+    "faq_chatbot_stage_seconds",
+    "Duration of request stages: jwt_verification, admission_queue, query_embedding, vector_search, "
+    "context_formatting, first_token and stream (both since the chat request arrived).",
+    ("stage",)
+))
+CACHE_LOOKUPS = registry.register(Counter(
+    "faq_chatbot_cache_lookups_total",
+    "Embedding, response and JWT cache lookups by result.",
+    ("cache", "result")
+))
+OPENAI_RETRIES = registry.register(Counter(
+    "faq_chatbot_openai_retries_total",
+    "OpenAI requests retried, or refused a retry by the retry budget.",
+    ("outcome",)
+))
+CHAT_TOKENS = registry.register(Histogram(
+    "faq_chatbot_chat_tokens",
+    "Prompt and completion tokens per chat completion, as reported by the API.",
+    ("direction",),
+    buckets=TOKEN_BUCKETS
+))
+CHAT_STREAMS = registry.register(Counter(
+    "faq_chatbot_chat_streams_total",
+    "Chat streams by outcome: completed, error or disconnected.",
+    ("outcome",)
+))
+CHAT_ADMISSIONS = registry.register(Counter(
+    "faq_chatbot_chat_admissions_total",
+    "Chat admission decisions: admitted, queued (admitted after waiting), rate_limited, "
+    "too_many_streams, queue_full or queue_timeout.",
+    ("outcome",)
+))
+STREAMS_IN_FLIGHT = registry.register(Gauge(
+    "faq_chatbot_chat_streams_in_flight",
+    "Chat streams currently open."
+))
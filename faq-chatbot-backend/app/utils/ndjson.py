@@ -0,0 +1,118 @@
+import json
+import zlib
+from typing import AsyncIterable, AsyncIterator, Callable, Tuple
+
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
+from starlette.types import Receive, Scope, Send
+
+from app.config.ingestion import INGEST_MAX_LINE_BYTES
+from app.models.faq import FAQ, FAQIngestionFailure
+
+# Most bytes inflated from one compressed chunk at a time
+DECOMPRESS_CHUNK_BYTES = 64 * 1024
+
+
+class LineTooLong(ValueError):
+    pass
+
+
+async def iter_lines(
+    chunks: AsyncIterable[bytes],
+    compressed: bool = False,
+    max_line_bytes: int = INGEST_MAX_LINE_BYTES
+) -> AsyncIterator[Tuple[int, bytes]]:
+    """
+    Split a stream of (optionally gzip-compressed) bytes into lines.
+    
+    Compressed chunks are inflated DECOMPRESS_CHUNK_BYTES at a time and
+    only one partial line, of at most `max_line_bytes`, is buffered, so
+    memory stays constant regardless of the stream size or compression ratio.
+    
+    Args:
+        chunks: Raw body chunks
+        compressed: Whether the stream is gzip-compressed
+        max_line_bytes: Longest accepted line
+        
+    Yields:
+        Tuples of (1-based line number, non-empty line bytes)
+    
+    Raises:
+        LineTooLong: A line is longer than `max_line_bytes`
+    """
+    decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS) if compressed else None
+    buffer = b""
+    line_number = 0
+    
+    def too_long() -> LineTooLong:
+        return LineTooLong(f"Line {line_number + 1} is longer than {max_line_bytes} bytes")
+    
+    async for chunk in chunks:
+        while chunk:
+            if decompressor is not None:
+                data = decompressor.decompress(chunk, DECOMPRESS_CHUNK_BYTES)
+                chunk = decompressor.unconsumed_tail
+            else:
+                data, chunk = chunk, b""
+            buffer += data
+            *lines, buffer = buffer.split(b"\n")
+            for line in lines:
+                if len(line) > max_line_bytes:
+                    raise too_long()
+                line_number += 1
+                if line.strip():
+                    yield line_number, line
+            if len(buffer) > max_line_bytes:
+                raise too_long()
+    
+    if decompressor is not None:
+        buffer += decompressor.flush()
+    if len(buffer) > max_line_bytes:
+        raise too_long()
+    if buffer.strip():
+        yield line_number + 1, buffer
+
+
+async def parse_faqs(
+    lines: AsyncIterable[Tuple[int, bytes]],
+    on_error: Callable[[FAQIngestionFailure], None]
+) -> AsyncIterator[FAQ]:
+    """
+    Validate NDJSON lines as FAQs, reporting invalid lines instead of failing.
+    
+    Args:
+        lines: (line number, line bytes) tuples
+        on_error: Called with a failure for every line that is not a valid FAQ
+        
+    Yields:
+        Validated FAQ objects
+    """
+    async for line_number, line in lines:
+        try:
+            yield FAQ.model_validate_json(line)
+        except ValidationError as e:
+            try:
+                faq_id = str(json.loads(line).get("id") or f"line {line_number}")
+            except (ValueError, AttributeError):
+                faq_id = f"line {line_number}"
+            on_error(FAQIngestionFailure(
+                id=faq_id,
+                error=f"Invalid FAQ on line {line_number}: {e.errors()[0]['msg']}"
+            ))
+
+
+class RequestStreamingResponse(StreamingResponse):
+    """
+    Streaming response that may keep reading the request body while it
+    sends, e.g. to report progress on an upload as it is processed.
+    
+    StreamingResponse normally drains `receive` in the background to detect
+    client disconnects, which would swallow the body chunks; here a
+    disconnect surfaces as ClientDisconnect from `request.stream()` instead.
+    """
+    media_type = "application/x-ndjson"
+    
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await self.stream_response(send)
+        if self.background is not None:
+            await self.background()
@@ -0,0 +1,47 @@
+import asyncio
+from typing import Awaitable, Callable, Dict, Hashable, TypeVar
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent calls that share a key into one execution.
+    
+    The first caller for a key starts the work as a task; callers arriving
+    while it runs await the same task instead of repeating it. The key is
+    forgotten as soon as the task finishes, so results are never cached
+    beyond the in-flight window. Each caller awaits through `shield`, so a
+    cancelled caller (e.g. a disconnected client) doesn't cancel the work
+    for the others.
+    """
+    def __init__(self):
+        self._in_flight: Dict[Hashable, asyncio.Task] = {}
+        self.executions = 0
+        self.coalesced = 0
+    
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        task = self._in_flight.get(key)
+        if task is None:
+            self.executions += 1
+            task = asyncio.ensure_future(fn())
+            self._in_flight[key] = task
+            task.add_done_callback(lambda done: self._forget(key, done))
+        else:
+            self.coalesced += 1
+        return await asyncio.shield(task)
+    
+    def _forget(self, key: Hashable, task: asyncio.Task) -> None:
+        self._in_flight.pop(key, None)
+        # Mark the exception retrieved in case every caller was cancelled
+        if not task.cancelled():
+            task.exception()
+    
+    def stats(self) -> Dict:
+        total = self.executions + self.coalesced
+        return {
+            "in_flight": len(self._in_flight),
+            "executions": self.executions,
+            "coalesced": self.coalesced,
+            "coalesced_rate": round(self.coalesced / total, 4) if total else 0.0
+        }
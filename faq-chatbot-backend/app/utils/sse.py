@@ -0,0 +1,132 @@
+import asyncio
+import re
+from typing import AsyncIterable, AsyncIterator, Awaitable, Callable, Optional
+
+from app.config.chat import SSE_COALESCE_WINDOW_MS, SSE_HEARTBEAT_SECONDS, SSE_MAX_FRAME_CHARS
+
+# Comment line: ignored by EventSource parsers, keeps proxies from timing out
+HEARTBEAT = ": keep-alive\n\n"
+
+_LINE_BREAK = re.compile(r"\r\n|\r|\n")
+
+# Strong references to upstream generators being closed after a disconnect
+_closing = set()
+
+
+def format_event(data: str, event: Optional[str] = None) -> str:
+    """
+    Frame `data` as one Server-Sent Event.
+    
+    Every line of `data` becomes its own `data:` field; clients join the
+    fields of an event with "\\n", which restores the original newlines.
+    
+    Args:
+        data: Event payload, may contain newlines
+        event: Optional event type (clients default to "message")
+    
+    Returns:
+        The framed event, terminated by a blank line
+    """
+    lines = [f"event: {event}\n"] if event else []
+    lines.extend(f"data: {line}\n" for line in _LINE_BREAK.split(data))
+    lines.append("\n")
+    return "".join(lines)
+
+
+async def stream_events(
+    chunks: AsyncIterable[str],
+    window_ms: float = SSE_COALESCE_WINDOW_MS,
+    max_chars: int = SSE_MAX_FRAME_CHARS,
+    heartbeat_seconds: float = SSE_HEARTBEAT_SECONDS,
+    is_disconnected: Optional[Callable[[], Awaitable[bool]]] = None
+) -> AsyncIterator[str]:
+    """
+    Turn a stream of text deltas into coalesced SSE frames.
+    
+    The first delta is sent as soon as it arrives. Later deltas are
+    buffered and sent as one frame when `window_ms` has passed since the
+    first of them, or when the buffer reaches `max_chars`. While `chunks`
+    produces nothing, a heartbeat comment goes out every
+    `heartbeat_seconds`.
+    
+    `chunks` is only read one delta ahead of the client, so a slow reader
+    slows the upstream down instead of growing a buffer. Before every write
+    `is_disconnected` is checked; once the client is gone, or when the
+    consumer stops iterating, `chunks` is closed straight away, which for a
+    model completion closes its HTTP stream.
+    
+    Args:
+        chunks: Text deltas, e.g. from generate_chat_response
+        window_ms: Longest time a delta waits to be sent
+        max_chars: Buffered characters that trigger an immediate frame
+        heartbeat_seconds: Idle time before a heartbeat (0 disables them)
+        is_disconnected: Coroutine function reporting a client disconnect
+    
+    Yields:
+        SSE frames and heartbeat comments
+    """
+    loop = asyncio.get_running_loop()
+    iterator = chunks.__aiter__()
+    pending: Optional[asyncio.Future] = None
+    buffer = []
+    buffered = 0
+    flush_at = None
+    sent_data = False
+    last_write = loop.time()
+    
+    try:
+        while True:
+            if pending is None:
+                pending = asyncio.ensure_future(iterator.__anext__())
+            
+            wake_at = flush_at
+            if wake_at is None and heartbeat_seconds > 0:
+                wake_at = last_write + heartbeat_seconds
+            timeout = None if wake_at is None else max(0.0, wake_at - loop.time())
+            done, _ = await asyncio.wait({pending}, timeout=timeout)
+            
+            if done:
+                task, pending = pending, None
+                try:
+                    chunk = task.result()
+                except StopAsyncIteration:
+                    break
+                buffer.append(chunk)
+                buffered += len(chunk)
+                if flush_at is None:
+                    flush_at = loop.time() + (window_ms / 1000 if sent_data else 0)
+                if buffered < max_chars and loop.time() < flush_at:
+                    continue
+            
+            if is_disconnected is not None and await is_disconnected():
+                return
+            
+            if buffer:
+                frame = format_event("".join(buffer))
+                buffer = []
+                buffered = 0
+                flush_at = None
+                sent_data = True
+            else:
+                frame = HEARTBEAT
+            yield frame
+            last_write = loop.time()
+        
+        if buffer and not (is_disconnected is not None and await is_disconnected()):
+            yield format_event("".join(buffer))
+    finally:
+        # Stop the upstream without awaiting it: this may run inside an
+        # already-cancelled scope (Starlette cancels the response task when
+        # the client disconnects)
+        if pending is not None:
+            pending.cancel()
+            pending.add_done_callback(lambda _: _close(iterator))
+        else:
+            _close(iterator)
+
+
+def _close(iterator: AsyncIterator[str]) -> None:
+    if hasattr(iterator, "aclose"):
+        closing = asyncio.ensure_future(iterator.aclose())
+        _closing.add(closing)
+        closing.add_done_callback(_closing.discard)
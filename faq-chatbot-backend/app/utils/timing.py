@@ -0,0 +1,68 @@
+import time
+from collections import deque
+from typing import Deque, Dict, List, Optional
+
+
+class RequestTimer:
+    """
+    Records named milestones of one request, in milliseconds since start.
+    """
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.marks: Dict[str, float] = {}
+    
+    def elapsed_ms(self) -> float:
+        return (time.perf_counter() - self.start) * 1000
+    
+    def mark(self, name: str, once: bool = True) -> None:
+        """
+        Record `name` at the current time. With `once`, later marks of the
+        same name are ignored so e.g. "first_token" keeps the first chunk.
+        """
+        if once and name in self.marks:
+            return
+        self.marks[name] = round(self.elapsed_ms(), 2)
+    
+    def set(self, name: str, value_ms: float) -> None:
+        self.marks[name] = round(value_ms, 2)
+
+
+def percentile(values: List[float], pct: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+class TimingLog:
+    """
+    Bounded window of recent request timings with percentile summaries.
+    """
+    def __init__(self, window: int):
+        self.entries: Deque[Dict] = deque(maxlen=window)
+    
+    def record(self, timer: RequestTimer, **labels) -> None:
+        self.entries.append({**labels, **timer.marks})
+    
+    def summary(self, **labels) -> Dict:
+        """
+        p50/p95/p99 of every recorded milestone, over entries matching `labels`.
+        """
+        entries = [
+            entry for entry in self.entries
+            if all(entry.get(key) == value for key, value in labels.items())
+        ]
+        names = sorted({
+            key for entry in entries for key, value in entry.items()
+            if isinstance(value, float) and key not in labels
+        })
+        summary = {"count": len(entries)}
+        for name in names:
+            values = [entry[name] for entry in entries if isinstance(entry.get(name), float)]
+            summary[name] = {
+                "p50": percentile(values, 50),
+                "p95": percentile(values, 95),
+                "p99": percentile(values, 99),
+            }
+        return summary
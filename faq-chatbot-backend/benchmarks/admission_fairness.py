@@ -0,0 +1,167 @@
+"""
+Chat admission control under a noisy client, and its memory per user.
+
+Simulates streams as sleeps against `--slots` stream slots: one noisy
+authenticated user opens `--noisy-streams` streams back to back while
+`--users` authenticated and as many anonymous users each send a message
+every `--interval` seconds. Runs once with a plain FIFO semaphore (no
+admission control) and once with AdmissionController, and reports queue
+wait percentiles per kind of user, the noisy user's share of slots and
+rejections by reason.
+
+Then fills a controller with `--tracked-users` users to measure memory per
+tracked user, and shows how many are left after their buckets refill.
+
+Usage:
+    python -m benchmarks.admission_fairness
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+import tracemalloc
+from collections import Counter, defaultdict
+
+from benchmarks.kb_lifecycle import percentile
+from app.services.admission import AdmissionController, AdmissionPolicy, RateLimited
+
+
+class FifoAdmission:
+    """
+    Baseline: one shared semaphore, no per-user limits.
+    """
+    def __init__(self, slots):
+        self._semaphore = asyncio.Semaphore(slots)
+    
+    async def acquire(self, user_id, anonymous=False):
+        await self._semaphore.acquire()
+        return self
+    
+    def release(self):
+        self._semaphore.release()
+
+
+async def simulate(args, controller):
+    random.seed(0)
+    waits = defaultdict(list)
+    slots_used = Counter()
+    rejected = Counter()
+    deadline = time.monotonic() + args.duration
+    
+    async def one(user_id, kind, anonymous):
+        start = time.monotonic()
+        try:
+            ticket = await controller.acquire(user_id, anonymous=anonymous)
+        except RateLimited as e:
+            rejected[f"{kind}:{e.reason}"] += 1
+            return
+        waits[kind].append((time.monotonic() - start) * 1000)
+        slots_used[kind] += 1
+        try:
+            await asyncio.sleep(args.stream_seconds * random.uniform(0.5, 1.5))
+        finally:
+            ticket.release()
+    
+    async def noisy():
+        running = set()
+        while time.monotonic() < deadline:
+            while len(running) < args.noisy_streams:
+                task = asyncio.create_task(one("noisy", "noisy", False))
+                running.add(task)
+                task.add_done_callback(running.discard)
+            await asyncio.sleep(0.001)
+        await asyncio.gather(*running)
+    
+    async def regular(user_id, kind, anonymous):
+        await asyncio.sleep(random.uniform(0, args.interval))
+        while time.monotonic() < deadline:
+            await one(user_id, kind, anonymous)
+            await asyncio.sleep(args.interval * random.uniform(0.5, 1.5))
+    
+    await asyncio.gather(
+        noisy(),
+        *(regular(f"user-{i}", "authenticated", False) for i in range(args.users)),
+        *(regular(f"anon-{i}", "anonymous", True) for i in range(args.users))
+    )
+    
+    total = sum(slots_used.values())
+    return {
+        **{
+            kind: {
+                "streams": len(values),
+                "wait_p50_ms": percentile(values, 50),
+                "wait_p99_ms": percentile(values, 99)
+            }
+            for kind, values in sorted(waits.items())
+        },
+        "noisy_slot_share": round(slots_used["noisy"] / total, 4) if total else 0.0,
+        "rejected": dict(rejected)
+    }
+
+
+def tracked_user_memory(args):
+    now = [0.0]
+    controller = AdmissionController(max_users=args.tracked_users, clock=lambda: now[0])
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    for i in range(args.tracked_users):
+        controller._user(f"user-{i:012d}", i % 2 == 0, now[0])
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    allocated = sum(stat.size_diff for stat in after.compare_to(before, "filename"))
+    
+    # Once every bucket has refilled, each admission drops a batch of idle users
+    tracked = len(controller._users)
+    now[0] = 3600.0
+    start = time.perf_counter()
+    evictions = 0
+    while controller._users and evictions < 1000000:
+        controller._evict(now[0])
+        evictions += 1
+    return {
+        "tracked_users": tracked,
+        "bytes_per_user": round(allocated / tracked),
+        "admissions_to_evict_all": evictions,
+        "evict_us_per_admission": round((time.perf_counter() - start) / evictions * 1e6, 2)
+    }
+
+
+async def run(args):
+    limits = AdmissionPolicy(rate=args.rate_per_minute / 60, burst=args.burst, max_streams=args.max_streams, weight=3)
+    anonymous = limits._replace(rate=limits.rate / 3, max_streams=1, weight=1)
+    controller = AdmissionController(
+        max_in_flight=args.slots,
+        max_queued=args.max_queued,
+        queue_timeout=args.queue_timeout,
+        policies={False: limits, True: anonymous}
+    )
+    print(json.dumps({
+        "slots": args.slots,
+        "fifo": await simulate(args, FifoAdmission(args.slots)),
+        "admission": await simulate(args, controller),
+        "memory": tracked_user_memory(args)
+    }, indent=2))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--slots", type=int, default=8)
+    parser.add_argument("--users", type=int, default=10)
+    parser.add_argument("--noisy-streams", type=int, default=32)
+    parser.add_argument("--interval", type=float, default=1.0)
+    parser.add_argument("--stream-seconds", type=float, default=0.2)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--rate-per-minute", type=float, default=120)
+    parser.add_argument("--burst", type=int, default=20)
+    parser.add_argument("--max-streams", type=int, default=4)
+    parser.add_argument("--max-queued", type=int, default=64)
+    parser.add_argument("--queue-timeout", type=float, default=5.0)
+    parser.add_argument("--tracked-users", type=int, default=1000000)
+    args = parser.parse_args()
+    
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
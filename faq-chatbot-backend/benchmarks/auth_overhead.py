@@ -0,0 +1,78 @@
+"""
+Per-request cost of authenticating a chat request.
+
+Compares the previous verification (secret read from the environment,
+`jose.jwt.decode` and a `datetime` expiry check on every call) with
+TokenVerifier uncached for each available JWT backend, and with the
+verified-token cache, where a session's repeated token is a cache hit.
+Also runs the full `get_current_user` dependency.
+
+Usage:
+    python -m benchmarks.auth_overhead
+"""
+import argparse
+import json
+import os
+import time
+import timeit
+from datetime import datetime
+
+from fastapi.security import HTTPAuthorizationCredentials
+from jose import jwt
+
+from app.utils import auth
+from app.utils.auth import TokenVerifier
+
+SECRET = "benchmark-secret-at-least-32-bytes-long"
+
+
+def legacy_verify(token: str) -> dict:
+    secret = os.getenv("NEXTAUTH_SECRET")
+    payload = jwt.decode(token, secret, algorithms=["HS256"])
+    exp = payload.get("exp")
+    if exp and datetime.fromtimestamp(exp) < datetime.now():
+        raise ValueError("Token expired")
+    return payload
+
+
+def per_call_us(fn, number):
+    return round(min(timeit.repeat(fn, number=number, repeat=5)) / number * 1e6, 2)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--number", type=int, default=2000)
+    args = parser.parse_args()
+    
+    os.environ["NEXTAUTH_SECRET"] = SECRET
+    token = jwt.encode(
+        {"sub": "user-1", "email": "user@example.com", "name": "User", "exp": int(time.time()) + 3600},
+        SECRET,
+        algorithm="HS256"
+    )
+    
+    results = {"legacy_jose_us": per_call_us(lambda: legacy_verify(token), args.number)}
+    for backend in ("jose", "hmac"):
+        verifier = TokenVerifier(secret=SECRET, backend=backend, cache_size=0)
+        results[f"{backend}_uncached_us"] = per_call_us(lambda: verifier.verify(token), args.number)
+    
+    cached = TokenVerifier(secret=SECRET)
+    cached.verify(token)
+    results["cached_hit_us"] = per_call_us(lambda: cached.verify(token), args.number * 10)
+    
+    auth.verifier = cached
+    credentials = HTTPAuthorizationCredentials(scheme="Bearer", credentials=token)
+    
+    def dependency():
+        coroutine = auth.get_current_user(credentials)
+        try:
+            coroutine.send(None)
+        except StopIteration:
+            pass
+    
+    results["get_current_user_cached_us"] = per_call_us(dependency, args.number * 10)
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
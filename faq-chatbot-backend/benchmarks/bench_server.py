@@ -0,0 +1,90 @@
+"""
+The backend app with Pinecone replaced by an in-memory FakePinecone, for
+offline load tests. OpenAI calls go to OPENAI_BASE_URL, e.g. a
+`benchmarks.fake_openai` server. At startup the knowledge base is seeded
+with `--seed-copies` copies of the bundled FAQ dataset, embedded through
+that server like any other ingestion.
+
+Other settings (CHAT_PIPELINE_MODE, FAQ_SEARCH_MODE, caches, ...) are read
+from the environment as usual, so configurations can be compared run by
+run. Chat admission control is off unless CHAT_ADMISSION_ENABLED=true,
+since every request comes from the same benchmark user.
+`benchmarks.suite` starts this server itself.
+
+Usage:
+    OPENAI_BASE_URL=http://127.0.0.1:8100/v1 NEXTAUTH_SECRET=benchmark \\
+        python -m benchmarks.bench_server --port 8001 --search-latency 0.02
+"""
+import argparse
+import json
+import os
+from contextlib import asynccontextmanager
+
+import uvicorn
+from dotenv import load_dotenv
+
+from benchmarks.fakes import FakePinecone
+from benchmarks.retrieval_recall import DATASET
+
+
+def load_faqs(copies: int, prefix: str = ""):
+    """
+    The bundled FAQs repeated `copies` times with distinct ids.
+    """
+    from app.models.faq import FAQ
+    with open(DATASET, "r", encoding="utf-8") as f:
+        faqs = json.load(f)["faqs"]
+    return [
+        FAQ(**{**faq, "id": f"{prefix}{faq['id']}" + (f"#{copy}" if copy else "")})
+        for copy in range(copies)
+        for faq in faqs
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--search-latency", type=float, default=0.02,
+                        help="Seconds per fake Pinecone data-plane call")
+    parser.add_argument("--search-jitter", type=float, default=0.2)
+    parser.add_argument("--seed-copies", type=int, default=1)
+    args = parser.parse_args()
+    
+    load_dotenv()
+    if not os.getenv("OPENAI_BASE_URL"):
+        parser.error("OPENAI_BASE_URL must point at a fake OpenAI server")
+    # Offline stand-ins; set before the app modules read their configuration
+    os.environ["VECTOR_STORE_BACKEND"] = "pinecone"
+    os.environ["EMBEDDING_BACKEND"] = "openai"
+    os.environ["DATABASE_URL"] = ""
+    os.environ.setdefault("PINECONE_API_KEY", "benchmark")
+    os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+    os.environ.setdefault("NEXTAUTH_SECRET", "benchmark")
+    
+    # Every request comes from the one benchmark user; admission control
+    # would turn most of a load test into 429s
+    from app.config import chat as chat_config
+    chat_config.CHAT_ADMISSION_ENABLED = os.getenv("CHAT_ADMISSION_ENABLED", "false").lower() == "true"
+    
+    from app.services import vector_store
+    FakePinecone.data_latency = args.search_latency
+    FakePinecone.data_jitter = args.search_jitter
+    vector_store.Pinecone = FakePinecone
+    
+    import main as backend
+    
+    @asynccontextmanager
+    async def seeded_lifespan(app):
+        async with backend.lifespan(app):
+            if args.seed_copies and app.state.knowledge_base is not None:
+                report = await app.state.knowledge_base.add_faqs_batch(load_faqs(args.seed_copies))
+                print(f"seeded {report.added} FAQs", flush=True)
+            yield
+    
+    backend.app.router.lifespan_context = seeded_lifespan
+    uvicorn.run(backend.app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
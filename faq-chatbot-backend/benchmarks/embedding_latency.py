@@ -0,0 +1,96 @@
+"""
+Query-embedding latency of the OpenAI and local ONNX backends.
+
+Embeds the questions of the bundled FAQ dataset (with a varying suffix so
+nothing is a repeat) one at a time, then `--concurrency` at a time, with
+the embedding cache disabled, and reports p50/p99 per backend. The
+concurrent run is where the local backend's micro-batching shows up.
+
+The openai backend needs OPENAI_API_KEY; the local backend needs
+onnxruntime, tokenizers and a model directory (LOCAL_EMBEDDING_MODEL_PATH
+or `--model-path`).
+
+Usage:
+    python -m benchmarks.embedding_latency --backends local --model-path models/all-MiniLM-L6-v2
+"""
+import argparse
+import asyncio
+import json
+import os
+import time
+
+from dotenv import load_dotenv
+
+from benchmarks.kb_lifecycle import percentile
+from app.config.embeddings import LOCAL_EMBEDDING_MODEL_PATH
+
+DATASET = os.path.join(os.path.dirname(__file__), "..", "app", "data", "fintech_faqs.json")
+
+
+def build_service(backend, model_path):
+    if backend == "local":
+        from app.services.local_embeddings import LocalEmbeddingService
+        service = LocalEmbeddingService(model_path=model_path)
+    else:
+        from app.services.embeddings import EmbeddingService
+        service = EmbeddingService()
+    service.cache = None
+    return service
+
+
+async def measure(service, queries, concurrency):
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+    
+    async def embed(query):
+        async with semaphore:
+            start = time.perf_counter()
+            await service.generate_embedding(query)
+            latencies.append((time.perf_counter() - start) * 1000)
+    
+    start = time.perf_counter()
+    await asyncio.gather(*(embed(query) for query in queries))
+    elapsed = time.perf_counter() - start
+    return {
+        "p50_ms": percentile(latencies, 50),
+        "p99_ms": percentile(latencies, 99),
+        "throughput_per_s": round(len(queries) / elapsed, 1)
+    }
+
+
+async def run(args):
+    with open(DATASET, "r", encoding="utf-8") as f:
+        questions = [faq["question"] for faq in json.load(f)["faqs"]]
+    queries = [f"{questions[i % len(questions)]} ({i})" for i in range(args.queries)]
+    
+    summary = {}
+    for backend in args.backends.split(","):
+        service = build_service(backend, args.model_path)
+        # The first call pays for connection setup / lazy allocations
+        await service.generate_embedding("warm up")
+        summary[backend] = {
+            "model": service.model,
+            "dimension": service.dimension,
+            "sequential": await measure(service, queries, 1),
+            f"concurrency_{args.concurrency}": await measure(service, queries, args.concurrency),
+            "batches": service.batch_stats()
+        }
+        service.close()
+    
+    print(json.dumps({"queries": args.queries, **summary}, indent=2))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--backends", default="openai,local", help="Comma-separated: openai, local")
+    parser.add_argument("--model-path", default=LOCAL_EMBEDDING_MODEL_PATH)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=16)
+    args = parser.parse_args()
+    
+    load_dotenv()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,224 @@
+"""
+OpenAI-compatible HTTP server for offline load tests.
+
+Serves `/v1/chat/completions` (streamed or not) and `/v1/embeddings` with
+configurable latency and jitter. Output is deterministic: each request
+seeds its own random generator from `--seed` and the request body, so the
+same request always gets the same tokens and the same delays. Embeddings
+are the feature-hashed bag of words of `BagOfWordsEmbeddingService`, so
+retrieval over them behaves like a lexical search.
+
+Point the backend at it with OPENAI_BASE_URL=http://127.0.0.1:PORT/v1
+(any OPENAI_API_KEY is accepted).
+
+Usage:
+    python -m benchmarks.fake_openai --port 8100 --token-interval 0.02 --jitter 0.3
+"""
+import argparse
+import asyncio
+import base64
+import hashlib
+import json
+import random
+import struct
+import time
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+from benchmarks.fakes import BagOfWordsEmbeddingService
+
+VOCABULARY = (
+    "your account card payment transfer balance fee limit days business verify identity "
+    "app settings support team secure refund international bank deposit withdrawal you can "
+    "will be within usually the a to and of in for from with on"
+).split()
+
+
+class FakeOpenAI:
+    """
+    Request handlers; latencies are in seconds and `jitter` is the largest
+    relative deviation applied to each delay.
+    """
+    def __init__(
+        self,
+        seed: int = 0,
+        first_token_latency: float = 0.3,
+        token_interval: float = 0.02,
+        jitter: float = 0.0,
+        completion_tokens: int = 60,
+        embedding_latency: float = 0.05,
+        dimension: int = 1536,
+        error_rate: float = 0.0
+    ):
+        self.seed = seed
+        self.first_token_latency = first_token_latency
+        self.token_interval = token_interval
+        self.jitter = jitter
+        self.completion_tokens = completion_tokens
+        self.embedding_latency = embedding_latency
+        self.error_rate = error_rate
+        self.embedder = BagOfWordsEmbeddingService(dimension=dimension)
+        self.requests = 0
+    
+    def _random(self, body: bytes) -> random.Random:
+        return random.Random(f"{self.seed}:{hashlib.sha256(body).hexdigest()}")
+    
+    def _delay(self, rng: random.Random, seconds: float) -> float:
+        return max(0.0, seconds * (1 + rng.uniform(-self.jitter, self.jitter)))
+    
+    def _rate_limited(self, rng: random.Random):
+        if self.error_rate and rng.random() < self.error_rate:
+            return JSONResponse(
+                {"error": {"message": "Rate limit reached (fake)", "type": "rate_limit_error"}},
+                status_code=429,
+                headers={"retry-after": "0.05"}
+            )
+        return None
+    
+    def _completion(self, rng: random.Random):
+        tokens = []
+        for i in range(self.completion_tokens):
+            word = rng.choice(VOCABULARY)
+            if i == 0:
+                tokens.append(word.capitalize())
+            elif rng.random() < 0.05:
+                # Paragraph breaks exercise multi-line SSE framing
+                tokens.append("\n\n" + word)
+            else:
+                tokens.append(" " + word)
+        return tokens
+    
+    async def chat_completions(self, request: Request):
+        self.requests += 1
+        raw = await request.body()
+        body = json.loads(raw)
+        rng = self._random(raw)
+        error = self._rate_limited(rng)
+        if error is not None:
+            return error
+        
+        model = body.get("model", "gpt-4o")
+        prompt_tokens = sum(len(str(message.get("content", ""))) for message in body.get("messages", [])) // 4
+        tokens = self._completion(rng)
+        usage = {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": len(tokens),
+            "total_tokens": prompt_tokens + len(tokens)
+        }
+        
+        if not body.get("stream"):
+            await asyncio.sleep(self._delay(rng, self.first_token_latency + self.token_interval * len(tokens)))
+            return {
+                "id": "chatcmpl-fake",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": "".join(tokens)},
+                    "finish_reason": "stop"
+                }],
+                "usage": usage
+            }
+        
+        def chunk(delta, finish_reason=None):
+            return "data: " + json.dumps({
+                "id": "chatcmpl-fake",
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}]
+            }) + "\n\n"
+        
+        async def events():
+            await asyncio.sleep(self._delay(rng, self.first_token_latency))
+            yield chunk({"role": "assistant", "content": ""})
+            for i, token in enumerate(tokens):
+                if i:
+                    await asyncio.sleep(self._delay(rng, self.token_interval))
+                yield chunk({"content": token})
+            yield chunk({}, finish_reason="stop")
+            if (body.get("stream_options") or {}).get("include_usage"):
+                yield "data: " + json.dumps({
+                    "id": "chatcmpl-fake",
+                    "object": "chat.completion.chunk",
+                    "created": int(time.time()),
+                    "model": model,
+                    "choices": [],
+                    "usage": usage
+                }) + "\n\n"
+            yield "data: [DONE]\n\n"
+        
+        return StreamingResponse(events(), media_type="text/event-stream")
+    
+    async def embeddings(self, request: Request):
+        self.requests += 1
+        raw = await request.body()
+        body = json.loads(raw)
+        rng = self._random(raw)
+        error = self._rate_limited(rng)
+        if error is not None:
+            return error
+        
+        texts = body["input"] if isinstance(body["input"], list) else [body["input"]]
+        await asyncio.sleep(self._delay(rng, self.embedding_latency))
+        base64_output = body.get("encoding_format") == "base64"
+        data = []
+        for i, text in enumerate(texts):
+            vector = self.embedder._embed(text)
+            if base64_output:
+                vector = base64.b64encode(struct.pack(f"<{len(vector)}f", *vector)).decode("ascii")
+            data.append({"object": "embedding", "index": i, "embedding": vector})
+        return {
+            "object": "list",
+            "data": data,
+            "model": body.get("model", "text-embedding-3-small"),
+            "usage": {"prompt_tokens": sum(len(text) // 4 for text in texts), "total_tokens": 0}
+        }
+
+
+def create_app(fake: FakeOpenAI) -> FastAPI:
+    app = FastAPI()
+    app.add_api_route("/v1/chat/completions", fake.chat_completions, methods=["POST"])
+    app.add_api_route("/v1/embeddings", fake.embeddings, methods=["POST"])
+    # Target of the backend's connection prewarm
+    app.add_api_route("/v1/", lambda: {}, methods=["GET", "HEAD"])
+    app.add_api_route("/health", lambda: {"requests": fake.requests}, methods=["GET"])
+    return app
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--first-token-latency", type=float, default=0.3)
+    parser.add_argument("--token-interval", type=float, default=0.02)
+    parser.add_argument("--jitter", type=float, default=0.2,
+                        help="Largest relative deviation of each delay, e.g. 0.2 for +/-20%%")
+    parser.add_argument("--completion-tokens", type=int, default=60)
+    parser.add_argument("--embedding-latency", type=float, default=0.05)
+    parser.add_argument("--error-rate", type=float, default=0.0,
+                        help="Share of requests answered with a 429")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8100)
+    add_arguments(parser)
+    args = parser.parse_args()
+    
+    fake = FakeOpenAI(
+        seed=args.seed,
+        first_token_latency=args.first_token_latency,
+        token_interval=args.token_interval,
+        jitter=args.jitter,
+        completion_tokens=args.completion_tokens,
+        embedding_latency=args.embedding_latency,
+        error_rate=args.error_rate
+    )
+    uvicorn.run(create_app(fake), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
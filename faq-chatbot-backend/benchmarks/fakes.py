@@ -0,0 +1,183 @@
+"""
+Deterministic local stand-ins for the external services used by the backend.
+They let benchmarks run without OpenAI or Pinecone credentials.
+"""
+import hashlib
+import random
+import time
+from types import SimpleNamespace
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from app.services.lexical_index import tokenize
+from app.services.local_vector_store import matches_filter
+
+
+class FakeEmbeddingService:
+    """
+    Hash-based embedding generator with the same interface as EmbeddingService.
+    """
+    def __init__(self, dimension: int = 1536, latency: float = 0.0):
+        self.model = "fake-embedding"
+        self.dimension = dimension
+        self.latency = latency
+    
+    def _embed(self, text: str) -> List[float]:
+        digest = hashlib.sha256(text.encode("utf-8")).digest()
+        return [(digest[i % len(digest)] - 128) / 128.0 for i in range(self.dimension)]
+    
+    async def generate_embedding(self, text: str) -> List[float]:
+        return self._embed(text)
+    
+    async def generate_batch_embeddings(self, texts: List[str], batch_size: int = 100) -> List[List[float]]:
+        return [self._embed(text) for text in texts]
+    
+    def close(self) -> None:
+        pass
+
+
+class BagOfWordsEmbeddingService(FakeEmbeddingService):
+    """
+    Feature-hashed bag of words: texts sharing content words get similar
+    vectors, so offline retrieval evaluations give indicative (lexical)
+    hit rates instead of the random ones of hash vectors.
+    """
+    def _embed(self, text: str) -> List[float]:
+        vector = [0.0] * self.dimension
+        for token in tokenize(text):
+            digest = hashlib.sha256(token.encode("utf-8")).digest()
+            vector[int.from_bytes(digest[:4], "big") % self.dimension] += 1.0
+        norm = sum(value * value for value in vector) ** 0.5
+        return [value / norm for value in vector] if norm else vector
+
+
+class FakePineconeIndex:
+    """
+    In-memory index that mimics the subset of the Pinecone Index API we use,
+    with an optional latency per call. Queries are exact cosine searches
+    honouring metadata filters; `jitter` varies each latency by up to that
+    fraction, drawn from a generator seeded with `seed`.
+    """
+    def __init__(self, latency: float = 0.0, jitter: float = 0.0, seed: int = 0, dimension: int = 1536):
+        self.latency = latency
+        self.jitter = jitter
+        self.dimension = dimension
+        self.namespaces: Dict[str, Dict[str, tuple]] = {}
+        # Per namespace: ids and L2-normalised matrix, rebuilt after writes
+        self._matrices: Dict[str, tuple] = {}
+        self._random = random.Random(seed)
+    
+    def _wait(self):
+        if self.latency:
+            time.sleep(self.latency * (1 + self._random.uniform(-self.jitter, self.jitter)))
+    
+    def upsert(self, vectors: List[tuple], namespace: str = ""):
+        self._wait()
+        store = self.namespaces.setdefault(namespace, {})
+        for vector_id, values, metadata in vectors:
+            store[vector_id] = (values, metadata)
+        self._matrices.pop(namespace, None)
+        return {"upserted_count": len(vectors)}
+    
+    def _matrix(self, namespace: str) -> tuple:
+        if namespace not in self._matrices:
+            store = self.namespaces.get(namespace, {})
+            ids = list(store)
+            matrix = np.asarray([store[vector_id][0] for vector_id in ids], dtype=np.float32).reshape(len(ids), -1)
+            norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+            self._matrices[namespace] = (ids, matrix / np.where(norms == 0, 1.0, norms))
+        return self._matrices[namespace]
+    
+    def query(self, vector, top_k=5, filter=None, namespace="", include_metadata=True):
+        self._wait()
+        store = self.namespaces.get(namespace, {})
+        if not store:
+            return SimpleNamespace(matches=[])
+        
+        ids, matrix = self._matrix(namespace)
+        query = np.asarray(vector, dtype=np.float32)
+        scores = matrix @ (query / (np.linalg.norm(query) or 1.0))
+        if filter:
+            allowed = np.array([matches_filter(store[vector_id][1] or {}, filter) for vector_id in ids])
+            scores = np.where(allowed, scores, -np.inf)
+        order = [i for i in np.argsort(-scores)[:top_k] if scores[i] > -np.inf]
+        matches = [
+            SimpleNamespace(
+                id=ids[i],
+                score=float(scores[i]),
+                metadata=store[ids[i]][1] if include_metadata else None
+            )
+            for i in order
+        ]
+        return SimpleNamespace(matches=matches)
+    
+    def fetch(self, ids, namespace=""):
+        self._wait()
+        store = self.namespaces.get(namespace, {})
+        return SimpleNamespace(vectors={
+            vector_id: SimpleNamespace(values=store[vector_id][0], metadata=store[vector_id][1])
+            for vector_id in ids
+            if vector_id in store
+        })
+    
+    def list(self, namespace="", limit=100):
+        ids = list(self.namespaces.get(namespace, {}))
+        for start in range(0, len(ids), limit):
+            self._wait()
+            yield ids[start:start + limit]
+    
+    def delete(self, ids=None, delete_all=False, namespace="", filter=None):
+        self._wait()
+        store = self.namespaces.setdefault(namespace, {})
+        if delete_all:
+            store.clear()
+        if filter:
+            ids = [vector_id for vector_id, (_, metadata) in store.items() if matches_filter(metadata or {}, filter)]
+        for vector_id in ids or []:
+            store.pop(vector_id, None)
+        self._matrices.pop(namespace, None)
+        return {}
+    
+    def describe_index_stats(self):
+        self._wait()
+        return {
+            "namespaces": {
+                name: {"vector_count": len(store)} for name, store in self.namespaces.items()
+            }
+        }
+
+
+class FakePinecone:
+    """
+    Stand-in for the Pinecone client. Control-plane calls such as
+    list_indexes() pay `control_latency`, data-plane calls pay `data_latency`.
+    """
+    control_latency = 0.0
+    data_latency = 0.0
+    data_jitter = 0.0
+    _indexes: Dict[str, FakePineconeIndex] = {}
+    
+    def __init__(self, api_key: Optional[str] = None):
+        self.api_key = api_key
+    
+    def list_indexes(self):
+        time.sleep(self.control_latency)
+        return [SimpleNamespace(name=name) for name in self._indexes]
+    
+    def create_index(self, name, dimension, metric, spec):
+        time.sleep(self.control_latency)
+        self._indexes[name] = FakePineconeIndex(
+            latency=self.data_latency,
+            jitter=self.data_jitter,
+            dimension=dimension
+        )
+    
+    def describe_index(self, name):
+        return SimpleNamespace(status={"ready": True}, dimension=self._indexes[name].dimension)
+    
+    def Index(self, name):
+        return self._indexes.setdefault(
+            name,
+            FakePineconeIndex(latency=self.data_latency, jitter=self.data_jitter)
+        )
@@ -0,0 +1,151 @@
+"""
+Offline evaluation of follow-up aware retrieval on the bundled FAQ dataset.
+
+Each case is a two-turn conversation: a first question, then a second
+message and the FAQ that should answer it. "follow_up" cases lean on the
+first turn ("and how long does that take?"); "topic_switch" cases ask
+something unrelated and check that blending doesn't drag results back to
+the old topic. Every case is searched with FOLLOW_UP_RETRIEVAL "off" and
+"blend", and the report gives the hit rate (expected FAQ in the results)
+and the retrieval latency, including the first turn being embedded
+beforehand as it would have been when it was asked.
+
+`--embeddings openai` needs OPENAI_API_KEY; `--embeddings bow` uses a
+feature-hashed bag of words so the harness runs offline (hit rates are
+then lexical only, and min_score defaults to 0).
+
+Usage:
+    python -m benchmarks.follow_up_eval --embeddings bow
+"""
+import argparse
+import asyncio
+import json
+import os
+import time
+
+from dotenv import load_dotenv
+
+from benchmarks.fakes import BagOfWordsEmbeddingService
+from benchmarks.kb_lifecycle import percentile
+from app.config.chat import FAQ_SEARCH_TOP_K, FAQ_SEARCH_MIN_SCORE
+from app.models.faq import FAQ
+from app.services.knowledge_base import KnowledgeBaseService
+from app.services.local_vector_store import LocalVectorStore
+
+DATASET = os.path.join(os.path.dirname(__file__), "..", "app", "data", "fintech_faqs.json")
+
+# (first question, second message, expected FAQ id, kind)
+CASES = [
+    ("What is KYC and why do I need to verify my identity?", "And how long does that take?", "faq-007", "follow_up"),
+    ("How do I withdraw money from my account?", "Are there fees for that?", "faq-004", "follow_up"),
+    ("How do I make a payment or transfer money?", "Is there a maximum?", "faq-003", "follow_up"),
+    ("How do I make a payment or transfer money?", "Can I make it repeat every month?", "faq-014", "follow_up"),
+    ("Can I use your service internationally?", "Which currencies?", "faq-015", "follow_up"),
+    ("What currencies do you support?", "How is the rate calculated?", "faq-025", "follow_up"),
+    ("What information do I need to send an international wire?", "What exchange rate will I get for it?", "faq-025", "follow_up"),
+    ("What should I do if my card is lost or stolen?", "Can I just lock it for now?", "faq-027", "follow_up"),
+    ("How do I freeze or unfreeze my card?", "And if it was stolen?", "faq-028", "follow_up"),
+    ("How do I dispute a transaction?", "What if someone paid me by mistake instead?", "faq-020", "follow_up"),
+    ("What is your refund policy?", "And if the merchant refuses, can I dispute it?", "faq-010", "follow_up"),
+    ("How do I create an account?", "Can I have more than one?", "faq-024", "follow_up"),
+    ("How do I create an account?", "And how do I close it later?", "faq-011", "follow_up"),
+    ("Is my money safe?", "How do I turn on two-factor for it?", "faq-013", "follow_up"),
+    ("What should I do if I forgot my password?", "Who do I contact if that doesn't work?", "faq-019", "follow_up"),
+    ("Do you offer a mobile app?", "Can I add money with it?", "faq-016", "follow_up"),
+    ("How do I link my bank account?", "Then how do I withdraw to it?", "faq-017", "follow_up"),
+    ("Are there any monthly fees?", "What about per transaction?", "faq-004", "follow_up"),
+    ("How do I add money to my account?", "How long until it shows up?", "faq-016", "follow_up"),
+    ("Do you report to credit bureaus?", "Will that help my score?", "faq-029", "follow_up"),
+    ("How do I create an account?", "What currencies do you support?", "faq-015", "topic_switch"),
+    ("What are the payment limits?", "How do I enable two-factor authentication?", "faq-013", "topic_switch"),
+    ("How do I freeze or unfreeze my card?", "Do you report to credit bureaus?", "faq-029", "topic_switch"),
+    ("What is your refund policy?", "How do I update my personal information?", "faq-030", "topic_switch"),
+    ("Can I schedule recurring payments?", "What should I do if I forgot my password?", "faq-012", "topic_switch"),
+    ("How do exchange rates work?", "How do I contact customer support?", "faq-019", "topic_switch"),
+]
+
+KINDS = ("follow_up", "topic_switch")
+
+
+async def run(args):
+    with open(DATASET, "r", encoding="utf-8") as f:
+        faqs = [FAQ(**faq) for faq in json.load(f)["faqs"]]
+    
+    if args.embeddings == "bow":
+        embedding_service = BagOfWordsEmbeddingService()
+    else:
+        from app.services.embeddings import EmbeddingService
+        embedding_service = EmbeddingService()
+    
+    kb_service = KnowledgeBaseService(
+        embedding_service=embedding_service,
+        vector_store=LocalVectorStore(path="", dimension=embedding_service.dimension)
+    )
+    await kb_service.add_faqs_batch(faqs)
+    
+    min_score = args.min_score
+    if min_score is None:
+        min_score = 0.0 if args.embeddings == "bow" else FAQ_SEARCH_MIN_SCORE
+    
+    summary = {}
+    for mode in ("off", "blend"):
+        hits = dict.fromkeys(KINDS, 0)
+        totals = dict.fromkeys(KINDS, 0)
+        latencies = []
+        misses = []
+        for first, second, expected_id, kind in CASES:
+            history = [
+                {"role": "user", "content": first},
+                {"role": "assistant", "content": "(answer)"}
+            ]
+            # The first turn was embedded when it was asked
+            await kb_service.embed_query(first)
+            
+            start = time.perf_counter()
+            query, query_embedding = await kb_service.contextual_query(second, history, mode=mode)
+            results = await kb_service.search_faqs(
+                query,
+                top_k=args.top_k,
+                min_score=min_score,
+                query_embedding=query_embedding
+            )
+            latencies.append((time.perf_counter() - start) * 1000)
+            
+            hit = any(result.faq.id == expected_id for result in results)
+            totals[kind] += 1
+            hits[kind] += hit
+            if not hit:
+                misses.append(second)
+        
+        summary[mode] = {
+            **{f"hit_rate_{kind}": hits[kind] / totals[kind] for kind in KINDS},
+            "latency_p50_ms": percentile(latencies, 50),
+            "latency_p99_ms": percentile(latencies, 99),
+            "misses": misses
+        }
+    
+    summary["added_latency_p50_ms"] = summary["blend"]["latency_p50_ms"] - summary["off"]["latency_p50_ms"]
+    
+    kb_service.close()
+    print(json.dumps({
+        "cases": len(CASES),
+        "embeddings": args.embeddings,
+        "top_k": args.top_k,
+        "min_score": min_score,
+        **summary
+    }, indent=2))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--embeddings", choices=["openai", "bow"], default="openai")
+    parser.add_argument("--top-k", type=int, default=FAQ_SEARCH_TOP_K)
+    parser.add_argument("--min-score", type=float, default=None)
+    args = parser.parse_args()
+    
+    load_dotenv()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
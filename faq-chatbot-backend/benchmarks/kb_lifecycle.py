@@ -0,0 +1,78 @@
+"""
+Compare per-request KnowledgeBaseService construction (the old path) with the
+process-wide instance created in the app lifespan.
+
+Usage:
+    python -m benchmarks.kb_lifecycle --requests 200 --control-latency 0.05
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import time
+
+from benchmarks.fakes import FakeEmbeddingService, FakePinecone
+from app.services import vector_store
+from app.services.knowledge_base import KnowledgeBaseService
+from app.services.vector_store import VectorStore
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+async def run(requests: int, embedding_service: FakeEmbeddingService):
+    async def per_request_path():
+        kb_service = KnowledgeBaseService(
+            embedding_service=embedding_service,
+            vector_store=VectorStore()
+        )
+        await kb_service.search_faqs("How do I reset my password?", top_k=3, min_score=0.0)
+        kb_service.close()
+    
+    shared = KnowledgeBaseService(embedding_service=embedding_service, vector_store=VectorStore())
+    await shared.warm_up()
+    
+    async def shared_path():
+        await shared.search_faqs("How do I reset my password?", top_k=3, min_score=0.0)
+    
+    results = {}
+    for name, path in (("per_request", per_request_path), ("lifespan", shared_path)):
+        samples = []
+        for _ in range(requests):
+            start = time.perf_counter()
+            await path()
+            samples.append((time.perf_counter() - start) * 1000)
+        results[name] = samples
+    
+    for name, samples in results.items():
+        print(
+            f"{name:<12} p50={statistics.median(samples):8.2f}ms "
+            f"p99={percentile(samples, 99):8.2f}ms mean={statistics.mean(samples):8.2f}ms"
+        )
+    
+    saved = statistics.mean(results["per_request"]) - statistics.mean(results["lifespan"])
+    print(f"saved per request: {saved:.2f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--control-latency", type=float, default=0.05,
+                        help="Seconds per Pinecone control-plane call (list_indexes)")
+    parser.add_argument("--data-latency", type=float, default=0.01,
+                        help="Seconds per Pinecone data-plane call (query)")
+    args = parser.parse_args()
+    
+    os.environ.setdefault("PINECONE_API_KEY", "benchmark")
+    FakePinecone.control_latency = args.control_latency
+    FakePinecone.data_latency = args.data_latency
+    vector_store.Pinecone = FakePinecone
+    
+    asyncio.run(run(args.requests, FakeEmbeddingService()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""
+Per-request cost of the hot-path metrics.
+
+Times histogram observations, counter increments and the full set of
+updates a chat request makes (seven stage timings with their
+`perf_counter` calls, cache and stream counters, the in-flight gauge), and
+how long rendering `/metrics` takes.
+
+Usage:
+    python -m benchmarks.metrics_overhead
+"""
+import argparse
+import json
+import time
+import timeit
+
+from app.utils.metrics import CACHE_LOOKUPS, CHAT_STREAMS, STAGE_SECONDS, STREAMS_IN_FLIGHT, registry
+
+
+def per_call_ns(fn, number):
+    return round(min(timeit.repeat(fn, number=number, repeat=5)) / number * 1e9, 1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--number", type=int, default=200000)
+    args = parser.parse_args()
+    
+    stage = STAGE_SECONDS.labels("vector_search")
+    hit = CACHE_LOOKUPS.labels("embedding", "hit")
+    completed = CHAT_STREAMS.labels("completed")
+    stages = [STAGE_SECONDS.labels(name) for name in (
+        "jwt_verification", "query_embedding", "vector_search", "context_formatting", "first_token", "stream"
+    )]
+    
+    def request():
+        STREAMS_IN_FLIGHT.inc()
+        for histogram in stages:
+            start = time.perf_counter()
+            histogram.observe(time.perf_counter() - start)
+        hit.inc()
+        completed.inc()
+        STREAMS_IN_FLIGHT.dec()
+    
+    print(json.dumps({
+        "histogram_observe_ns": per_call_ns(lambda: stage.observe(0.012), args.number),
+        "counter_inc_ns": per_call_ns(hit.inc, args.number),
+        "per_request_ns": per_call_ns(request, args.number // 10),
+        "render_us": round(per_call_ns(registry.render, 1000) / 1000, 1)
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+"""
+Category partitions and centroid routing on the bundled FAQ dataset.
+
+Runs the `retrieval_recall` queries unfiltered through a global-only index
+and through category routing with 1 and 2 routed partitions, and every
+FAQ question filtered by its own category through a metadata filter and
+through its partition. Reports hit rate of the expected FAQ, vectors
+scanned per query, routing fallbacks and search latency.
+
+`--replicate N` copies the dataset N times (with distinct ids) so scan
+counts and latencies reflect a larger index.
+
+`--embeddings openai` needs OPENAI_API_KEY; `--embeddings bow` runs offline.
+
+Usage:
+    python -m benchmarks.partition_eval --embeddings bow --replicate 50
+"""
+import argparse
+import asyncio
+import json
+import time
+
+from dotenv import load_dotenv
+
+from benchmarks.fakes import BagOfWordsEmbeddingService
+from benchmarks.kb_lifecycle import percentile
+from benchmarks.retrieval_recall import DATASET, load_queries
+from app.config.chat import FAQ_SEARCH_TOP_K, FAQ_SEARCH_MIN_SCORE
+from app.models.faq import FAQ
+from app.services import knowledge_base
+from app.services.knowledge_base import KnowledgeBaseService
+from app.services.local_vector_store import LocalVectorStore
+
+
+async def evaluate(kb_service, queries, top_k, min_score, by_category=False, index_size=None):
+    hits = 0
+    scanned = []
+    latencies = []
+    for query, expected_id, category in queries:
+        start = time.perf_counter()
+        results, plan = await kb_service.search_faqs_with_plan(
+            query,
+            top_k=top_k,
+            category=category if by_category else None,
+            min_score=min_score
+        )
+        latencies.append((time.perf_counter() - start) * 1000)
+        hits += any(result.faq.id.split("#")[0] == expected_id for result in results)
+        # Without partitions every search scans the whole index
+        scanned.append(plan["vectors_scanned"] if plan["vectors_scanned"] is not None else index_size)
+    return {
+        "hit_rate": round(hits / len(queries), 4),
+        "avg_vectors_scanned": round(sum(scanned) / len(scanned), 1),
+        "search_p50_ms": percentile(latencies, 50),
+        "search_p99_ms": percentile(latencies, 99)
+    }
+
+
+async def build(faqs, embedding_service, partitions, routing):
+    kb_service = KnowledgeBaseService(
+        embedding_service=embedding_service,
+        vector_store=LocalVectorStore(path="", dimension=embedding_service.dimension)
+    )
+    kb_service.search_mode = "dense"
+    kb_service.reranker = None
+    kb_service.partitions_enabled = partitions
+    kb_service.routing_enabled = routing
+    await kb_service.add_faqs_batch(faqs)
+    return kb_service
+
+
+async def run(args):
+    with open(DATASET, "r", encoding="utf-8") as f:
+        faqs = [FAQ(**faq) for faq in json.load(f)["faqs"]]
+    indexed = [
+        faq.model_copy(update={"id": faq.id if copy == 0 else f"{faq.id}#{copy}"})
+        for copy in range(args.replicate)
+        for faq in faqs
+    ]
+    
+    if args.embeddings == "bow":
+        embedding_service = BagOfWordsEmbeddingService()
+    else:
+        from app.services.embeddings import EmbeddingService
+        embedding_service = EmbeddingService()
+    
+    min_score = args.min_score
+    if min_score is None:
+        min_score = 0.0 if args.embeddings == "bow" else FAQ_SEARCH_MIN_SCORE
+    categories = {faq.id: faq.category for faq in faqs}
+    queries = [(query, expected_id, categories[expected_id]) for query, expected_id, _ in load_queries(faqs)]
+    filtered = [(faq.question, faq.id, faq.category) for faq in faqs]
+    
+    summary = {}
+    kb_service = await build(indexed, embedding_service, partitions=False, routing=False)
+    summary["global"] = await evaluate(kb_service, queries, args.top_k, min_score, index_size=len(indexed))
+    summary["category_filter"] = await evaluate(
+        kb_service, filtered, args.top_k, min_score, by_category=True, index_size=len(indexed)
+    )
+    kb_service.close()
+    
+    kb_service = await build(indexed, embedding_service, partitions=True, routing=True)
+    summary["category_partition"] = await evaluate(kb_service, filtered, args.top_k, min_score, by_category=True)
+    for top_n in (1, 2):
+        knowledge_base.CATEGORY_ROUTE_TOP_N = top_n
+        kb_service.route_fallbacks = 0
+        result = await evaluate(kb_service, queries, args.top_k, min_score)
+        result["fallback_rate"] = round(kb_service.route_fallbacks / len(queries), 4)
+        summary[f"routed_top_{top_n}"] = result
+    summary["partitions"] = kb_service.partition_stats()
+    kb_service.close()
+    
+    print(json.dumps({
+        "queries": len(queries),
+        "indexed_faqs": len(indexed),
+        "embeddings": args.embeddings,
+        "top_k": args.top_k,
+        "min_score": min_score,
+        "fallback_score": knowledge_base.CATEGORY_ROUTE_FALLBACK_SCORE,
+        **summary
+    }, indent=2))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--embeddings", choices=["openai", "bow"], default="openai")
+    parser.add_argument("--top-k", type=int, default=FAQ_SEARCH_TOP_K)
+    parser.add_argument("--min-score", type=float, default=None)
+    parser.add_argument("--replicate", type=int, default=1)
+    parser.add_argument("--fallback-score", type=float, default=None)
+    args = parser.parse_args()
+    
+    load_dotenv()
+    if args.fallback_score is not None:
+        knowledge_base.CATEGORY_ROUTE_FALLBACK_SCORE = args.fallback_score
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
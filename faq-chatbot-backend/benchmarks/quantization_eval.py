@@ -0,0 +1,168 @@
+"""
+Recall, latency and memory of the local index at float32, float16 and int8
+precision.
+
+Part one indexes the bundled FAQs and runs the `retrieval_recall` queries
+against each precision: recall@top_k of the expected FAQ, agreement of the
+returned ids with float32, and bytes per FAQ for vectors plus metadata,
+with answers in the metadata and in the document store.
+
+Part two builds a synthetic index of `--vectors` random unit vectors,
+saved to a temporary directory so compact precisions re-score from the
+memory-mapped full-precision file, and reports search latency and top-10
+agreement with exact float32 search.
+
+`--embeddings openai` needs OPENAI_API_KEY; `--embeddings bow` runs offline.
+
+Usage:
+    python -m benchmarks.quantization_eval --embeddings bow
+"""
+import argparse
+import asyncio
+import json
+import shutil
+import tempfile
+import time
+
+import numpy as np
+from dotenv import load_dotenv
+
+from benchmarks.fakes import BagOfWordsEmbeddingService
+from benchmarks.kb_lifecycle import percentile
+from benchmarks.retrieval_recall import DATASET, load_queries
+from app.config.chat import FAQ_SEARCH_TOP_K
+from app.models.faq import FAQ
+from app.services.document_store import DocumentStore
+from app.services.knowledge_base import KnowledgeBaseService
+from app.services.local_vector_store import LocalVectorStore
+
+PRECISIONS = ("float32", "float16", "int8")
+
+
+def metadata_bytes(store, namespace):
+    with store._lock:
+        return sum(len(json.dumps(meta)) for meta in store._namespaces[namespace].metadata)
+
+
+async def faq_recall(args, faqs, embedding_service):
+    queries = load_queries(faqs)
+    query_vectors = [await embedding_service.generate_embedding(query) for query, _, _ in queries]
+    
+    summary = {}
+    baseline = None
+    for precision in PRECISIONS:
+        for with_documents in (False, True):
+            # Saved to disk so compact precisions only keep the scan matrix resident
+            path = tempfile.mkdtemp()
+            store = LocalVectorStore(path=path, dimension=embedding_service.dimension, precision=precision)
+            kb_service = KnowledgeBaseService(
+                embedding_service=embedding_service,
+                vector_store=store,
+                document_store=DocumentStore(path="") if with_documents else None
+            )
+            if not with_documents:
+                # Force answers into the metadata even if a path is configured
+                kb_service.document_store = None
+            await kb_service.add_faqs_batch(faqs)
+            
+            stats = store.get_stats(namespace=kb_service.namespace)["namespaces"][kb_service.namespace]
+            per_faq = (stats["memory_bytes"] + metadata_bytes(store, kb_service.namespace)) / len(faqs)
+            if with_documents:
+                summary[precision]["bytes_per_faq_with_document_store"] = round(per_faq)
+                summary[precision]["document_store_bytes_per_faq"] = round(
+                    kb_service.document_store.stats()["memory_bytes"] / len(faqs)
+                )
+                kb_service.close()
+                shutil.rmtree(path)
+                continue
+            
+            hits = 0
+            ids = []
+            for (_, expected_id, _), vector in zip(queries, query_vectors):
+                matches = store.search(vector, top_k=args.top_k, namespace=kb_service.namespace)
+                ids.append([match.id for match in matches])
+                hits += expected_id in ids[-1]
+            if baseline is None:
+                baseline = ids
+            agreement = np.mean([a == b for a, b in zip(ids, baseline)])
+            
+            summary[precision] = {
+                f"recall_at_{args.top_k}": round(hits / len(queries), 4),
+                "same_results_as_float32": round(float(agreement), 4),
+                "bytes_per_faq": round(per_faq)
+            }
+            kb_service.close()
+            shutil.rmtree(path)
+    return {"queries": len(queries), **summary}
+
+
+def synthetic_scan(args):
+    rng = np.random.default_rng(0)
+    vectors = rng.standard_normal((args.vectors, args.dimension), dtype=np.float32)
+    queries = vectors[rng.choice(args.vectors, args.queries, replace=False)]
+    queries = queries + 0.5 * rng.standard_normal(queries.shape, dtype=np.float32)
+    ids = [str(i) for i in range(args.vectors)]
+    
+    summary = {}
+    baseline = None
+    for precision in PRECISIONS:
+        with tempfile.TemporaryDirectory() as path:
+            store = LocalVectorStore(path=path, dimension=args.dimension, precision=precision)
+            for start in range(0, args.vectors, 10000):
+                store.upsert([(ids[i], vectors[i]) for i in range(start, min(start + 10000, args.vectors))])
+            store.flush()
+            
+            latencies = []
+            results = []
+            for query in queries:
+                begin = time.perf_counter()
+                matches = store.search(query, top_k=10, include_metadata=False)
+                latencies.append((time.perf_counter() - begin) * 1000)
+                results.append({match.id for match in matches})
+            if baseline is None:
+                baseline = results
+            
+            summary[precision] = {
+                "search_p50_ms": percentile(latencies, 50),
+                "search_p99_ms": percentile(latencies, 99),
+                "recall_at_10_vs_float32": round(
+                    float(np.mean([len(a & b) / 10 for a, b in zip(results, baseline)])), 4
+                ),
+                "resident_mb": round(store.get_stats()["namespaces"][""]["memory_bytes"] / 2 ** 20, 1)
+            }
+            store.close()
+    return {"vectors": args.vectors, "dimension": args.dimension, **summary}
+
+
+async def run(args):
+    with open(DATASET, "r", encoding="utf-8") as f:
+        faqs = [FAQ(**faq) for faq in json.load(f)["faqs"]]
+    
+    if args.embeddings == "bow":
+        embedding_service = BagOfWordsEmbeddingService()
+    else:
+        from app.services.embeddings import EmbeddingService
+        embedding_service = EmbeddingService()
+    
+    print(json.dumps({
+        "embeddings": args.embeddings,
+        "faqs": await faq_recall(args, faqs, embedding_service),
+        "synthetic": synthetic_scan(args)
+    }, indent=2))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--embeddings", choices=["openai", "bow"], default="openai")
+    parser.add_argument("--top-k", type=int, default=FAQ_SEARCH_TOP_K)
+    parser.add_argument("--vectors", type=int, default=50000)
+    parser.add_argument("--dimension", type=int, default=1536)
+    parser.add_argument("--queries", type=int, default=200)
+    args = parser.parse_args()
+    
+    load_dotenv()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
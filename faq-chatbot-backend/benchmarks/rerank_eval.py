@@ -0,0 +1,141 @@
+"""
+Quality and latency benchmark for the re-ranking stage on the bundled FAQs.
+
+Uses the queries of `retrieval_recall` (keywords alone, keywords in a
+sentence, questions with a conversational prefix) and compares the
+first-stage order against re-ranking 5/10/20/40 over-fetched candidates.
+Reports recall@1, recall@top_k, MRR, end-to-end search latency and the
+re-ranking time alone, which is what RERANK_TIMEOUT_MS has to cover.
+
+`--embeddings openai` needs OPENAI_API_KEY; `--embeddings bow` uses a
+feature-hashed bag of words so it runs offline (min_score then defaults
+to 0).
+
+Usage:
+    python -m benchmarks.rerank_eval --embeddings bow
+"""
+import argparse
+import asyncio
+import json
+import time
+
+from dotenv import load_dotenv
+
+from benchmarks.fakes import BagOfWordsEmbeddingService
+from benchmarks.kb_lifecycle import percentile
+from benchmarks.retrieval_recall import DATASET, load_queries
+from app.config.chat import FAQ_SEARCH_TOP_K, FAQ_SEARCH_MIN_SCORE
+from app.models.faq import FAQ
+from app.services import knowledge_base
+from app.services.knowledge_base import KnowledgeBaseService
+from app.services.local_vector_store import LocalVectorStore
+from app.services.reranker import FeatureReranker
+
+CANDIDATE_COUNTS = (5, 10, 20, 40)
+
+
+async def evaluate(kb_service, queries, top_k, min_score, mode):
+    hits_at_1 = hits_at_k = 0
+    reciprocal_ranks = 0.0
+    latencies = []
+    for query, expected_id, _ in queries:
+        start = time.perf_counter()
+        results = await kb_service.search_faqs(query, top_k=top_k, min_score=min_score, mode=mode)
+        latencies.append((time.perf_counter() - start) * 1000)
+        
+        ids = [result.faq.id for result in results]
+        if expected_id in ids:
+            rank = ids.index(expected_id) + 1
+            hits_at_1 += rank == 1
+            hits_at_k += 1
+            reciprocal_ranks += 1 / rank
+    
+    return {
+        "recall_at_1": round(hits_at_1 / len(queries), 4),
+        f"recall_at_{top_k}": round(hits_at_k / len(queries), 4),
+        "mrr": round(reciprocal_ranks / len(queries), 4),
+        "search_p50_ms": percentile(latencies, 50),
+        "search_p99_ms": percentile(latencies, 99)
+    }
+
+
+async def run(args):
+    with open(DATASET, "r", encoding="utf-8") as f:
+        faqs = [FAQ(**faq) for faq in json.load(f)["faqs"]]
+    
+    if args.embeddings == "bow":
+        embedding_service = BagOfWordsEmbeddingService()
+    else:
+        from app.services.embeddings import EmbeddingService
+        embedding_service = EmbeddingService()
+    
+    kb_service = KnowledgeBaseService(
+        embedding_service=embedding_service,
+        vector_store=LocalVectorStore(path="", dimension=embedding_service.dimension)
+    )
+    kb_service.search_mode = args.mode
+    await kb_service.add_faqs_batch(faqs)
+    queries = load_queries(faqs)
+    
+    min_score = args.min_score
+    if min_score is None:
+        min_score = 0.0 if args.embeddings == "bow" else FAQ_SEARCH_MIN_SCORE
+    
+    reranker = FeatureReranker(timeout_ms=args.timeout_ms)
+    summary = {}
+    
+    kb_service.reranker = None
+    summary["first_stage"] = await evaluate(kb_service, queries, args.top_k, min_score, args.mode)
+    
+    for candidates in CANDIDATE_COUNTS:
+        knowledge_base.RERANK_CANDIDATES = candidates
+        
+        # Re-ranking cost alone, on the same candidate pools the search sees
+        kb_service.reranker = None
+        pools = [
+            (query, await kb_service.search_faqs(query, top_k=candidates, min_score=min_score, mode=args.mode))
+            for query, _, _ in queries
+        ]
+        rerank_times = []
+        for query, pool in pools:
+            start = time.perf_counter()
+            reranker.rerank_sync(query, pool)
+            rerank_times.append((time.perf_counter() - start) * 1000)
+        
+        kb_service.reranker = reranker
+        summary[f"rerank_{candidates}"] = {
+            **await evaluate(kb_service, queries, args.top_k, min_score, args.mode),
+            "rerank_p50_ms": percentile(rerank_times, 50),
+            "rerank_p99_ms": percentile(rerank_times, 99)
+        }
+    
+    summary["timeouts"] = reranker.timeouts
+    reranker.close()
+    kb_service.reranker = None
+    kb_service.close()
+    print(json.dumps({
+        "queries": len(queries),
+        "embeddings": args.embeddings,
+        "mode": args.mode,
+        "top_k": args.top_k,
+        "min_score": min_score,
+        "timeout_ms": args.timeout_ms,
+        **summary
+    }, indent=2))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--embeddings", choices=["openai", "bow"], default="openai")
+    parser.add_argument("--mode", choices=["dense", "hybrid"], default="dense")
+    parser.add_argument("--top-k", type=int, default=FAQ_SEARCH_TOP_K)
+    parser.add_argument("--min-score", type=float, default=None)
+    parser.add_argument("--timeout-ms", type=float, default=20)
+    args = parser.parse_args()
+    
+    load_dotenv()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""
+Recall benchmark for dense-only vs hybrid (dense + BM25) retrieval on the
+bundled FAQ dataset.
+
+Every FAQ keyword is used as a query on its own ("keyword_exact", which
+hybrid mode answers from the lexical index alone) and inside a sentence
+("keyword_in_sentence"); every question is used with a conversational
+prefix ("question"). The expected answer is the FAQ the query came from. Queries are run through KnowledgeBaseService.search_faqs
+with the chat defaults (top_k, min_score) against an in-memory local index.
+Dense retrieval needs OPENAI_API_KEY; `--fake-embeddings` uses hash vectors
+so the harness can run offline (dense recall is then meaningless).
+
+Usage:
+    python -m benchmarks.retrieval_recall
+"""
+import argparse
+import asyncio
+import json
+import os
+import time
+
+from dotenv import load_dotenv
+
+from benchmarks.fakes import FakeEmbeddingService
+from benchmarks.kb_lifecycle import percentile
+from app.config.chat import FAQ_SEARCH_TOP_K, FAQ_SEARCH_MIN_SCORE
+from app.models.faq import FAQ
+from app.services.knowledge_base import KnowledgeBaseService
+from app.services.local_vector_store import LocalVectorStore
+
+DATASET = os.path.join(os.path.dirname(__file__), "..", "app", "data", "fintech_faqs.json")
+
+
+QUERY_KINDS = ("keyword_exact", "keyword_in_sentence", "question")
+
+
+def load_queries(faqs):
+    queries = []
+    for faq in faqs:
+        for keyword in faq.keywords:
+            queries.append((keyword, faq.id, "keyword_exact"))
+            queries.append((f"I have a question about {keyword}", faq.id, "keyword_in_sentence"))
+        queries.append((f"Hi, quick question: {faq.question}", faq.id, "question"))
+    return queries
+
+
+async def run(args):
+    with open(DATASET, "r", encoding="utf-8") as f:
+        faqs = [FAQ(**faq) for faq in json.load(f)["faqs"]]
+    
+    if args.fake_embeddings:
+        embedding_service = FakeEmbeddingService()
+    else:
+        from app.services.embeddings import EmbeddingService
+        embedding_service = EmbeddingService()
+    
+    kb_service = KnowledgeBaseService(
+        embedding_service=embedding_service,
+        vector_store=LocalVectorStore(path="", dimension=embedding_service.dimension)
+    )
+    # Keeps the BM25 index up to date during ingestion; each search picks its mode
+    kb_service.search_mode = "hybrid"
+    await kb_service.add_faqs_batch(faqs)
+    queries = load_queries(faqs)
+    
+    summary = {}
+    for mode in ("dense", "hybrid"):
+        hits = dict.fromkeys(QUERY_KINDS, 0)
+        totals = dict.fromkeys(QUERY_KINDS, 0)
+        latencies = []
+        for query, expected_id, kind in queries:
+            start = time.perf_counter()
+            results = await kb_service.search_faqs(
+                query,
+                top_k=args.top_k,
+                min_score=args.min_score,
+                mode=mode
+            )
+            latencies.append((time.perf_counter() - start) * 1000)
+            totals[kind] += 1
+            hits[kind] += any(result.faq.id == expected_id for result in results)
+        
+        summary[mode] = {
+            **{f"recall_{kind}": hits[kind] / totals[kind] for kind in QUERY_KINDS},
+            "recall_all": sum(hits.values()) / sum(totals.values()),
+            "latency_p50_ms": percentile(latencies, 50),
+            "latency_p99_ms": percentile(latencies, 99)
+        }
+    
+    lexical_times = []
+    for query, _, _ in queries:
+        start = time.perf_counter()
+        kb_service.lexical_index.search(query, top_k=args.top_k * 4)
+        lexical_times.append((time.perf_counter() - start) * 1e6)
+    summary["lexical_only"] = {
+        "latency_p50_us": percentile(lexical_times, 50),
+        "latency_p99_us": percentile(lexical_times, 99)
+    }
+    
+    kb_service.close()
+    print(json.dumps({"queries": len(queries), "top_k": args.top_k, "min_score": args.min_score, **summary}, indent=2))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--top-k", type=int, default=FAQ_SEARCH_TOP_K)
+    parser.add_argument("--min-score", type=float, default=FAQ_SEARCH_MIN_SCORE)
+    parser.add_argument("--fake-embeddings", action="store_true")
+    args = parser.parse_args()
+    
+    load_dotenv()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
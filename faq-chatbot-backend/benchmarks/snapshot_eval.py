@@ -0,0 +1,178 @@
+"""
+Snapshot export, startup cost and hot swap on the bundled FAQ dataset.
+
+Indexes the FAQs (replicated `--replicate` times) into a saved local index,
+exports a snapshot, and compares the time to open each from disk and their
+resident memory. Checks that searches against the snapshot return the same
+FAQs as the local index, then swaps between two snapshots while
+`--concurrency` searches run in a loop and reports failed searches and
+latency around the swap.
+
+`--embeddings openai` needs OPENAI_API_KEY; `--embeddings bow` runs offline.
+
+Usage:
+    python -m benchmarks.snapshot_eval --embeddings bow --replicate 50
+"""
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+import time
+
+from dotenv import load_dotenv
+
+from benchmarks.fakes import BagOfWordsEmbeddingService
+from benchmarks.kb_lifecycle import percentile
+from benchmarks.retrieval_recall import DATASET, load_queries
+from app.config.chat import FAQ_SEARCH_TOP_K
+from app.models.faq import FAQ
+from app.services.knowledge_base import KnowledgeBaseService
+from app.services.local_vector_store import LocalVectorStore
+from app.services.snapshot import SnapshotVectorStore
+
+
+def open_time(factory, repeats=5):
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        store = factory()
+        timings.append((time.perf_counter() - start) * 1000)
+        store.close()
+    return percentile(timings, 50)
+
+
+async def search_loop(kb_service, queries, top_k, stop, latencies, failures):
+    i = 0
+    while not stop.is_set():
+        query = queries[i % len(queries)][0]
+        i += 1
+        start = time.perf_counter()
+        try:
+            await kb_service.search_faqs(query, top_k=top_k, min_score=0.0)
+        except Exception:
+            failures.append(query)
+        latencies.append((time.perf_counter() - start) * 1000)
+
+
+async def run(args):
+    with open(DATASET, "r", encoding="utf-8") as f:
+        faqs = [FAQ(**faq) for faq in json.load(f)["faqs"]]
+    indexed = [
+        faq.model_copy(update={"id": faq.id if copy == 0 else f"{faq.id}#{copy}"})
+        for copy in range(args.replicate)
+        for faq in faqs
+    ]
+    queries = load_queries(faqs)
+    
+    if args.embeddings == "bow":
+        embedding_service = BagOfWordsEmbeddingService()
+    else:
+        from app.services.embeddings import EmbeddingService
+        embedding_service = EmbeddingService()
+    dimension = embedding_service.dimension
+    
+    with tempfile.TemporaryDirectory() as root:
+        index_path = os.path.join(root, "index")
+        kb_service = KnowledgeBaseService(
+            embedding_service=embedding_service,
+            vector_store=LocalVectorStore(path=index_path, dimension=dimension)
+        )
+        kb_service.search_mode = "dense"
+        kb_service.reranker = None
+        await kb_service.add_faqs_batch(indexed)
+        await kb_service.vector_store.flush()
+        namespace = kb_service.namespace
+        
+        start = time.perf_counter()
+        manifest = await kb_service.export_snapshot(os.path.join(root, "a"))
+        export_ms = (time.perf_counter() - start) * 1000
+        await kb_service.export_snapshot(os.path.join(root, "b"))
+        
+        local_results = [
+            [result.faq.id for result in await kb_service.search_faqs(query, top_k=args.top_k, min_score=0.0)]
+            for query, _, _ in queries
+        ]
+        kb_service.close()
+        
+        local = LocalVectorStore(path=index_path, dimension=dimension)
+        snapshot = SnapshotVectorStore(path=os.path.join(root, "a"), dimension=dimension)
+        summary = {
+            "export_ms": round(export_ms, 1),
+            "snapshot_bytes": sum(
+                os.path.getsize(os.path.join(root, "a", name)) for name in os.listdir(os.path.join(root, "a"))
+            ),
+            "open_p50_ms": {
+                "local": open_time(lambda: LocalVectorStore(path=index_path, dimension=dimension)),
+                "snapshot": open_time(lambda: SnapshotVectorStore(path=os.path.join(root, "a"), dimension=dimension))
+            },
+            "resident_bytes": {
+                "local": local.get_stats()["namespaces"][namespace]["memory_bytes"],
+                # Vectors are read through the page cache, not copied
+                "snapshot": 0
+            }
+        }
+        local.close()
+        
+        kb_service = KnowledgeBaseService(embedding_service=embedding_service, vector_store=snapshot)
+        kb_service.search_mode = "dense"
+        kb_service.reranker = None
+        snapshot_results = [
+            [result.faq.id for result in await kb_service.search_faqs(query, top_k=args.top_k, min_score=0.0)]
+            for query, _, _ in queries
+        ]
+        summary["same_results_as_local"] = round(
+            sum(a == b for a, b in zip(local_results, snapshot_results)) / len(queries), 4
+        )
+        
+        stop = asyncio.Event()
+        latencies = []
+        failures = []
+        workers = [
+            asyncio.create_task(search_loop(kb_service, queries, args.top_k, stop, latencies, failures))
+            for _ in range(args.concurrency)
+        ]
+        await asyncio.sleep(0.5)
+        before = len(latencies)
+        swaps = []
+        for target in ("b", "a", "b", "a"):
+            start = time.perf_counter()
+            await kb_service.swap_snapshot(os.path.join(root, target))
+            swaps.append((time.perf_counter() - start) * 1000)
+            await asyncio.sleep(0.2)
+        stop.set()
+        await asyncio.gather(*workers)
+        
+        summary["swap"] = {
+            "swaps": len(swaps),
+            "swap_p50_ms": percentile(swaps, 50),
+            "searches": len(latencies),
+            "failed_searches": len(failures),
+            "search_p50_ms_before": percentile(latencies[:before], 50),
+            "search_p99_ms_during": percentile(latencies[before:], 99)
+        }
+        kb_service.close()
+    
+    print(json.dumps({
+        "indexed_faqs": len(indexed),
+        "embeddings": args.embeddings,
+        "dimension": dimension,
+        "snapshot_format": manifest["format"],
+        **summary
+    }, indent=2))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--embeddings", choices=["openai", "bow"], default="openai")
+    parser.add_argument("--top-k", type=int, default=FAQ_SEARCH_TOP_K)
+    parser.add_argument("--replicate", type=int, default=1)
+    parser.add_argument("--concurrency", type=int, default=8)
+    args = parser.parse_args()
+    
+    load_dotenv()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,189 @@
+"""
+Load test for the chat SSE stream while vector search latency is injected.
+
+Runs many concurrent `/chat/message` generators against a fake Pinecone
+index whose queries sleep for `--search-latency` seconds, and reports the
+p50/p99 gap between streamed SSE frames and frames per answer. With the
+async vector store the gap stays at the coalescing window (or the token
+interval, if longer); calling the store inline on the event loop
+(`--mode blocking`) makes every stream stall behind every search.
+
+`--pipeline parallel` runs the latency-optimised chat pipeline: the fake
+upstream connection (`--connect-latency`) is opened while retrieval runs,
+and retrieval slower than `--deadline` is dropped. Per-request retrieval,
+first-token and TTFB percentiles come from the router's timing log.
+
+`--disconnect-after` drops every client that many seconds into its stream
+and reports how many model tokens were still generated afterwards.
+
+Usage:
+    python -m benchmarks.stream_load --streams 20 --search-latency 0.2
+    python -m benchmarks.stream_load --pipeline parallel --connect-latency 0.15
+    python -m benchmarks.stream_load --disconnect-after 0.3
+"""
+import argparse
+import asyncio
+import os
+import time
+
+from benchmarks.fakes import FakeEmbeddingService, FakePinecone
+from benchmarks.kb_lifecycle import percentile
+from app.routers import chat
+from app.services import vector_store
+from app.services.knowledge_base import KnowledgeBaseService
+from app.services.vector_store import AsyncVectorStore, VectorStore
+
+
+class BlockingVectorStore(AsyncVectorStore):
+    """
+    Calls the synchronous store inline, reproducing the pre-async behaviour.
+    """
+    async def _run(self, func, *args, **kwargs):
+        return func(*args, **kwargs)
+
+
+class FakeRequest:
+    """
+    Stands in for the Starlette request; only disconnect detection is used.
+    """
+    def __init__(self):
+        self.disconnected = False
+    
+    async def is_disconnected(self) -> bool:
+        return self.disconnected
+
+
+class FakeUpstream:
+    """
+    Connection pool of a fake model API: a stream that finds no idle
+    connection pays `connect_latency` before its first token.
+    """
+    def __init__(self, connect_latency: float):
+        self.connect_latency = connect_latency
+        self.idle = 0
+        self.tokens = 0
+    
+    async def prewarm(self):
+        await asyncio.sleep(self.connect_latency)
+        self.idle += 1
+    
+    def chat_response(self, tokens: int, interval: float):
+        async def generate_chat_response(message, history=None, context="", **kwargs):
+            if self.idle:
+                self.idle -= 1
+            else:
+                await asyncio.sleep(self.connect_latency)
+            try:
+                for i in range(tokens):
+                    await asyncio.sleep(interval)
+                    self.tokens += 1
+                    yield f"token{i} "
+            finally:
+                self.idle += 1
+        return generate_chat_response
+
+
+async def consume_stream(
+    kb_service: KnowledgeBaseService,
+    delay: float,
+    gaps: list,
+    first_chunk: list,
+    frames: list,
+    disconnect_after: float
+):
+    await asyncio.sleep(delay)
+    request = FakeRequest()
+    response = await chat.send_message(
+        request,
+        chat.ChatMessage(message="How do I reset my password?"),
+        current_user={"id": "benchmark"},
+        kb_service=kb_service
+    )
+    start = time.perf_counter()
+    last = None
+    count = 0
+    async for frame in response.body_iterator:
+        now = time.perf_counter()
+        if last is None:
+            first_chunk.append((now - start) * 1000)
+        else:
+            gaps.append((now - last) * 1000)
+        last = now
+        count += frame.startswith("data:")
+        if disconnect_after and now - start >= disconnect_after:
+            request.disconnected = True
+    frames.append(count)
+
+
+async def run(args, upstream: FakeUpstream):
+    kb_service = KnowledgeBaseService(
+        embedding_service=FakeEmbeddingService(),
+        vector_store=VectorStore()
+    )
+    if args.mode == "blocking":
+        kb_service.vector_store = BlockingVectorStore(kb_service.vector_store.store)
+    
+    gaps, first_chunk, frames = [], [], []
+    start = time.perf_counter()
+    await asyncio.gather(*(
+        consume_stream(kb_service, i * args.arrival_interval, gaps, first_chunk, frames, args.disconnect_after)
+        for i in range(args.streams)
+    ))
+    elapsed = time.perf_counter() - start
+    # Let cancelled upstreams finish unwinding
+    await asyncio.sleep(args.token_interval * 2)
+    kb_service.close()
+    
+    print(
+        f"mode={args.mode} pipeline={args.pipeline} streams={args.streams} "
+        f"search_latency={args.search_latency}s connect_latency={args.connect_latency}s"
+    )
+    print(f"  chunk gap      p50={percentile(gaps, 50):8.2f}ms p99={percentile(gaps, 99):8.2f}ms")
+    print(f"  first chunk    p50={percentile(first_chunk, 50):8.2f}ms p99={percentile(first_chunk, 99):8.2f}ms")
+    print(f"  frames/answer  p50={percentile(frames, 50):8d}   for {args.tokens} tokens")
+    print(f"  model tokens   {upstream.tokens}/{args.streams * args.tokens} generated")
+    
+    summary = chat.timing_log.summary(mode=args.pipeline)
+    for name in ("retrieval", "first_token", "ttfb"):
+        if name in summary:
+            print(f"  {name:<14} p50={summary[name]['p50']:8.2f}ms p99={summary[name]['p99']:8.2f}ms")
+    timeouts = chat.timing_log.summary(mode=args.pipeline, retrieval_timed_out=True)["count"]
+    print(f"  retrieval timeouts {timeouts}/{summary['count']}")
+    print(f"  wall time      {elapsed:.2f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--mode", choices=["async", "blocking"], default="async")
+    parser.add_argument("--pipeline", choices=["sequential", "parallel"], default="sequential")
+    parser.add_argument("--deadline", type=float, default=0.8,
+                        help="Retrieval deadline in seconds for the parallel pipeline")
+    parser.add_argument("--connect-latency", type=float, default=0.0,
+                        help="Seconds to open a fresh upstream connection")
+    parser.add_argument("--streams", type=int, default=20)
+    parser.add_argument("--tokens", type=int, default=40)
+    parser.add_argument("--token-interval", type=float, default=0.02)
+    parser.add_argument("--search-latency", type=float, default=0.2)
+    parser.add_argument("--arrival-interval", type=float, default=0.15,
+                        help="Seconds between stream starts, so searches overlap live streams")
+    parser.add_argument("--disconnect-after", type=float, default=0.0,
+                        help="Seconds into each stream after which its client disconnects")
+    args = parser.parse_args()
+    
+    os.environ.setdefault("PINECONE_API_KEY", "benchmark")
+    FakePinecone.data_latency = args.search_latency
+    vector_store.Pinecone = FakePinecone
+    upstream = FakeUpstream(args.connect_latency)
+    chat.generate_chat_response = upstream.chat_response(args.tokens, args.token_interval)
+    chat.prewarm_connection = upstream.prewarm
+    chat.CHAT_PIPELINE_MODE = args.pipeline
+    chat.RETRIEVAL_DEADLINE_SECONDS = args.deadline
+    # Every stream comes from the same fake user; measure the pipeline, not
+    # per-user admission limits
+    chat.CHAT_ADMISSION_ENABLED = False
+    
+    asyncio.run(run(args, upstream))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,292 @@
+"""
+Offline load test of the whole backend over HTTP.
+
+Starts a `benchmarks.fake_openai` server and a `benchmarks.bench_server`
+backend (Pinecone replaced by an in-memory fake seeded from the bundled
+FAQs), then runs the selected scenarios against the backend:
+
+- upload: one bulk NDJSON upload of `--upload-copies` copies of the FAQs
+  to /faqs/upload/stream; reports FAQs per second.
+- search: `--search-requests` /faqs/search calls at `--concurrency`.
+- chat: `--chat-requests` /chat/message streams at `--concurrency`;
+  reports time to first token (first `data:` frame) and stream duration.
+
+Every scenario reports throughput, errors and p50/p95/p99 latency in ms;
+chat also counts requests refused with 429 by admission control apart
+from errors.
+Results are printed as JSON (and written to `--output`) together with the
+configuration, so runs can be diffed. Fake latencies are deterministic per
+request (`--seed`); backend settings come from the environment.
+
+Usage:
+    python -m benchmarks.suite --output before.json
+    CHAT_PIPELINE_MODE=parallel python -m benchmarks.suite --scenarios chat --output after.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+
+import httpx
+from jose import jwt
+
+from benchmarks.bench_server import load_faqs
+from benchmarks.fake_openai import add_arguments as add_fake_openai_arguments
+from benchmarks.retrieval_recall import load_queries
+
+SCENARIOS = ("upload", "search", "chat")
+JWT_SECRET = "benchmark"
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_process(module: str, arguments: list, env: dict) -> subprocess.Popen:
+    return subprocess.Popen(
+        [sys.executable, "-m", module, *arguments],
+        cwd=os.path.join(os.path.dirname(__file__), ".."),
+        env={**os.environ, **env},
+        # Keep stdout for the JSON report
+        stdout=sys.stderr
+    )
+
+
+async def wait_until_ready(url: str, process: subprocess.Popen, timeout: float = 60.0) -> None:
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient() as client:
+        while time.monotonic() < deadline:
+            if process.poll() is not None:
+                raise RuntimeError(f"{url} exited with code {process.returncode}")
+            try:
+                if (await client.get(url)).status_code == 200:
+                    return
+            except httpx.TransportError:
+                pass
+            await asyncio.sleep(0.1)
+    raise RuntimeError(f"{url} not ready after {timeout}s")
+
+
+def distribution(values_ms: list) -> dict:
+    if not values_ms:
+        return None
+    ordered = sorted(values_ms)
+    
+    def pick(pct):
+        return round(ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))], 2)
+    
+    return {
+        "p50": pick(50),
+        "p95": pick(95),
+        "p99": pick(99),
+        "mean": round(sum(ordered) / len(ordered), 2)
+    }
+
+
+async def run_closed_loop(requests: int, concurrency: int, request):
+    """
+    Issue `requests` calls of `request(i)` from `concurrency` workers, each
+    starting its next call as soon as the previous one finishes.
+    """
+    next_index = iter(range(requests))
+    results = []
+    
+    async def worker():
+        for i in next_index:
+            results.append(await request(i))
+    
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return results, time.perf_counter() - start
+
+
+async def upload_scenario(client: httpx.AsyncClient, headers: dict, args) -> dict:
+    faqs = load_faqs(args.upload_copies, prefix="bulk-")
+    body = "".join(faq.model_dump_json() + "\n" for faq in faqs).encode("utf-8")
+    
+    start = time.perf_counter()
+    result = None
+    async with client.stream(
+        "POST",
+        "/api/v1/faqs/upload/stream",
+        content=body,
+        headers={**headers, "Content-Type": "application/x-ndjson"}
+    ) as response:
+        async for line in response.aiter_lines():
+            if line:
+                event = json.loads(line)
+                if event["type"] in ("result", "error"):
+                    result = event
+    elapsed = time.perf_counter() - start
+    
+    return {
+        "faqs": len(faqs),
+        "duration_ms": round(elapsed * 1000, 2),
+        "faqs_per_second": round(len(faqs) / elapsed, 1),
+        "result": result
+    }
+
+
+async def search_scenario(client: httpx.AsyncClient, headers: dict, args, queries: list) -> dict:
+    async def search(i):
+        query = queries[i % len(queries)]
+        start = time.perf_counter()
+        response = await client.post(
+            "/api/v1/faqs/search",
+            json={"query": query, "top_k": 3, "min_score": 0.0},
+            headers=headers
+        )
+        return (time.perf_counter() - start) * 1000, response.status_code == 200
+    
+    results, elapsed = await run_closed_loop(args.search_requests, args.concurrency, search)
+    return {
+        "requests": len(results),
+        "errors": sum(not ok for _, ok in results),
+        "throughput_rps": round(len(results) / elapsed, 1),
+        "latency_ms": distribution([latency for latency, _ in results])
+    }
+
+
+async def chat_scenario(client: httpx.AsyncClient, headers: dict, args, queries: list) -> dict:
+    async def chat(i):
+        start = time.perf_counter()
+        first_token = None
+        frames = 0
+        failed = False
+        event = "message"
+        async with client.stream(
+            "POST",
+            "/api/v1/chat/message",
+            json={"message": queries[i % len(queries)]},
+            headers=headers
+        ) as response:
+            if response.status_code == 429:
+                # Refused by admission control; counted apart from errors
+                return None, (time.perf_counter() - start) * 1000, 0, None
+            failed = response.status_code != 200
+            async for line in response.aiter_lines():
+                if line.startswith("event:"):
+                    event = line[6:].strip()
+                elif line.startswith("data:"):
+                    if event == "error":
+                        failed = True
+                    elif line[5:].strip() != "[DONE]" and first_token is None:
+                        first_token = (time.perf_counter() - start) * 1000
+                elif not line:
+                    frames += event == "message"
+                    event = "message"
+        return first_token, (time.perf_counter() - start) * 1000, frames, failed
+    
+    results, elapsed = await run_closed_loop(args.chat_requests, args.concurrency, chat)
+    rate_limited = [result for result in results if result[3] is None]
+    results = [result for result in results if result[3] is not None]
+    return {
+        "requests": len(results) + len(rate_limited),
+        "errors": sum(failed for *_, failed in results),
+        "rate_limited": len(rate_limited),
+        "throughput_rps": round(len(results) / elapsed, 2),
+        "time_to_first_token_ms": distribution([ttft for ttft, *_ in results if ttft is not None]),
+        "stream_duration_ms": distribution([duration for _, duration, *_ in results]),
+        "frames_per_stream": distribution([frames for _, _, frames, _ in results])
+    }
+
+
+async def run(args):
+    openai_port, backend_port = free_port(), free_port()
+    fake_openai = start_process("benchmarks.fake_openai", [
+        "--port", str(openai_port),
+        "--seed", str(args.seed),
+        "--first-token-latency", str(args.first_token_latency),
+        "--token-interval", str(args.token_interval),
+        "--jitter", str(args.jitter),
+        "--completion-tokens", str(args.completion_tokens),
+        "--embedding-latency", str(args.embedding_latency),
+        "--error-rate", str(args.error_rate)
+    ], {})
+    backend = start_process("benchmarks.bench_server", [
+        "--port", str(backend_port),
+        "--search-latency", str(args.search_latency),
+        "--seed-copies", str(args.seed_copies)
+    ], {
+        "OPENAI_BASE_URL": f"http://127.0.0.1:{openai_port}/v1",
+        "OPENAI_API_KEY": "benchmark",
+        "NEXTAUTH_SECRET": JWT_SECRET
+    })
+    
+    try:
+        await wait_until_ready(f"http://127.0.0.1:{openai_port}/health", fake_openai)
+        await wait_until_ready(f"http://127.0.0.1:{backend_port}/health", backend)
+        
+        token = jwt.encode({"sub": "benchmark", "exp": int(time.time()) + 3600}, JWT_SECRET, algorithm="HS256")
+        headers = {"Authorization": f"Bearer {token}"}
+        queries = [query for query, _, _ in load_queries(load_faqs(1))]
+        
+        results = {}
+        async with httpx.AsyncClient(
+            base_url=f"http://127.0.0.1:{backend_port}",
+            timeout=120.0,
+            limits=httpx.Limits(max_connections=args.concurrency + 4)
+        ) as client:
+            for scenario in args.scenarios:
+                if scenario == "upload":
+                    results["upload"] = await upload_scenario(client, headers, args)
+                elif scenario == "search":
+                    results["search"] = await search_scenario(client, headers, args, queries)
+                elif scenario == "chat":
+                    results["chat"] = await chat_scenario(client, headers, args, queries)
+            server_timings = (await client.get("/api/v1/chat/timings", headers=headers)).json()
+    finally:
+        for process in (backend, fake_openai):
+            process.terminate()
+            process.wait()
+    
+    report = {
+        "config": {
+            **{key: value for key, value in vars(args).items() if key != "output"},
+            "environment": {
+                key: os.environ[key]
+                for key in sorted(os.environ)
+                if key.startswith(("CHAT_", "FAQ_", "RESPONSE_CACHE_", "EMBEDDING_", "SSE_", "OPENAI_MAX", "RERANK_"))
+            }
+        },
+        "scenarios": results,
+        "server_chat_timings": server_timings
+    }
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output + "\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenarios", type=lambda value: value.split(","), default=list(SCENARIOS),
+                        help="Comma-separated, run in this order: upload,search,chat")
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--search-requests", type=int, default=500)
+    parser.add_argument("--chat-requests", type=int, default=100)
+    parser.add_argument("--upload-copies", type=int, default=20,
+                        help="Copies of the bundled FAQs in the bulk upload")
+    parser.add_argument("--seed-copies", type=int, default=1,
+                        help="Copies of the bundled FAQs indexed at startup")
+    parser.add_argument("--search-latency", type=float, default=0.02,
+                        help="Seconds per fake Pinecone call")
+    parser.add_argument("--output", default=None)
+    add_fake_openai_arguments(parser)
+    args = parser.parse_args()
+    
+    unknown = set(args.scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"Unknown scenarios: {', '.join(sorted(unknown))}")
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
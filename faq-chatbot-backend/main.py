@@ -1,16 +1,76 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
+from contextlib import asynccontextmanager
 from dotenv import load_dotenv
+import asyncio
+import logging
 import os
 
+# Load .env before importing app modules, whose config reads the environment
+load_dotenv()
+
 from app.routers import chat, faqs
+from app.db import database
+from app.services.knowledge_base import KnowledgeBaseService
+from app.services.conversation_store import ConversationStore
+from app.services.openai_client import close_openai_client
+from app.services.prompt_builder import get_tokenizer
+from app.config.chat import CHAT_MODEL
+from app.config.vector_store import VECTOR_STORE_BACKEND
+from app.utils.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Build long-lived services once per process. Index checks and the
+    warm-up probe run here instead of on every request.
+    """
+    # Loading the tokenizer may fetch its encoding file; keep it off the first chat
+    await asyncio.to_thread(get_tokenizer, CHAT_MODEL)
+    
+    try:
+        kb_service = KnowledgeBaseService()
+        await kb_service.warm_up()
+        if VECTOR_STORE_BACKEND == "snapshot":
+            kb_service.start_snapshot_watcher()
+        app.state.knowledge_base = kb_service
+    except Exception as e:
+        logger.warning(f"Knowledge base unavailable at startup: {str(e)}")
+        app.state.knowledge_base = None
+    
+    app.state.conversations = None
+    if database is not None:
+        try:
+            await database.connect()
+            app.state.conversations = ConversationStore(database)
+            app.state.conversations.start()
+        except Exception as e:
+            logger.warning(f"Conversation store unavailable at startup: {str(e)}")
+    
+    yield
+    
+    if app.state.conversations is not None:
+        await app.state.conversations.close()
+        app.state.conversations = None
+    if database is not None and database.is_connected:
+        await database.disconnect()
+    
+    if app.state.knowledge_base is not None:
+        app.state.knowledge_base.close()
+        app.state.knowledge_base = None
+    
+    await close_openai_client()
 
-load_dotenv()
 
 app = FastAPI(
     title="FAQ Chatbot API",
     description="AI-powered chatbot with RAG using Pinecone",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 origins = os.getenv("ALLOWED_ORIGINS", "http://localhost:3000").split(",")
@@ -37,3 +97,11 @@ async def root():
 @app.get("/health")
 async def health_check():
     return {"status": "healthy"}
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """
+    Stage latencies and counters of this worker process, in the Prometheus
+    text format.
+    """
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
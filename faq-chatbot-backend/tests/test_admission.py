@@ -0,0 +1,141 @@
+import asyncio
+
+import pytest
+
+from app.services.admission import AdmissionController, AdmissionPolicy, RateLimited
+
+POLICIES = {
+    False: AdmissionPolicy(rate=1.0, burst=10, max_streams=4, weight=1),
+    True: AdmissionPolicy(rate=1.0, burst=10, max_streams=1, weight=1)
+}
+
+
+async def settle():
+    # Let woken waiters run
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+def controller(**kwargs) -> AdmissionController:
+    options = dict(max_in_flight=1, max_queued=8, queue_timeout=1.0, policies=POLICIES)
+    options.update(kwargs)
+    return AdmissionController(**options)
+
+
+def test_ticket_release_is_idempotent():
+    async def scenario():
+        admission = controller()
+        ticket = await admission.acquire("alice")
+        assert admission.in_flight == 1
+
+        ticket.release()
+        ticket.release()
+        assert admission.in_flight == 0
+        assert admission._users["alice"].active == 0
+
+    asyncio.run(scenario())
+
+
+def test_release_hands_the_slot_to_a_waiter():
+    async def scenario():
+        admission = controller()
+        ticket = await admission.acquire("alice")
+        waiter = asyncio.create_task(admission.acquire("bob"))
+        await settle()
+        assert admission.queued == 1
+        assert not waiter.done()
+
+        ticket.release()
+        second = await asyncio.wait_for(waiter, 1)
+        assert admission.in_flight == 1
+        assert admission.queued == 0
+        second.release()
+        assert admission.in_flight == 0
+
+    asyncio.run(scenario())
+
+
+def test_fair_queue_interleaves_a_noisy_user():
+    async def scenario():
+        admission = controller()
+        running = [await admission.acquire("holder")]
+        served = []
+
+        async def request(user_id):
+            running.append(await admission.acquire(user_id))
+            served.append(user_id)
+
+        # Three requests from one user queue before a single one from another
+        waiters = [asyncio.create_task(request("noisy")) for _ in range(3)]
+        await settle()
+        waiters.append(asyncio.create_task(request("quiet")))
+        await settle()
+        assert admission.queued == 4
+
+        while running:
+            running.pop(0).release()
+            await settle()
+
+        assert all(waiter.done() for waiter in waiters)
+        assert served == ["noisy", "quiet", "noisy", "noisy"]
+        assert admission.in_flight == 0
+
+    asyncio.run(scenario())
+
+
+def test_cancelled_waiter_gives_back_its_token_and_place():
+    async def scenario():
+        admission = controller()
+        holder = await admission.acquire("alice")
+        waiter = asyncio.create_task(admission.acquire("bob"))
+        await settle()
+        tokens = admission._users["bob"].tokens
+
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        assert admission.queued == 0
+        assert admission._users["bob"].active == 0
+        assert admission._users["bob"].tokens == tokens + 1
+
+        holder.release()
+        assert admission.in_flight == 0
+
+    asyncio.run(scenario())
+
+
+def test_queue_timeout_is_rejected_with_retry_after():
+    async def scenario():
+        admission = controller(queue_timeout=0.01)
+        holder = await admission.acquire("alice")
+        with pytest.raises(RateLimited) as rejected:
+            await admission.acquire("bob")
+        assert rejected.value.reason == "Timed out waiting for a chat slot"
+        assert int(rejected.value.retry_after_header) >= 1
+        assert admission.queued == 0
+        holder.release()
+
+    asyncio.run(scenario())
+
+
+def test_rate_and_stream_limits():
+    async def scenario():
+        now = [0.0]
+        policies = {False: AdmissionPolicy(rate=0.5, burst=1, max_streams=1, weight=1), True: POLICIES[True]}
+        admission = controller(max_in_flight=4, policies=policies, clock=lambda: now[0])
+
+        ticket = await admission.acquire("alice")
+        with pytest.raises(RateLimited) as rejected:
+            await admission.acquire("alice")
+        assert rejected.value.reason == "Too many messages"
+        assert rejected.value.retry_after == pytest.approx(2.0)
+
+        now[0] = 2.0
+        with pytest.raises(RateLimited) as rejected:
+            await admission.acquire("alice")
+        assert rejected.value.reason == "Too many chat streams open"
+
+        ticket.release()
+        (await admission.acquire("alice")).release()
+
+    asyncio.run(scenario())
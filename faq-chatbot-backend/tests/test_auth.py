@@ -0,0 +1,162 @@
+import base64
+import hashlib
+import hmac
+import json
+import time
+
+import pytest
+from fastapi import HTTPException
+
+from app.utils import auth
+from app.utils.auth import HMACTokenDecoder, InvalidTokenError, TokenVerifier
+
+SECRET = "test-secret"
+
+
+def b64encode(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode("ascii")
+
+
+def make_token(payload: dict, secret: str = SECRET, alg: str = "HS256", sign_with: str = "HS256") -> str:
+    header = b64encode(json.dumps({"alg": alg, "typ": "JWT"}).encode("utf-8"))
+    body = b64encode(json.dumps(payload).encode("utf-8"))
+    signing_input = f"{header}.{body}"
+    digest = HMACTokenDecoder.DIGESTS[sign_with]
+    signature = hmac.new(secret.encode("utf-8"), signing_input.encode("ascii"), digest).digest()
+    return f"{signing_input}.{b64encode(signature)}"
+
+
+class FakeClock:
+    def __init__(self, now: float):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock(1_700_000_000.0)
+    monkeypatch.setattr(auth.time, "time", fake)
+    return fake
+
+
+def test_hmac_decoder_accepts_a_valid_token(clock):
+    payload = {"sub": "user-1", "exp": clock.now + 60, "nbf": clock.now - 60}
+    assert HMACTokenDecoder(SECRET, "HS256").decode(make_token(payload)) == payload
+
+
+@pytest.mark.parametrize("alg, sign_with", [("HS512", "HS512"), ("none", "HS256"), ("HS384", "HS256")])
+def test_hmac_decoder_rejects_other_algorithms(alg, sign_with):
+    with pytest.raises(InvalidTokenError, match="alg value is not allowed"):
+        HMACTokenDecoder(SECRET, "HS256").decode(make_token({"sub": "user-1"}, alg=alg, sign_with=sign_with))
+
+
+def test_hmac_decoder_rejects_unsupported_algorithm_at_startup():
+    with pytest.raises(ValueError):
+        HMACTokenDecoder(SECRET, "RS256")
+
+
+def test_hmac_decoder_rejects_a_bad_signature():
+    with pytest.raises(InvalidTokenError, match="Signature verification failed"):
+        HMACTokenDecoder(SECRET, "HS256").decode(make_token({"sub": "user-1"}, secret="other-secret"))
+
+
+def test_hmac_decoder_rejects_malformed_tokens():
+    decoder = HMACTokenDecoder(SECRET, "HS256")
+    for token in ("abc", "a.b", "!!.e30.sig"):
+        with pytest.raises(InvalidTokenError):
+            decoder.decode(token)
+
+
+def test_hmac_decoder_checks_exp_and_nbf(clock):
+    decoder = HMACTokenDecoder(SECRET, "HS256")
+    with pytest.raises(InvalidTokenError, match="expired"):
+        decoder.decode(make_token({"sub": "user-1", "exp": clock.now - 1}))
+    with pytest.raises(InvalidTokenError, match="not yet valid"):
+        decoder.decode(make_token({"sub": "user-1", "nbf": clock.now + 1}))
+    with pytest.raises(InvalidTokenError, match="must be a number"):
+        decoder.decode(make_token({"sub": "user-1", "exp": "tomorrow"}))
+
+
+@pytest.mark.parametrize("backend", ["hmac", "jose"])
+def test_backends_agree_on_expiry(backend):
+    pytest.importorskip("jose")
+    # jose reads the wall clock itself, so no fake clock here
+    now = time.time()
+    decode, errors = auth.load_jwt_backend(backend, SECRET, "HS256")
+    assert decode(make_token({"sub": "user-1", "exp": now + 3600}))["sub"] == "user-1"
+    with pytest.raises(errors):
+        decode(make_token({"sub": "user-1", "exp": now - 3600}))
+
+
+def counting_verifier(**kwargs) -> TokenVerifier:
+    verifier = TokenVerifier(secret=SECRET, algorithm="HS256", backend="hmac", **kwargs)
+    decode = verifier._decode
+    verifier.decodes = 0
+
+    def counted(token):
+        verifier.decodes += 1
+        return decode(token)
+
+    verifier._decode = counted
+    return verifier
+
+
+def test_verifier_caches_valid_tokens(clock):
+    verifier = counting_verifier()
+    token = make_token({"sub": "user-1", "exp": clock.now + 60})
+    assert verifier.verify(token)["sub"] == "user-1"
+    assert verifier.verify(token)["sub"] == "user-1"
+    assert verifier.decodes == 1
+    assert hashlib.sha256(token.encode("utf-8")).digest() in verifier._cache
+
+
+def test_verifier_cache_expires_with_the_token(clock):
+    verifier = counting_verifier()
+    token = make_token({"sub": "user-1", "exp": clock.now + 60})
+    verifier.verify(token)
+
+    clock.now += 61
+    with pytest.raises(HTTPException) as rejected:
+        verifier.verify(token)
+    assert rejected.value.status_code == 401
+    assert verifier.stats()["cached_tokens"] == 0
+
+
+def test_verifier_reverifies_tokens_without_exp_after_max_ttl(clock):
+    verifier = counting_verifier(max_ttl=30)
+    token = make_token({"sub": "user-1"})
+    verifier.verify(token)
+    clock.now += 29
+    verifier.verify(token)
+    assert verifier.decodes == 1
+
+    clock.now += 2
+    verifier.verify(token)
+    assert verifier.decodes == 2
+
+
+def test_verifier_never_caches_invalid_tokens(clock):
+    verifier = counting_verifier()
+    token = make_token({"sub": "user-1"}, secret="other-secret")
+    for _ in range(2):
+        with pytest.raises(HTTPException):
+            verifier.verify(token)
+    assert verifier.decodes == 2
+    assert verifier.stats()["cached_tokens"] == 0
+
+
+def test_verifier_evicts_least_recently_used(clock):
+    verifier = counting_verifier(cache_size=2)
+    tokens = [make_token({"sub": f"user-{i}", "exp": clock.now + 60}) for i in range(3)]
+    verifier.verify(tokens[0])
+    verifier.verify(tokens[1])
+    verifier.verify(tokens[0])
+    verifier.verify(tokens[2])
+    assert verifier.stats()["cached_tokens"] == 2
+
+    verifier.verify(tokens[0])
+    assert verifier.decodes == 3
+    verifier.verify(tokens[1])
+    assert verifier.decodes == 4
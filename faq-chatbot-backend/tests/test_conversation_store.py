@@ -0,0 +1,130 @@
+import asyncio
+from contextlib import asynccontextmanager
+
+import asyncpg
+
+from app.services.conversation_store import ConversationStore
+
+
+class FakeDatabase:
+    """
+    Just enough of `databases.Database` for the write path: rows are kept
+    per message id, a transaction rolls back on error, inserts into a
+    deleted session fail like a foreign key violation, and `down` makes
+    every call fail like a lost connection.
+    """
+    def __init__(self):
+        self.messages = {}
+        self.deleted_sessions = set()
+        self.down = False
+        self.batches = []
+
+    @asynccontextmanager
+    async def transaction(self):
+        if self.down:
+            raise ConnectionRefusedError("connection refused")
+        saved = dict(self.messages)
+        try:
+            yield
+        except BaseException:
+            self.messages = saved
+            raise
+
+    async def execute_many(self, query, values):
+        self.batches.append(len(values))
+        for row in values:
+            if row["chat_session_id"] in self.deleted_sessions:
+                raise asyncpg.exceptions.ForeignKeyViolationError("chat_session_id not present")
+            # ON CONFLICT (id) DO NOTHING
+            self.messages.setdefault(row["id"], row)
+
+    async def execute(self, query, values=None):
+        pass
+
+    async def fetch_val(self, query, values=None):
+        return "user-1"
+
+    async def fetch_all(self, query, values=None):
+        return []
+
+
+def test_flush_writes_a_batch_in_one_insert():
+    async def scenario():
+        database = FakeDatabase()
+        store = ConversationStore(database, batch_size=10)
+        for i in range(4):
+            store.append("session-1", "user", f"message {i}")
+        assert await store.flush()
+        return database, store
+
+    database, store = asyncio.run(scenario())
+    assert database.batches == [4]
+    assert len(database.messages) == 4
+    assert store.stats()["pending_writes"] == 0
+    assert store.written == 4
+
+
+def test_rejected_batch_falls_back_to_one_message_at_a_time():
+    async def scenario():
+        database = FakeDatabase()
+        database.deleted_sessions.add("deleted")
+        store = ConversationStore(database, batch_size=10)
+        await store.get_history("deleted", "user-1")
+        store.append("session-1", "user", "first")
+        store.append("deleted", "user", "lost")
+        store.append("session-1", "assistant", "second")
+        assert await store.flush()
+        return database, store
+
+    database, store = asyncio.run(scenario())
+    assert sorted(row["content"] for row in database.messages.values()) == ["first", "second"]
+    assert database.batches == [3, 1, 1, 1]
+    assert store.written == 2
+    assert store.rejected == 1
+    assert store.stats()["pending_writes"] == 0
+    # The deleted session is reloaded (and rejected) on its next turn
+    assert "deleted" not in store._windows
+
+
+def test_transient_error_keeps_the_batch_queued():
+    async def scenario():
+        database = FakeDatabase()
+        store = ConversationStore(database, batch_size=10)
+        store.append("session-1", "user", "question")
+        store.append("session-1", "assistant", "answer")
+
+        database.down = True
+        assert not await store.flush()
+        assert store.stats()["pending_writes"] == 2
+        assert store.write_failures == 1
+
+        database.down = False
+        assert await store.flush()
+        return database, store
+
+    database, store = asyncio.run(scenario())
+    assert [row["content"] for row in database.messages.values()] == ["question", "answer"]
+    assert store.stats()["pending_writes"] == 0
+
+
+def test_retried_batch_is_not_written_twice():
+    async def scenario():
+        database = FakeDatabase()
+        store = ConversationStore(database, batch_size=10)
+        store.append("session-1", "user", "question")
+        batch = list(store._pending)
+        # The commit went through but its acknowledgement was lost
+        await store._insert(batch)
+        assert await store.flush()
+        return database
+
+    assert len(asyncio.run(scenario()).messages) == 1
+
+
+def test_full_queue_drops_the_oldest_message():
+    database = FakeDatabase()
+    store = ConversationStore(database, max_pending=2)
+    for content in ("one", "two", "three"):
+        store.append("session-1", "user", content)
+    assert [row["content"] for row in store._pending] == ["two", "three"]
+    assert store.dropped == 1
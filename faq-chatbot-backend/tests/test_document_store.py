@@ -0,0 +1,80 @@
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+from app.services.document_store import DocumentStore
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+
+WRITER = """
+import json, sys
+from app.services.document_store import DocumentStore
+
+store = DocumentStore(path=sys.argv[1])
+store.put_many(json.loads(sys.argv[2]))
+store.delete(json.loads(sys.argv[3]))
+store.close()
+"""
+
+
+def write_from_another_process(path, documents, deleted=()):
+    subprocess.run(
+        [sys.executable, "-c", WRITER, str(path), json.dumps(documents), json.dumps(list(deleted))],
+        cwd=BACKEND_DIR,
+        check=True
+    )
+
+
+def test_round_trip_and_compression(tmp_path):
+    store = DocumentStore(path=str(tmp_path / "docs.db"), compress_min_bytes=64)
+    long_answer = "Reset it from the account page. " * 20
+    store.put_many({"short": "Yes.", "long": long_answer})
+    assert store.get_many(["short", "long", "missing"]) == {"short": "Yes.", "long": long_answer}
+    assert store.stats()["memory_bytes"] < len(long_answer)
+    store.close()
+
+    reopened = DocumentStore(path=str(tmp_path / "docs.db"))
+    assert reopened.get("long") == long_answer
+    reopened.close()
+
+
+def test_batch_shares_one_version(tmp_path):
+    store = DocumentStore(path=str(tmp_path / "docs.db"))
+    store.put_many({f"faq-{i}": f"answer {i}" for i in range(100)})
+    store.put_many({"faq-0": "changed"})
+    versions = dict(store._conn.execute("SELECT id, version FROM documents"))
+    assert set(versions[f"faq-{i}"] for i in range(1, 100)) == {1}
+    assert versions["faq-0"] == 2
+    store.close()
+
+
+def test_refresh_picks_up_writes_from_another_process(tmp_path):
+    path = tmp_path / "docs.db"
+    reader = DocumentStore(path=str(path), refresh_interval=0)
+    reader.put_many({"kept": "old", "changed": "old", "removed": "old"})
+
+    write_from_another_process(path, {"changed": "new", "added": "new"}, deleted=["removed"])
+
+    assert reader.get_many(["kept", "changed", "added", "removed"]) == {
+        "kept": "old",
+        "changed": "new",
+        "added": "new"
+    }
+    assert reader.stats()["documents"] == 3
+    reader.close()
+
+
+def test_refresh_is_throttled(tmp_path):
+    path = tmp_path / "docs.db"
+    reader = DocumentStore(path=str(path), refresh_interval=3600)
+    reader.put_many({"changed": "old"})
+    assert reader.get("changed") == "old"
+
+    write_from_another_process(path, {"changed": "new", "added": "new"})
+
+    # Cached bodies wait for the next refresh; unknown ids are read from the file
+    assert reader.get_many(["changed", "added"]) == {"changed": "old", "added": "new"}
+    reader._next_refresh = 0.0
+    assert reader.get("changed") == "new"
+    reader.close()
@@ -0,0 +1,79 @@
+import asyncio
+
+from benchmarks.fakes import BagOfWordsEmbeddingService
+from app.models.faq import FAQ, FAQIngestionFailure
+from app.services.knowledge_base import KnowledgeBaseService
+from app.services.local_vector_store import LocalVectorStore
+
+
+def make_faqs(count: int):
+    return [
+        FAQ(
+            id=f"faq-{i}",
+            question=f"How do I change setting {i}?",
+            answer=f"Open the settings page and change setting {i}.",
+            category="account",
+            keywords=[]
+        )
+        for i in range(count)
+    ]
+
+
+def knowledge_base() -> KnowledgeBaseService:
+    embedding_service = BagOfWordsEmbeddingService(dimension=64)
+    return KnowledgeBaseService(
+        embedding_service=embedding_service,
+        vector_store=LocalVectorStore(dimension=embedding_service.dimension)
+    )
+
+
+async def stored_ids(kb_service: KnowledgeBaseService):
+    return sorted(await kb_service.vector_store.list_ids(namespace=kb_service.namespace))
+
+
+def test_full_sync_deletes_faqs_missing_from_the_upload():
+    async def scenario():
+        kb_service = knowledge_base()
+        await kb_service.add_faqs_batch(make_faqs(5))
+        report = await kb_service.add_faqs_batch(make_faqs(3), full_sync=True)
+        return report, await stored_ids(kb_service)
+
+    report, ids = asyncio.run(scenario())
+    assert report.deleted == 2
+    assert report.skipped == 3
+    assert not report.deletes_skipped
+    assert ids == ["faq-0", "faq-1", "faq-2"]
+
+
+def test_full_sync_deletes_nothing_when_records_were_invalid():
+    async def scenario():
+        kb_service = knowledge_base()
+        await kb_service.add_faqs_batch(make_faqs(5))
+        invalid_records = []
+
+        async def parsed():
+            # Like the upload parser: rejected rows are reported as the
+            # stream is read, so the guard must look after ingestion
+            for faq in make_faqs(3):
+                yield faq
+            invalid_records.append(FAQIngestionFailure(id="row 4", error="Missing answer"))
+
+        report = await kb_service.add_faqs_batch(parsed(), full_sync=True, invalid_records=invalid_records)
+        return report, await stored_ids(kb_service)
+
+    report, ids = asyncio.run(scenario())
+    assert report.deletes_skipped
+    assert report.deleted == 0
+    assert ids == [f"faq-{i}" for i in range(5)]
+
+
+def test_plain_upload_never_deletes():
+    async def scenario():
+        kb_service = knowledge_base()
+        await kb_service.add_faqs_batch(make_faqs(5))
+        report = await kb_service.add_faqs_batch(make_faqs(2))
+        return report, await stored_ids(kb_service)
+
+    report, ids = asyncio.run(scenario())
+    assert report.deleted == 0
+    assert len(ids) == 5
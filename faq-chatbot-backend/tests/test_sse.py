@@ -0,0 +1,94 @@
+import asyncio
+
+from app.utils.sse import HEARTBEAT, format_event, stream_events
+
+
+class Upstream:
+    """
+    Async iterator of deltas with an optional delay before each, that
+    records whether it was closed.
+    """
+    def __init__(self, deltas, delays=None):
+        self.deltas = deltas
+        self.delays = delays or [0.0] * len(deltas)
+        self.closed = False
+
+    async def _generate(self):
+        try:
+            for delta, delay in zip(self.deltas, self.delays):
+                if delay:
+                    await asyncio.sleep(delay)
+                yield delta
+        finally:
+            self.closed = True
+
+    def __aiter__(self):
+        return self._generate()
+
+
+async def collect(frames):
+    return [frame async for frame in frames]
+
+
+def test_format_event_splits_lines():
+    assert format_event("a\nb", event="error") == "event: error\ndata: a\ndata: b\n\n"
+
+
+def test_first_delta_is_sent_at_once_and_the_rest_coalesced():
+    upstream = Upstream(["Hel", "lo", " wor", "ld"])
+    frames = asyncio.run(collect(stream_events(upstream, window_ms=1000, max_chars=512, heartbeat_seconds=0)))
+    assert frames == [format_event("Hel"), format_event("lo world")]
+    assert upstream.closed
+
+
+def test_frame_is_sent_when_the_buffer_is_full():
+    upstream = Upstream(["a", "bb", "cc", "d"])
+    frames = asyncio.run(collect(stream_events(upstream, window_ms=1000, max_chars=4, heartbeat_seconds=0)))
+    assert frames == [format_event("a"), format_event("bbcc"), format_event("d")]
+
+
+def test_window_bounds_how_long_a_delta_waits():
+    upstream = Upstream(["a", "b", "c"], delays=[0.0, 0.0, 0.1])
+    frames = asyncio.run(collect(stream_events(upstream, window_ms=20, max_chars=512, heartbeat_seconds=0)))
+    assert frames == [format_event("a"), format_event("b"), format_event("c")]
+
+
+def test_heartbeat_while_upstream_is_idle():
+    upstream = Upstream(["late"], delays=[0.1])
+    frames = asyncio.run(collect(stream_events(upstream, window_ms=0, max_chars=512, heartbeat_seconds=0.02)))
+    assert frames[-1] == format_event("late")
+    assert len(frames) >= 3
+    assert set(frames[:-1]) == {HEARTBEAT}
+
+
+def test_disconnect_stops_and_closes_the_upstream():
+    async def scenario():
+        upstream = Upstream(["a", "b", "c"], delays=[0.0, 0.01, 0.01])
+        connected = [True]
+
+        async def is_disconnected():
+            return not connected[0]
+
+        frames = []
+        async for frame in stream_events(upstream, window_ms=0, heartbeat_seconds=0, is_disconnected=is_disconnected):
+            frames.append(frame)
+            connected[0] = False
+        # The upstream is closed in the background
+        await asyncio.sleep(0.05)
+        return frames, upstream
+
+    frames, upstream = asyncio.run(scenario())
+    assert frames == [format_event("a")]
+    assert upstream.closed
+
+
+def test_consumer_stopping_early_closes_the_upstream():
+    async def scenario():
+        upstream = Upstream(["a", "b"], delays=[0.0, 10.0])
+        frames = stream_events(upstream, window_ms=0, heartbeat_seconds=0)
+        assert await frames.__anext__() == format_event("a")
+        await frames.aclose()
+        await asyncio.sleep(0.01)
+        return upstream
+
+    assert asyncio.run(scenario()).closed
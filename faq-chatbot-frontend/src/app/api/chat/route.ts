@@ -5,7 +5,7 @@ import type { UIMessagePart } from '@/types/chat'
 
 export async function POST(req: NextRequest) {
   try {
-    const { messages }: { messages: UIMessage[] } = await req.json()
+    const { messages, sessionId }: { messages: UIMessage[]; sessionId?: string } = await req.json()
 
     // Get token from Authorization header (sent from client)
     // For both authenticated and anonymous users
@@ -45,17 +45,29 @@ export async function POST(req: NextRequest) {
       async execute({ writer }) {
         const backendUrl = process.env.FASTAPI_INTERNAL_URL || 'http://localhost:8000'
         
-        const response = await fetch(`${backendUrl}/api/v1/chat/message`, {
-          method: 'POST',
-          headers: {
-            'Authorization': `Bearer ${token}`,
-            'Content-Type': 'application/json',
-          },
-          body: JSON.stringify({ 
-            message: userText,
-            history: conversationHistory
-          }),
-        })
+        const sendMessage = (body: Record<string, unknown>) =>
+          fetch(`${backendUrl}/api/v1/chat/message`, {
+            method: 'POST',
+            headers: {
+              'Authorization': `Bearer ${token}`,
+              'Content-Type': 'application/json',
+            },
+            body: JSON.stringify(body),
+            // Aborts the backend stream (and the model call) when the browser goes away
+            signal: req.signal,
+          })
+
+        // Saved chats: the backend loads and stores the history itself
+        let response = sessionId
+          ? await sendMessage({ message: userText, session_id: sessionId })
+          : await sendMessage({ message: userText, history: conversationHistory })
+
+        if (sessionId && response.status === 503) {
+          // Conversation store is down: answer from the local history; this
+          // turn isn't saved
+          console.warn('Conversation store unavailable; resending chat message with history')
+          response = await sendMessage({ message: userText, history: conversationHistory })
+        }
 
         if (!response.ok) {
           throw new Error('Failed to get response from backend')
@@ -76,27 +88,41 @@ export async function POST(req: NextRequest) {
         })
         
         try {
-          while (true) {
+          // Server-Sent Events: events end with a blank line, each line of
+          // the payload is its own `data:` field, `:` lines are heartbeats
+          let buffer = ''
+          let finished = false
+          
+          while (!finished) {
             const { done, value } = await reader.read()
             if (done) break
             
-            const chunk = decoder.decode(value)
-            const lines = chunk.split('\n')
+            buffer += decoder.decode(value, { stream: true })
+            const events = buffer.split('\n\n')
+            buffer = events.pop() ?? ''
             
-            for (const line of lines) {
-              if (line.startsWith('data: ')) {
-                const data = line.slice(6)
-                if (data === '[DONE]') break
-                if (data && !data.startsWith('Error')) {
-                  // Replace placeholders back to newlines
-                  const restoredData = data.replace(/<\|newline\|>/g, '\n')
-                  writer.write({
-                    type: 'text-delta',
-                    id: textId,
-                    delta: restoredData,
-                  })
+            for (const event of events) {
+              let type = 'message'
+              const data: string[] = []
+              for (const line of event.split('\n')) {
+                if (line.startsWith('event:')) {
+                  type = line.slice(6).trim()
+                } else if (line.startsWith('data:')) {
+                  data.push(line.slice(line.startsWith('data: ') ? 6 : 5))
                 }
               }
+              
+              if (data.length === 0 || type === 'error') continue
+              const text = data.join('\n')
+              if (text === '[DONE]') {
+                finished = true
+                break
+              }
+              writer.write({
+                type: 'text-delta',
+                id: textId,
+                delta: text,
+              })
             }
           }
         } finally {
@@ -99,30 +99,10 @@ export function ChatInput() {
     transport: new DefaultChatTransport({
       api: '/api/chat'
     }),
-    onFinish: async ({ message }) => {
-      const currentChatId = chatIdRef.current
-      // Only save to database for authenticated users with chat sessions
-      if (!currentChatId || !session) return
-
-      try {
-        const content = message.parts
-          .filter(p => p.type === 'text')
-          .map(p => (p as UIMessagePart).text)
-          .join('')
-
-        await fetch(`/api/chats/${currentChatId}/messages`, {
-          method: 'POST',
-          headers: { 'Content-Type': 'application/json' },
-          body: JSON.stringify({
-            role: message.role,
-            content
-          })
-        })
-        
-        // Update chat list after saving message
+    onFinish: () => {
+      // The backend saves both messages of the turn for chats with a session
+      if (chatIdRef.current && session) {
         triggerRefreshChats()
-      } catch (error) {
-        console.error('Failed to save message:', error)
       }
     }
   })
@@ -233,16 +213,6 @@ export function ChatInput() {
 
     if (activeChatId && session) {
       try {
-        // Save user message
-        await fetch(`/api/chats/${activeChatId}/messages`, {
-          method: 'POST',
-          headers: { 'Content-Type': 'application/json' },
-          body: JSON.stringify({
-            role: 'user',
-            content: input
-          })
-        })
-        
         if (messages.length === 0 && token) {
           try {
             const { generateChatTitle } = await import('@/lib/generate-title')
@@ -271,6 +241,7 @@ export function ChatInput() {
         headers: token ? {
           'Authorization': `Bearer ${token}`,
         } : {},
+        body: activeChatId && session ? { sessionId: activeChatId } : undefined,
       }
     )
     setInput("")